@@ -1,20 +1,31 @@
+import os
+
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import json
-import numpy as np
 
-st.set_page_config(page_title="НМТ 2024-2025: Повний Аналіз", layout="wide", page_icon="🎯")
+# pandas і plotly імпортуються всередині розділів, яким вони потрібні: холодний
+# старт і розділи без таблиць/графіків їх не чекають (див. python -m nmt startup).
+from nmt import (
+    LETTER_COLORS, LETTERS, STRATEGIES, analytics, calculator_distribution, calculator_spec, figure, load_dataset, simulate,
+    deep_size, process_memory, profiling, shared, sorted_comparison, strategy_color, strategy_question_probs,
+)
+from nmt.profiling import phase
+
+# Час фаз цього перезапуску (див. nmt.profiling; панель — з ?debug=1)
+profiling.start()
+
+# Завантаження даних (один розбір JSON на процес, спільний для всіх сесій).
+# Роки й сесії беруться з даних: файл або тека файлів по роках (NMT_DATA).
+try:
+    with phase("load"):
+        DATA = load_dataset()
+except FileNotFoundError:
+    DATA = None
+YEAR_SPAN = f"{DATA.years[0]}-{DATA.years[-1]}" if DATA and len(DATA.years) > 1 else "".join(DATA.years if DATA else ())
 
-# Таблиця переводу балів
-SCORE_TABLE = {5: 100, 6: 108, 7: 115, 8: 123, 9: 131, 10: 134, 11: 137, 12: 140, 13: 143,
-               14: 145, 15: 147, 16: 148, 17: 149, 18: 150, 19: 151, 20: 152, 21: 155, 22: 159,
-               23: 163, 24: 167, 25: 170, 26: 173, 27: 176, 28: 180, 29: 184, 30: 189, 31: 194, 32: 200}
+st.set_page_config(page_title=f"НМТ {YEAR_SPAN}: Повний Аналіз", layout="wide", page_icon="🎯")
 
-def test_to_nmt_score(test_score):
-    if test_score < 5: return 0
-    if test_score > 32: return 200
-    return SCORE_TABLE.get(int(test_score), 0)
+STRATEGY_OPTIONS = ["Оптимальна (найкраща)", "Завжди А", "Завжди Б", "Завжди В", "Завжди Г", "Завжди Д", "Випадково (1/5)"]
+MATCH_POLICY_LABELS = {"Не вгадувати": 'none', "Найчастіша літера пари": 'optimal', "Випадково, без повторів літер": 'random'}
 
 # Стилі
 st.markdown("""
@@ -32,29 +43,57 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Завантаження даних
-try:
-    with open('nmt_full_data.json', 'r', encoding='utf-8') as f:
-        ALL_DATA = json.load(f)
-except FileNotFoundError:
+if DATA is None:
     st.error("❌ Файл nmt_full_data.json не знайдено! Покладіть його в ту ж папку, що й цей скрипт.")
     st.stop()
 
-st.markdown('<p class="main-header">🎯 НМТ 2024-2025: Повна Статистика 1-22</p>', unsafe_allow_html=True)
-st.markdown('<p style="text-align: center; color: #666; font-size: 1.2rem; margin-bottom: 2rem;">Аналіз 748 відповідей з 34 варіантів НМТ</p>', unsafe_allow_html=True)
+N_ANSWERS = DATA.n_variants * 22  # 22 завдання у кожному варіанті
+
+st.markdown(f'<p class="main-header">🎯 НМТ {YEAR_SPAN}: Повна Статистика 1-22</p>', unsafe_allow_html=True)
+st.markdown(f'<p style="text-align: center; color: #666; font-size: 1.2rem; margin-bottom: 2rem;">Аналіз {N_ANSWERS} відповідей з {DATA.n_variants} варіантів НМТ</p>', unsafe_allow_html=True)
+
+# Розділ можна відкрити одразу посиланням: ?section=stats
+SECTIONS = {
+    "🎯 КАЛЬКУЛЯТОР БАЛІВ": "calculator",
+    "📊 Статистика по завданнях": "stats",
+    "💡 Оптимальні стратегії": "strategies",
+    "🔥 Порівняння років": "compare",
+}
+SECTION_INDEX = {slug: i for i, slug in enumerate(SECTIONS.values())}
+
+YEAR_EMOJI = ["🔴", "🔵", "🟢", "🟣", "🟠", "🟡"]
+YEAR_NAMES = {year: f"{YEAR_EMOJI[i % len(YEAR_EMOJI)]} НМТ {year}" for i, year in enumerate(DATA.years)}
+CUSTOM_YEARS = "🧩 Свій набір років"
+YEAR_FILTERS = {"📊 Усі роки": DATA.years, **{name: (year,) for year, name in YEAR_NAMES.items()}}
+if len(DATA.years) > 2:
+    YEAR_FILTERS[CUSTOM_YEARS] = None
 
 # Sidebar
 with st.sidebar:
     st.header("⚙️ Налаштування")
-    year_filter = st.radio("🗓️ Рік:", ["📊 Обидва роки", "🔴 НМТ 2024", "🔵 НМТ 2025"], index=0)
+    year_filter = st.radio("🗓️ Рік:", list(YEAR_FILTERS), index=0)
+    years = YEAR_FILTERS[year_filter]
+    if years is None:
+        years = tuple(st.multiselect("Роки:", DATA.years, default=list(DATA.years))) or DATA.years
     st.markdown("---")
     st.subheader("📈 Розділи:")
-    analysis_type = st.radio("", [
-        "🎯 КАЛЬКУЛЯТОР БАЛІВ",
-        "📊 Статистика по завданнях",
-        "💡 Оптимальні стратегії",
-        "🔥 Порівняння років"
-    ])
+    analysis_type = st.radio("", list(SECTIONS), index=SECTION_INDEX.get(st.query_params.get("section"), 0))
+
+# Лічильники кешуються на кожен набір років, тож повтор вибору нічого не перераховує
+with phase("aggregate"):
+    agg = DATA.counts.total(years)
+profiling.watch("shared", DATA.counts.shared)
+profiling.watch("figures", DATA.counts.figures)
+
+
+def dataframe(data):
+    """pd.DataFrame з обліком часу у фазі 'dataframe'."""
+    import pandas as pd
+
+    with phase("dataframe"):
+        return pd.DataFrame(data)
+
+years_label = ", ".join(years)
 
 # ===== КАЛЬКУЛЯТОР БАЛІВ =====
 if analysis_type == "🎯 КАЛЬКУЛЯТОР БАЛІВ":
@@ -80,12 +119,17 @@ if analysis_type == "🎯 КАЛЬКУЛЯТОР БАЛІВ":
     with col1:
         st.markdown("### 📝 Завдання 1-15 (по 1 балу)")
         known_1_15 = st.slider("Скільки знаю напевно:", 0, 15, 10, key="k1")
-        strategy_1_15 = st.selectbox("Стратегія для невідомих:", 
-            ["Оптимальна (найкраща)", "Завжди А", "Завжди Б", "Завжди В", "Завжди Г", "Завжди Д", "Випадково (1/5)"])
+        strategy_1_15 = st.selectbox("Стратегія для невідомих:", STRATEGY_OPTIONS)
+        conditional = st.checkbox("🔗 Умовна: вгадувати за відомими сусідніми відповідями", key="c1",
+                                  help="Найчастіша літера після відомої попередньої (або перед відомою наступною) "
+                                       "відповіді; якщо сусіди невідомі — обрана вище стратегія не діє, береться "
+                                       "найчастіша літера питання. Оцінка — без свого варіанта (leave-one-out).")
 
         st.markdown("### 📋 Завдання 16-18 (по 3 бали)")
         st.caption("Кожне завдання має 3 пари → всього 9 балів")
         known_16_18 = st.slider("Скільки балів знаю:", 0, 9, 6, key="k2")
+        guess_16_18 = st.checkbox("🎯 Вгадувати невідомі пари (найкраща спільна трійка)", key="g2",
+                                  help="Невідомі пари доповнюються найчастішою трійкою з урахуванням відомих пар")
 
         st.markdown("### 🔢 Завдання 19-22 (по 2 бали)")
         known_19_22 = st.slider("Скільки балів знаю:", 0, 8, 4, key="k3")
@@ -95,45 +139,24 @@ if analysis_type == "🎯 КАЛЬКУЛЯТОР БАЛІВ":
 
         unknown_1_15 = 15 - known_1_15
 
-        # Статистика
-        all_answers_1_15 = []
-        data_to_use = []
-        if year_filter == "🔴 НМТ 2024":
-            data_to_use = [ALL_DATA['2024']]
-        elif year_filter == "🔵 НМТ 2025":
-            data_to_use = [ALL_DATA['2025']]
-        else:
-            data_to_use = [ALL_DATA['2024'], ALL_DATA['2025']]
-
-        for year_data in data_to_use:
-            for date, tasks in year_data.items():
-                all_answers_1_15.extend(tasks['1-15'])
-
-        from collections import Counter
-        answer_counts = Counter(all_answers_1_15)
-        total = len(all_answers_1_15)
-
-        optimal_per_question = []
-        for i in range(15):
-            q_answers = []
-            for year_data in data_to_use:
-                for date, tasks in year_data.items():
-                    q_answers.append(tasks['1-15'][i])
-            optimal_per_question.append(Counter(q_answers).most_common(1)[0][1] / len(q_answers))
-
-        optimal_success = sum(optimal_per_question) / 15
-
-        if "Оптимальна" in strategy_1_15:
-            guess_rate = optimal_success
-        elif "Випадково" in strategy_1_15:
-            guess_rate = 0.2
-        else:
-            letter = strategy_1_15.split()[-1]
-            guess_rate = answer_counts[letter] / total
-
-        guessed_1_15 = unknown_1_15 * guess_rate
-        total_test = known_1_15 + guessed_1_15 + known_16_18 + known_19_22
-        nmt_score = test_to_nmt_score(total_test)
+        # Усі стратегії × усі положення повзунків пораховані заздалегідь
+        surface = agg.match_surface if guess_16_18 else agg.surface
+        strategy_idx = STRATEGY_OPTIONS.index(strategy_1_15)
+        test_scores, nmt_scores = surface.at(known_1_15, known_16_18, known_19_22)
+
+        total_test = test_scores[strategy_idx]
+        guessed_16_18 = agg.match_tables.expected_guess[known_16_18] if guess_16_18 else 0.0
+        guessed_1_15 = total_test - known_1_15 - known_16_18 - known_19_22 - guessed_16_18
+        nmt_score = nmt_scores[strategy_idx]
+        cond_pmfs = None
+        if conditional:
+            # таблиця [невідомих, вгадано] уже порахована на набір років — тут лише індекс
+            sequences = DATA.sequences.total(years)
+            cond = shared(DATA.counts, analytics.conditional_strategy, sequences, known_1_15)
+            cond_pmfs = tuple(map(tuple, sequences.guess_pmfs.tolist()))
+            guessed_1_15 = cond['expected_guessed']
+            total_test = known_1_15 + known_16_18 + known_19_22 + guessed_16_18 + guessed_1_15
+            nmt_score = int(agg.lut[int(total_test)])
 
         st.markdown(f"""
         <div class='strategy-card'>
@@ -151,6 +174,15 @@ if analysis_type == "🎯 КАЛЬКУЛЯТОР БАЛІВ":
         </div>
         """, unsafe_allow_html=True)
 
+        if guess_16_18:
+            st.markdown(f"""
+            <div class='strategy-card'>
+                <h4 style='text-align: center'>🎯 Вгадаю (завд. 16-18)</h4>
+                <p class='score-highlight'>{guessed_16_18:.1f}</p>
+                <p style='text-align: center'>з {9 - known_16_18} невідомих пар</p>
+            </div>
+            """, unsafe_allow_html=True)
+
         st.markdown(f"""
         <div class='strategy-card'>
             <h4 style='text-align: center'>📝 Тестовий бал</h4>
@@ -168,55 +200,66 @@ if analysis_type == "🎯 КАЛЬКУЛЯТОР БАЛІВ":
         """, unsafe_allow_html=True)
 
     st.markdown("---")
-    st.subheader("📈 Порівняння Всіх Стратегій")
-
-    scenarios = []
-    for strat in ["Оптимальна", "Завжди А", "Завжди Б", "Завжди В", "Завжди Г", "Завжди Д", "Випадково"]:
-        if strat == "Оптимальна":
-            g = unknown_1_15 * optimal_success
-        elif strat == "Випадково":
-            g = unknown_1_15 * 0.2
-        else:
-            letter = strat.split()[-1]
-            g = unknown_1_15 * (answer_counts[letter] / total)
-
-        ts = known_1_15 + g + known_16_18 + known_19_22
-        scenarios.append({
-            'Стратегія': strat,
-            'Тестовий бал': round(ts, 1),
-            'Бал НМТ': test_to_nmt_score(ts)
-        })
+    st.subheader("🎲 Розподіл Балу НМТ")
+    st.caption("Кількість вгаданих завдань 1-15 — випадкова величина. Нижче її точний розподіл, а не лише середнє.")
+
+    threshold = st.number_input("Цільовий бал НМТ:", min_value=100, max_value=200, value=150, step=1)
+
+    probs = None
+    if unknown_1_15 > 0 and st.checkbox("Задати впевненість для кожного невідомого завдання"):
+        default_pct = int(round(strategy_question_probs(agg)[strategy_idx].mean() * 100))
+        conf_cols = st.columns(min(unknown_1_15, 5))
+        probs = tuple(
+            conf_cols[i % len(conf_cols)].slider(f"Невідоме №{i + 1}, %", 0, 100, default_pct, key=f"conf{i}") / 100
+            for i in range(unknown_1_15)
+        )
 
-    scen_df = pd.DataFrame(scenarios).sort_values('Бал НМТ', ascending=False)
+    with phase("compute"):
+        dist = calculator_distribution(agg, strategy_idx, known_1_15, known_16_18, known_19_22, probs, guess_16_18,
+                                       cond_pmfs)
+    pct = dist.percentiles((10, 90))
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Середній бал НМТ", f"{dist.mean_nmt:.1f}")
+    m2.metric("Медіана", dist.median_nmt)
+    m3.metric(f"P(≥ {threshold})", f"{dist.prob_at_least(threshold) * 100:.1f}%")
+    m4.metric("10-90 перцентиль", f"{pct[10]}–{pct[90]}")
+
+    st.plotly_chart(figure(DATA.counts, 'calculator/distribution', years, strategy_idx,
+                           known_1_15, known_16_18, known_19_22, threshold, probs, guess_16_18, cond_pmfs),
+                    use_container_width=True)
+    if conditional and unknown_1_15 > 0:
+        st.caption(f"🔗 Умовна стратегія: очікувано {cond['expected_guessed']:.2f} вгаданих з {unknown_1_15} проти "
+                   f"{cond['optimal_expected_guessed']:.2f} для найчастішої літери питання (обидві — без свого "
+                   f"варіанта, leave-one-out).")
 
-    colors_map = {'А': '#FF6B6B', 'Б': '#4ECDC4', 'В': '#45B7D1', 'Г': '#FFA07A', 'Д': '#98D8C8', 
-                  'Оптимальна': '#9b59b6', 'Випадково': '#95a5a6'}
+    st.markdown("---")
+    st.subheader("📈 Порівняння Всіх Стратегій")
 
-    fig = go.Figure()
-    for _, row in scen_df.iterrows():
-        if 'Завжди' in row['Стратегія']:
-            color = colors_map.get(row['Стратегія'].split()[-1], '#95a5a6')
-        else:
-            color = colors_map.get(row['Стратегія'], '#95a5a6')
-
-        fig.add_trace(go.Bar(
-            x=[row['Стратегія']], 
-            y=[row['Бал НМТ']],
-            marker_color=color,
-            text=f"{row['Бал НМТ']}",
-            textposition='outside',
-            showlegend=False
-        ))
-
-    fig.update_layout(
-        title=f"Ваш бал НМТ при різних стратегіях вгадування (знаєте {known_1_15}/15)",
-        height=500,
-        yaxis=dict(range=[0, 210], title="Бал НМТ"),
-        xaxis_title="Стратегія"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    comparison = sorted_comparison(
+        shared(DATA.counts, analytics.strategy_comparison, agg, known_1_15, known_16_18, known_19_22, threshold,
+               guess_16_18))
+    scen_df = dataframe({
+        'Стратегія': [row['strategy'] for row in comparison],
+        'Тестовий бал': [round(row['test_score'], 1) for row in comparison],
+        'Бал НМТ': [row['nmt_score'] for row in comparison],
+        'Сер. бал НМТ': [round(row['mean_nmt'], 1) for row in comparison],
+        f'P(≥ {threshold})': [f"{row['p_at_least'] * 100:.0f}%" for row in comparison],
+    })
+
+    # 95% бутстреп-інтервали (по варіантах) успішності стратегій → межі балу НМТ на графіку
+    intervals = shared(DATA.counts, analytics.bootstrap_intervals, DATA, years)
+    score_bounds = analytics.strategy_score_intervals(agg, intervals, known_1_15, known_16_18, known_19_22, guess_16_18)
+    st.plotly_chart(figure(DATA.counts, 'calculator/strategies', years, known_1_15, known_16_18, known_19_22, threshold,
+                           guess_16_18, score_bounds), use_container_width=True)
+    st.caption(f"Вуса — 95% бутстреп-інтервал ({intervals['n_resamples']:,} вибірок варіантів): "
+               f"наскільки бал залежить від того, які саме варіанти потрапили в дані.".replace(',', ' '))
     st.dataframe(scen_df, use_container_width=True, hide_index=True)
 
+    st.markdown("### 📉 Бал НМТ залежно від кількості відомих завдань 1-15")
+    st.plotly_chart(figure(DATA.counts, 'calculator/curves', years, known_16_18, known_19_22, guess_16_18),
+                    use_container_width=True)
+
     best = scen_df.iloc[0]
     worst = scen_df.iloc[-1]
     diff = best['Бал НМТ'] - worst['Бал НМТ']
@@ -232,6 +275,89 @@ if analysis_type == "🎯 КАЛЬКУЛЯТОР БАЛІВ":
     </div>
     """, unsafe_allow_html=True)
 
+    # Розв'язано заздалегідь для всіх станів повзунків (aggregate.policy) — тут лише індекс
+    policy = shared(DATA.counts, analytics.best_policy, agg, known_1_15, known_16_18, known_19_22, threshold)
+    labels = {
+        objective: row['strategy'] + (f" + {row['match_label']}" if known_16_18 < 9 else "")
+        for objective, row in policy.items() if objective != 'threshold'
+    }
+    st.info(f"🧭 **Оптимально за балом НМТ** (шкала нелінійна, тож це не завжди те саме, що максимум тестових балів): "
+            f"середній бал — **{labels['expected']}** → {policy['expected']['value']:.1f}; "
+            f"шанс на ≥ {threshold} — **{labels['at_least']}** → {policy['at_least']['value'] * 100:.1f}%.")
+
+    with st.expander("🧩 Я знаю, які саме відповіді 1-15 правильні"):
+        st.caption("Літери в ключі одного варіанта розподілені рівномірніше, ніж якби питання були незалежні, "
+                   "тож відомі відповіді змінюють шанси решти. Вкажіть відомі — невідомі (?) доповняться.")
+        key_cols = st.columns(5)
+        known_key = tuple(
+            None if letter == '?' else letter
+            for letter in (key_cols[q % 5].selectbox(f"№{q + 1}", ['?', *LETTERS], key=f"ck{q}") for q in range(15))
+        )
+        fill = shared(DATA.counts, analytics.completion, DATA.sequences.total(years), known_key)
+        if fill['questions']:
+            f1, f2 = st.columns(2)
+            f1.metric("Очікувано вгадаю", f"{fill['expected_correct']:.2f} з {len(fill['questions'])}",
+                      f"{fill['expected_correct'] - fill['prior_expected']:+.2f} до частот питань", delta_color="off")
+            f2.metric("Найімовірніший повний ключ", fill['likeliest'], f"{fill['likeliest_prob'] * 100:.2g}%",
+                      delta_color="off")
+            st.dataframe(dataframe({
+                'Питання': [row['question'] for row in fill['questions']],
+                'Обирайте': [row['best'] for row in fill['questions']],
+                **{letter: [f"{row['probs'][letter] * 100:.0f}%" for row in fill['questions']] for letter in LETTERS},
+            }), use_container_width=True, hide_index=True)
+
+    with st.expander("🎰 Симуляція Монте-Карло (вгадування 16-18, без повторів літер)"):
+        st.caption("Мільйони синтетичних бланків проти реальних ключів. Ті самі бланки для всіх стратегій, "
+                   "результат відтворюється для того самого seed.")
+        sc1, sc2, sc3, sc4 = st.columns(4)
+        n_sheets = sc1.selectbox("Бланків на стратегію:", [100_000, 1_000_000, 5_000_000], index=1,
+                                 format_func=lambda n: f"{n:,}".replace(',', ' '))
+        match_label = sc2.selectbox("Невідомі пари 16-18:", list(MATCH_POLICY_LABELS))
+        seed = sc3.number_input("Seed:", min_value=0, max_value=2**31 - 1, value=42)
+        time_budget = sc4.slider("Ліміт часу, с:", 1, 30, 10)
+
+        # Результат залежить лише від параметрів і seed, тож він спільний для всіх сесій;
+        # у сесії лишається тільки ключ запуску
+        sim_key = ('simulation', years, known_1_15, known_16_18, known_19_22, match_label, n_sheets, seed, time_budget)
+        if st.button("▶️ Запустити симуляцію"):
+            spec = calculator_spec(DATA, agg, known_1_15, known_16_18, known_19_22, MATCH_POLICY_LABELS[match_label])
+            with phase("compute"):
+                DATA.counts.shared.get(sim_key, lambda: simulate(
+                    spec, n_sheets, seed=seed, workers=os.cpu_count() or 1, time_budget=time_budget, lut=agg.lut))
+            st.session_state['simulation'] = sim_key
+
+        result = DATA.counts.shared.peek(sim_key) if st.session_state.get('simulation') == sim_key else None
+        if result is not None:
+            import plotly.graph_objects as go
+
+            if not result.complete:
+                st.warning(f"⏱️ Ліміт часу: пораховано {result.n_sheets:,} бланків з {n_sheets:,}.")
+            ci = result.confidence_intervals()
+            sim_rows = []
+            for i, strat in enumerate(result.strategies):
+                sim_dist = result.distribution(i)
+                sim_pct = sim_dist.percentiles((10, 50, 90))
+                sim_rows.append({
+                    'Стратегія': strat,
+                    'Сер. бал НМТ': round(float(result.mean_nmt()[i]), 2),
+                    '95% ДІ': f"{ci[i, 0]:.2f} – {ci[i, 1]:.2f}",
+                    f'P(≥ {threshold})': f"{sim_dist.prob_at_least(threshold) * 100:.1f}%",
+                    'P10 / P50 / P90': f"{sim_pct[10]} / {sim_pct[50]} / {sim_pct[90]}",
+                })
+            st.dataframe(dataframe(sim_rows), use_container_width=True, hide_index=True)
+
+            with phase("figure"):
+                fig_sim = go.Figure()
+                for i, strat in enumerate(result.strategies):
+                    sim_pmf = result.distribution(i).nmt_pmf()
+                    fig_sim.add_trace(go.Scatter(
+                        x=list(sim_pmf), y=[p * 100 for p in sim_pmf.values()], mode='lines+markers', name=strat,
+                        line=dict(color=strategy_color(strat))
+                    ))
+                fig_sim.update_layout(title=f"Гістограма балів НМТ ({result.n_sheets:,} бланків на стратегію)",
+                                      height=400, xaxis_title="Бал НМТ", yaxis_title="Частка, %")
+            st.plotly_chart(fig_sim, use_container_width=True)
+
 # ===== СТАТИСТИКА ПО ЗАВДАННЯХ =====
 elif analysis_type == "📊 Статистика по завданнях":
     st.header("📊 Детальна Статистика по Завданнях")
@@ -241,36 +367,16 @@ elif analysis_type == "📊 Статистика по завданнях":
     if task_section == "Завдання 1-15":
         st.subheader("📝 Завдання 1-15: Розподіл відповідей А-Д")
 
-        all_answers = []
-        data_to_use = []
-        if year_filter == "🔴 НМТ 2024":
-            data_to_use = [('2024', ALL_DATA['2024'])]
-        elif year_filter == "🔵 НМТ 2025":
-            data_to_use = [('2025', ALL_DATA['2025'])]
-        else:
-            data_to_use = [('2024', ALL_DATA['2024']), ('2025', ALL_DATA['2025'])]
-
-        for year, year_data in data_to_use:
-            for date, tasks in year_data.items():
-                for i, ans in enumerate(tasks['1-15'], 1):
-                    all_answers.append({'Рік': year, 'Дата': date, 'Питання': i, 'Відповідь': ans})
-
-        df = pd.DataFrame(all_answers)
-        answer_counts = df['Відповідь'].value_counts()
-
-        colors = {'А': '#FF6B6B', 'Б': '#4ECDC4', 'В': '#45B7D1', 'Г': '#FFA07A', 'Д': '#98D8C8'}
-
         col1, col2, col3, col4, col5 = st.columns(5)
-        for col, ans in zip([col1, col2, col3, col4, col5], ['А', 'Б', 'В', 'Г', 'Д']):
-            count = answer_counts.get(ans, 0)
-            pct = (count / len(df) * 100) if len(df) > 0 else 0
+        for col, row in zip([col1, col2, col3, col4, col5], shared(DATA.counts, analytics.letter_stats, agg)):
+            ans, count, pct = row['letter'], row['count'], row['pct']
             with col:
                 st.markdown(f"""
-                <div style='text-align: center; padding: 1rem; background: {colors[ans]}20; 
-                     border-radius: 10px; border: 2px solid {colors[ans]}'>
-                    <h1 style='color: {colors[ans]}'>{ans}</h1>
+                <div style='text-align: center; padding: 1rem; background: {LETTER_COLORS[ans]}20; 
+                     border-radius: 10px; border: 2px solid {LETTER_COLORS[ans]}'>
+                    <h1 style='color: {LETTER_COLORS[ans]}'>{ans}</h1>
                     <h2>{count}</h2>
-                    <p style='font-size: 1.2rem; font-weight: bold; color: {colors[ans]}'>{pct:.1f}%</p>
+                    <p style='font-size: 1.2rem; font-weight: bold; color: {LETTER_COLORS[ans]}'>{pct:.1f}%</p>
                 </div>
                 """, unsafe_allow_html=True)
 
@@ -278,36 +384,7 @@ elif analysis_type == "📊 Статистика по завданнях":
         st.markdown("---")
         st.markdown("### 🔥 Heatmap: Частота кожної відповіді для кожного питання")
 
-        heatmap_data = []
-        for q in range(1, 16):
-            q_answers = df[df['Питання'] == q]['Відповідь']
-            row = []
-            for ans in ['А', 'Б', 'В', 'Г', 'Д']:
-                count = (q_answers == ans).sum()
-                row.append(count)
-            heatmap_data.append(row)
-
-        heatmap_array = np.array(heatmap_data).T
-
-        fig_heatmap = go.Figure(data=go.Heatmap(
-            z=heatmap_array,
-            x=[str(i) for i in range(1, 16)],
-            y=['А', 'Б', 'В', 'Г', 'Д'],
-            colorscale='RdYlGn',
-            text=[[f"{int(val)}" for val in row] for row in heatmap_array],
-            texttemplate='%{text}',
-            textfont={"size": 12},
-            colorbar=dict(title="Кількість<br>разів")
-        ))
-
-        fig_heatmap.update_layout(
-            title="Скільки разів кожна відповідь була правильною для кожного питання",
-            xaxis=dict(title="Номер питання", side='bottom'),
-            yaxis=dict(title="Відповідь"),
-            height=400
-        )
-
-        st.plotly_chart(fig_heatmap, use_container_width=True)
+        st.plotly_chart(figure(DATA.counts, 'stats/heatmap', years), use_container_width=True)
 
         st.markdown("""
         <div class='insight-box'>
@@ -322,32 +399,45 @@ elif analysis_type == "📊 Статистика по завданнях":
         """, unsafe_allow_html=True)
 
         st.markdown("---")
-        fig = go.Figure(data=[go.Pie(
-            labels=answer_counts.index,
-            values=answer_counts.values,
-            hole=0.4,
-            marker=dict(colors=[colors[a] for a in answer_counts.index])
-        )])
-        fig.update_layout(title="Загальний розподіл відповідей А-Д", height=500)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figure(DATA.counts, 'stats/letters', years), use_container_width=True)
+
+        st.markdown("---")
+        st.markdown("### 🔗 Послідовності: яка відповідь іде після якої")
+        sequences = DATA.sequences.total(years)
+        position = st.selectbox("Перехід:", [None, *range(1, 15)], key="seqpos",
+                                format_func=lambda q: "Усі сусідні питання" if q is None else f"{q} → {q + 1}")
+        seq = shared(DATA.counts, analytics.sequence_stats, sequences, position)
+        st.plotly_chart(figure(DATA.counts, 'stats/transitions', seq['position'], tuple(map(tuple, seq['counts']))),
+                        use_container_width=True)
+        s1, s2, s3 = st.columns(3)
+        s1.metric("Та сама літера, що й у попередньому", f"{seq['repeat_rate'] * 100:.1f}%",
+                  f"{(seq['repeat_rate'] - seq['repeat_rate_independent']) * 100:+.1f} п.п. до незалежних",
+                  delta_color="off")
+        s2.metric("Середня найдовша серія", f"{seq['mean_longest']:.2f}")
+        s3.metric("Варіантів із серією ≥ 3", f"{sum(r['rate'] for r in seq['longest'] if r['length'] >= 3) * 100:.0f}%")
+        if seq['trigrams']:
+            st.markdown("**Найчастіші трійки відповідей поспіль**")
+            st.dataframe(dataframe({
+                'Трійка': [row['trigram'] for row in seq['trigrams']],
+                'Разів': [row['count'] for row in seq['trigrams']],
+                'Очікувано при незалежних': [round(row['independent'], 1) for row in seq['trigrams']],
+            }), use_container_width=True, hide_index=True)
+        st.caption("«До незалежних» — порівняно з тим, скільки повторів (чи трійок) було б, якби питання "
+                   "обиралися незалежно з тими самими частотами літер.")
 
         st.markdown("---")
         st.markdown("### 💡 Оптимальна Стратегія для Кожного Питання")
 
         opt_data = []
-        for q in range(1, 16):
-            q_answers = df[df['Питання'] == q]['Відповідь']
-            most_common = q_answers.value_counts().iloc[0]
-            most_common_ans = q_answers.value_counts().index[0]
-            total_q = len(q_answers)
+        for row in shared(DATA.counts, analytics.question_table, agg):
             opt_data.append({
-                'Питання': q,
-                'Обирайте': most_common_ans,
-                'Частота': most_common,
-                'Успішність': f"{(most_common/total_q*100):.1f}%"
+                'Питання': row['question'],
+                'Обирайте': row['best'],
+                'Частота': row['count'],
+                'Успішність': f"{row['rate'] * 100:.1f}%"
             })
 
-        opt_df = pd.DataFrame(opt_data)
+        opt_df = dataframe(opt_data)
         st.dataframe(opt_df, use_container_width=True, hide_index=True)
 
     elif task_section == "Завдання 16-18":
@@ -356,32 +446,28 @@ elif analysis_type == "📊 Статистика по завданнях":
 
         task_num = st.selectbox("Оберіть завдання:", [16, 17, 18])
 
-        all_pairs = []
-        data_to_use = []
-        if year_filter == "🔴 НМТ 2024":
-            data_to_use = [('2024', ALL_DATA['2024'])]
-        elif year_filter == "🔵 НМТ 2025":
-            data_to_use = [('2025', ALL_DATA['2025'])]
-        else:
-            data_to_use = [('2024', ALL_DATA['2024']), ('2025', ALL_DATA['2025'])]
-
-        for year, year_data in data_to_use:
-            for date, tasks in year_data.items():
-                answers = tasks[str(task_num)]
-                for i, ans in enumerate(answers, 1):
-                    all_pairs.append({'Рік': year, 'Дата': date, 'Пара': i, 'Відповідь': ans})
-
-        df_pairs = pd.DataFrame(all_pairs)
-
-        for pair_num in [1, 2, 3]:
-            pair_data = df_pairs[df_pairs['Пара'] == pair_num]['Відповідь']
-            counts = pair_data.value_counts()
-
-            st.markdown(f"#### Пара {pair_num}")
+        for pair in shared(DATA.counts, analytics.pair_stats, agg, task_num)['pairs']:
+            st.markdown(f"#### Пара {pair['pair']}")
             cols = st.columns(5)
-            for i, (ans, count) in enumerate(counts.items()):
-                pct = (count / len(pair_data) * 100) if len(pair_data) > 0 else 0
-                cols[i % 5].metric(ans, f"{count}", f"{pct:.1f}%")
+            for i, row in enumerate(pair['ranking']):
+                cols[i % 5].metric(row['letter'], f"{row['count']}", f"{row['rate'] * 100:.1f}%")
+
+        st.markdown("#### 🎯 Найкраща трійка")
+        st.caption("Пари оцінюються разом, а не кожна окремо. Вкажіть пари, які знаєте, — решта доповниться "
+                   "найкращим чином за трійками, що збігаються з відомими.")
+        known_cols = st.columns(3)
+        known = tuple(
+            None if letter == '?' else letter
+            for letter in (known_cols[p].selectbox(f"Пара {p + 1}:", ['?', *LETTERS], key=f"mk{task_num}_{p}")
+                           for p in range(3))
+        )
+        joint = shared(DATA.counts, analytics.match_guess, agg, task_num, known)
+        st.success(f"**{joint['best']['combo']}** — очікувано **{joint['best']['points']:.2f}** правильних пар з 3 "
+                   "на новому варіанті" + (" (літери не повторюються)" if joint['distinct'] else ""))
+        st.dataframe(dataframe({
+            'Трійка': [row['combo'] for row in joint['candidates']],
+            'Очікувано пар (без знань)': [round(row['points'], 2) for row in joint['candidates']],
+        }), use_container_width=True, hide_index=True)
 
     else:
         st.subheader("🔢 Завдання 19-22: Відкрита відповідь (по 2 бали)")
@@ -389,92 +475,80 @@ elif analysis_type == "📊 Статистика по завданнях":
 
         task_num = st.selectbox("Оберіть завдання:", [19, 20, 21, 22])
 
-        all_answers = []
-        data_to_use = []
-        if year_filter == "🔴 НМТ 2024":
-            data_to_use = [('2024', ALL_DATA['2024'])]
-        elif year_filter == "🔵 НМТ 2025":
-            data_to_use = [('2025', ALL_DATA['2025'])]
-        else:
-            data_to_use = [('2024', ALL_DATA['2024']), ('2025', ALL_DATA['2025'])]
-
-        for year, year_data in data_to_use:
-            for date, tasks in year_data.items():
-                idx = task_num - 19
-                answer = tasks['19-22'][idx]
-                all_answers.append({'Рік': year, 'Дата': date, 'Відповідь': answer})
-
-        df_answers = pd.DataFrame(all_answers)
+        numeric = shared(DATA.counts, analytics.numeric_answers, DATA, years, task_num)
+        df_answers = dataframe(numeric['answers']).rename(columns={'year': 'Рік', 'date': 'Дата', 'value': 'Відповідь'})
 
         st.markdown(f"### Всі відповіді на завдання {task_num}:")
         st.dataframe(df_answers, use_container_width=True)
 
-        unique_answers = df_answers['Відповідь'].value_counts()
         st.markdown(f"### Найчастіші відповіді:")
-        for ans, count in unique_answers.head(5).items():
-            st.write(f"**{ans}** — зустрічається {count} раз(ів)")
+        for row in numeric['top']:
+            st.write(f"**{row['value']:g}** — зустрічається {row['count']} раз(ів)")
+
+        st.markdown("### 🔎 Чи була вже така відповідь?")
+        default_guess = numeric['top'][0]['value'] if numeric['top'] else 0.0
+        guess = st.number_input("Ваша відповідь:", value=float(default_guess), step=0.5, format="%g")
+        lookup = shared(DATA.counts, analytics.numeric_lookup, DATA, years, task_num, guess)
+        nearest = ", ".join(f"{row['value']:g} ({row['year']}, {row['date']})" for row in lookup['nearest'])
+        if lookup['matches']:
+            st.success(f"**{guess:g}** вже була правильною відповіддю {lookup['matches']} раз(ів). Найближчі: {nearest}")
+        else:
+            st.info(f"**{guess:g}** ще не траплялася. Найближчі відповіді: {nearest or '-'}")
+
+        distribution = shared(DATA.counts, analytics.numeric_distribution, DATA, years, task_num)
+        magnitudes = tuple((row['label'], row['count']) for row in distribution['magnitudes'])
+        st.plotly_chart(figure(DATA.counts, 'stats/numeric_magnitudes', task_num, magnitudes), use_container_width=True)
 
 # ===== ОПТИМАЛЬНІ СТРАТЕГІЇ (ОНОВЛЕНИЙ РОЗДІЛ) =====
 elif analysis_type == "💡 Оптимальні стратегії":
     st.header("💡 Оптимальні Стратегії для Всіх Завдань 1-22")
 
-    st.markdown("""
+    st.markdown(f"""
     <div class='insight-box'>
         <h3>🎯 Як це працює?</h3>
-        <p>Аналізуємо реальні правильні відповіді з 34 варіантів НМТ 2024-2025.
+        <p>Аналізуємо реальні правильні відповіді з {agg.n_variants} варіантів НМТ ({years_label}).
         Для кожного завдання показуємо найчастіші правильні відповіді.</p>
     </div>
     """, unsafe_allow_html=True)
 
-    # Вибір даних
-    data_to_use = []
-    if year_filter == "🔴 НМТ 2024":
-        data_to_use = [('2024', ALL_DATA['2024'])]
-    elif year_filter == "🔵 НМТ 2025":
-        data_to_use = [('2025', ALL_DATA['2025'])]
-    else:
-        data_to_use = [('2024', ALL_DATA['2024']), ('2025', ALL_DATA['2025'])]
-
     # ========== ЗАВДАННЯ 1-15 ==========
     st.markdown("---")
     st.subheader("📝 Завдання 1-15: Тести з вибором А-Д")
     st.caption("Кожне завдання: 1 бал | Всього: 15 балів")
 
-    all_answers = []
-    for year, year_data in data_to_use:
-        for date, tasks in year_data.items():
-            for i, ans in enumerate(tasks['1-15'], 1):
-                all_answers.append({'Питання': i, 'Відповідь': ans})
-
-    df = pd.DataFrame(all_answers)
-
+    intervals = shared(DATA.counts, analytics.bootstrap_intervals, DATA, years)
     opt_table = []
-    for q in range(1, 16):
-        q_data = df[df['Питання'] == q]['Відповідь']
-        most_common = q_data.value_counts()
-        best_ans = most_common.index[0]
-        best_count = most_common.iloc[0]
-        success_rate = (best_count / len(q_data) * 100)
-
-        alternatives = []
-        for i in range(1, min(3, len(most_common))):
-            alt_ans = most_common.index[i]
-            alt_count = most_common.iloc[i]
-            alt_rate = (alt_count / len(q_data) * 100)
-            alternatives.append(f"{alt_ans} ({alt_rate:.0f}%)")
-
+    for row, ci in zip(shared(DATA.counts, analytics.question_table, agg), intervals['questions']):
+        alternatives = [f"{alt['letter']} ({alt['rate'] * 100:.0f}%)" for alt in row['alternatives']]
         opt_table.append({
-            'Питання': q,
-            '✅ Краща': best_ans,
-            'Успіх': f"{success_rate:.0f}%",
+            'Питання': row['question'],
+            '✅ Краща': row['best'],
+            'Успіх': f"{row['rate'] * 100:.0f}%",
+            '95% ДІ': f"{ci['low'] * 100:.0f}–{ci['high'] * 100:.0f}%",
             'Альтернативи': ", ".join(alternatives) if alternatives else "-"
         })
 
-    opt_df = pd.DataFrame(opt_table)
+    opt_df = dataframe(opt_table)
     st.dataframe(opt_df, use_container_width=True, height=600)
 
     avg_success = sum([float(x['Успіх'].rstrip('%')) for x in opt_table]) / 15
-    st.success(f"📊 Середня успішність: **{avg_success:.1f}%** (vs 20% при випадковому виборі)")
+    optimal_ci = intervals['strategies'][0]
+    st.success(f"📊 Середня успішність: **{avg_success:.1f}%** (95% ДІ {optimal_ci['low'] * 100:.1f}–"
+               f"{optimal_ci['high'] * 100:.1f}%, бутстреп по варіантах; vs 20% при випадковому виборі)")
+
+    st.markdown("#### 🧪 Перевірка на відкладених варіантах")
+    st.caption("Таблиця вище підібрана й оцінена на тих самих варіантах. Тут для кожного варіанта найкращі літери "
+               "беруться з решти варіантів і перевіряються на ньому (leave-one-out); нічиї розігруються порівну.")
+
+    backtest = shared(DATA.counts, analytics.backtest_table, DATA, years)
+    bt_df = dataframe(backtest['strategies']).rename(columns={
+        'strategy': 'Стратегія', 'in_sample': 'На тих самих даних', 'leave_one_out': 'Leave-one-out'})
+    bt_df = bt_df.rename(columns=lambda c: c.replace('->', ' → '))
+    for column in bt_df.columns[1:]:
+        bt_df[column] = [f"{x * 100:.1f}%" for x in bt_df[column]]
+    st.dataframe(bt_df, use_container_width=True, hide_index=True)
+    st.info(f"📋 Пари 16-18 (найчастіша літера пари): **{backtest['pairs_in_sample'] * 100:.1f}%** на тих самих даних, "
+            f"**{backtest['pairs_leave_one_out'] * 100:.1f}%** leave-one-out")
 
     # ========== ЗАВДАННЯ 16-18 ==========
     st.markdown("---")
@@ -484,26 +558,16 @@ elif analysis_type == "💡 Оптимальні стратегії":
     for task_num in [16, 17, 18]:
         st.markdown(f"### Завдання {task_num}")
 
-        all_pairs = []
-        for year, year_data in data_to_use:
-            for date, tasks in year_data.items():
-                answers = tasks[str(task_num)]
-                all_pairs.append({
-                    'Пара 1': answers[0],
-                    'Пара 2': answers[1],
-                    'Пара 3': answers[2],
-                    'Комбінація': f"{answers[0]}-{answers[1]}-{answers[2]}"
-                })
-
-        df_pairs = pd.DataFrame(all_pairs)
+        pairs = shared(DATA.counts, analytics.pair_stats, agg, task_num)
+        n_variants = pairs['n_variants']
 
         col1, col2, col3 = st.columns(3)
 
-        for i, (col, pair_name) in enumerate([(col1, 'Пара 1'), (col2, 'Пара 2'), (col3, 'Пара 3')], 1):
-            pair_data = df_pairs[pair_name].value_counts()
-            most_common = pair_data.index[0]
-            most_count = pair_data.iloc[0]
-            pct = (most_count / len(df_pairs) * 100)
+        for i, (col, pair) in enumerate(zip([col1, col2, col3], pairs['pairs']), 1):
+            pair_data = pair['ranking']
+            most_common = pair_data[0]['letter']
+            most_count = pair_data[0]['count']
+            pct = pair_data[0]['rate'] * 100
 
             with col:
                 st.markdown(f"""
@@ -512,24 +576,20 @@ elif analysis_type == "💡 Оптимальні стратегії":
                     <h4>Пара {i}</h4>
                     <h1 style='color: #2196f3; margin: 0.5rem 0'>{most_common}</h1>
                     <p style='font-size: 1.2rem; font-weight: bold; margin: 0'>{pct:.0f}%</p>
-                    <p style='font-size: 0.9rem; color: #666; margin: 0'>{most_count}/{len(df_pairs)} разів</p>
+                    <p style='font-size: 0.9rem; color: #666; margin: 0'>{most_count}/{n_variants} разів</p>
                 </div>
                 """, unsafe_allow_html=True)
 
                 if len(pair_data) > 1:
                     st.caption("Альтернативи:")
-                    for j in range(1, min(3, len(pair_data))):
-                        alt = pair_data.index[j]
-                        alt_count = pair_data.iloc[j]
-                        alt_pct = (alt_count / len(df_pairs) * 100)
-                        st.caption(f"• {alt}: {alt_pct:.0f}%")
+                    for alt in pair_data[1:3]:
+                        st.caption(f"• {alt['letter']}: {alt['rate'] * 100:.0f}%")
 
-        combo_counts = df_pairs['Комбінація'].value_counts()
-        best_combo = combo_counts.index[0]
-        best_combo_count = combo_counts.iloc[0]
-        best_combo_pct = (best_combo_count / len(df_pairs) * 100)
+        best_combo = pairs['best_combo']['combo']
+        best_combo_count = pairs['best_combo']['count']
+        best_combo_pct = pairs['best_combo']['rate'] * 100
 
-        st.info(f"💡 **Найчастіша комбінація:** {best_combo} ({best_combo_pct:.0f}% - {best_combo_count}/{len(df_pairs)} разів)")
+        st.info(f"💡 **Найчастіша комбінація:** {best_combo} ({best_combo_pct:.0f}% - {best_combo_count}/{n_variants} разів)")
 
     # ========== ЗАВДАННЯ 19-22 ==========
     st.markdown("---")
@@ -541,31 +601,24 @@ elif analysis_type == "💡 Оптимальні стратегії":
     for task_num in [19, 20, 21, 22]:
         st.markdown(f"### Завдання {task_num}")
 
-        all_answers_num = []
-        for year, year_data in data_to_use:
-            for date, tasks in year_data.items():
-                idx = task_num - 19
-                answer = tasks['19-22'][idx]
-                all_answers_num.append({'Рік': year, 'Дата': date, 'Відповідь': answer})
-
-        df_answers = pd.DataFrame(all_answers_num)
-        unique_answers = df_answers['Відповідь'].value_counts()
+        numeric = shared(DATA.counts, analytics.numeric_answers, DATA, years, task_num)
 
         col1, col2 = st.columns([1, 2])
 
         with col1:
             st.markdown("**Топ-5 відповідей:**")
-            for i, (ans, count) in enumerate(unique_answers.head(5).items(), 1):
-                pct = (count / len(df_answers) * 100)
+            for i, row in enumerate(numeric['top'], 1):
                 emoji = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "📌"
-                st.write(f"{emoji} **{ans}** — {count} раз ({pct:.0f}%)")
+                st.write(f"{emoji} **{row['value']:g}** — {row['count']} раз ({row['rate'] * 100:.0f}%)")
 
         with col2:
-            if year_filter == "📊 Обидва роки":
-                answers_by_year = df_answers.groupby(['Рік', 'Відповідь']).size().reset_index(name='Кількість')
+            if len(years) > 1:
                 st.markdown("**Розподіл по роках:**")
 
-                pivot = answers_by_year.pivot(index='Відповідь', columns='Рік', values='Кількість').fillna(0)
+                pivot = dataframe(numeric['by_year']).set_index('value').sort_index().fillna(0)
+                pivot = pivot[sorted(pivot.columns)]
+                pivot.index.name = 'Відповідь'
+                pivot.columns.name = 'Рік'
                 st.dataframe(pivot, use_container_width=True)
 
     # Загальний висновок
@@ -584,72 +637,120 @@ elif analysis_type == "💡 Оптимальні стратегії":
 
 # ===== ПОРІВНЯННЯ РОКІВ =====
 else:
-    st.header("🔥 Порівняння НМТ 2024 vs 2025")
-
-    answers_2024 = []
-    for date, tasks in ALL_DATA['2024'].items():
-        answers_2024.extend(tasks['1-15'])
-
-    answers_2025 = []
-    for date, tasks in ALL_DATA['2025'].items():
-        answers_2025.extend(tasks['1-15'])
+    compare_years = st.multiselect("Роки для порівняння:", DATA.years, default=list(DATA.years))
+    st.header("🔥 Порівняння " + " vs ".join(f"НМТ {year}" for year in compare_years))
 
-    from collections import Counter
-    counts_2024 = Counter(answers_2024)
-    counts_2025 = Counter(answers_2025)
-
-    total_2024 = len(answers_2024)
-    total_2025 = len(answers_2025)
-
-    col1, col2, col3 = st.columns([1, 1, 1])
-
-    with col1:
-        st.markdown("### 🔴 НМТ 2024")
-        for ans in ['А', 'Б', 'В', 'Г', 'Д']:
-            count = counts_2024.get(ans, 0)
-            pct = (count / total_2024 * 100) if total_2024 > 0 else 0
-            st.metric(ans, count, f"{pct:.1f}%")
-
-    with col2:
-        st.markdown("### ⚖️ Різниця")
-        for ans in ['А', 'Б', 'В', 'Г', 'Д']:
-            diff = counts_2025.get(ans, 0) - counts_2024.get(ans, 0)
-            diff_pct = ((counts_2025.get(ans, 0) / total_2025 * 100) if total_2025 > 0 else 0) - \
-                       ((counts_2024.get(ans, 0) / total_2024 * 100) if total_2024 > 0 else 0)
-            st.metric("Δ", f"{diff:+d}", f"{diff_pct:+.1f}%")
-
-    with col3:
-        st.markdown("### 🔵 НМТ 2025")
-        for ans in ['А', 'Б', 'В', 'Г', 'Д']:
-            count = counts_2025.get(ans, 0)
-            pct = (count / total_2025 * 100) if total_2025 > 0 else 0
-            st.metric(ans, count, f"{pct:.1f}%")
-
-    fig = go.Figure(data=[
-        go.Bar(name='НМТ 2024', x=['А', 'Б', 'В', 'Г', 'Д'],
-               y=[counts_2024.get(a, 0) for a in ['А', 'Б', 'В', 'Г', 'Д']],
-               marker_color='#ff6b6b'),
-        go.Bar(name='НМТ 2025', x=['А', 'Б', 'В', 'Г', 'Д'],
-               y=[counts_2025.get(a, 0) for a in ['А', 'Б', 'В', 'Г', 'Д']],
-               marker_color='#4ecdc4')
-    ])
-    fig.update_layout(title="Порівняння розподілів відповідей", barmode='group', height=500)
-    st.plotly_chart(fig, use_container_width=True)
-
-    st.markdown("""
-    <div class='insight-box'>
-        <h3>💡 Висновок:</h3>
-        <p>Розподіли відповідей у НМТ 2024 та 2025 дуже схожі. 
-        Це означає, що стратегії вгадування працюють <b>стабільно</b> для обох років!</p>
-    </div>
-    """, unsafe_allow_html=True)
+    if len(compare_years) < 2:
+        st.info("Оберіть щонайменше два роки.")
+    else:
+        groups = tuple((year,) for year in compare_years)
+        comparison = shared(DATA.counts, analytics.letter_comparison, DATA, groups)
+
+        if len(groups) == 2:
+            pairwise = shared(DATA.counts, analytics.year_comparison, DATA, groups[0], groups[1])
+            col1, col2, col3 = st.columns([1, 1, 1])
+
+            with col1:
+                st.markdown(f"### {YEAR_NAMES[compare_years[0]]}")
+                for row in pairwise:
+                    st.metric(row['letter'], row['count_a'], f"{row['pct_a']:.1f}%")
+
+            with col2:
+                st.markdown("### ⚖️ Різниця")
+                for row in pairwise:
+                    st.metric("Δ", f"{row['diff']:+d}", f"{row['diff_pct']:+.1f}%")
+
+            with col3:
+                st.markdown(f"### {YEAR_NAMES[compare_years[1]]}")
+                for row in pairwise:
+                    st.metric(row['letter'], row['count_b'], f"{row['pct_b']:.1f}%")
+        else:
+            st.caption(f"Зміна частки — відносно НМТ {compare_years[0]}.")
+            for i, (col, year) in enumerate(zip(st.columns(len(groups)), compare_years)):
+                with col:
+                    st.markdown(f"### {YEAR_NAMES[year]}")
+                    for row in comparison:
+                        delta = row['pcts'][i] - row['pcts'][0]
+                        st.metric(row['letter'], row['counts'][i], f"{row['pcts'][i]:.1f}% ({delta:+.1f})")
+
+        bounds = tuple(
+            analytics.letter_count_intervals(shared(DATA.counts, analytics.bootstrap_intervals, DATA, group),
+                                             DATA.counts.total(group).n_answers)
+            for group in groups
+        )
+        st.plotly_chart(figure(DATA.counts, 'compare/letters', groups, tuple(f"НМТ {year}" for year in compare_years),
+                               bounds), use_container_width=True)
+        st.caption("Вуса — 95% бутстреп-інтервал кількості (вибірки варіантів кожного року).")
+
+        # Кожен рік проти першого: χ² і перестановочний тест по варіантах
+        tests = [shared(DATA.counts, analytics.year_significance, DATA, groups[0], group) for group in groups[1:]]
+        st.dataframe(dataframe({
+            'Порівняння': [f"НМТ {compare_years[0]} vs НМТ {test['b'][0]}" for test in tests],
+            'χ²': [round(test['chi2'], 2) for test in tests],
+            'p (χ²)': [round(test['p_chi2'], 3) for test in tests],
+            'p (перестановки)': [round(test['p_permutation'], 3) for test in tests],
+        }), use_container_width=True, hide_index=True)
+
+        widest = max(comparison, key=lambda row: row['spread'])
+        significant = [test for test in tests if test['p_permutation'] < 0.05]
+        if not significant:
+            verdict = (f"Різниця між розподілами відповідей у НМТ {', '.join(compare_years)} статистично не значуща "
+                       f"(перестановочний тест, p ≥ 0.05; частки літер різняться щонайбільше на "
+                       f"{widest['spread']:.1f} п.п.). Стратегії вгадування працюють <b>стабільно</b> для всіх цих "
+                       f"років — у межах того, що можна побачити на {DATA.counts.total(tuple(compare_years)).n_variants} "
+                       f"варіантах.")
+        else:
+            changed = ", ".join(f"НМТ {test['b'][0]} (p = {test['p_permutation']:.3f})" for test in significant)
+            verdict = (f"Розподіл літер значуще відрізняється від НМТ {compare_years[0]}: {changed}. Найбільше "
+                       f"змінилася частка літери <b>{widest['letter']}</b> ({widest['spread']:.1f} п.п.). "
+                       f"Перевіряйте стратегії на кожному році окремо.")
+        st.markdown(f"""
+        <div class='insight-box'>
+            <h3>💡 Висновок:</h3>
+            <p>{verdict}</p>
+        </div>
+        """, unsafe_allow_html=True)
 
 # Footer
 st.markdown("---")
-total_variants = len(ALL_DATA['2024']) + len(ALL_DATA['2025'])
 st.markdown(f"""
 <div style='text-align: center; color: #666; padding: 2rem'>
-    <p>📊 Дашборд на основі {total_variants} варіантів НМТ (748 відповідей на всі завдання)</p>
+    <p>📊 Дашборд на основі {DATA.n_variants} варіантів НМТ {YEAR_SPAN} ({N_ANSWERS} відповідей на всі завдання)</p>
     <p>🎓 Для освітніх цілей | 💪 Готуйтесь і здавайте на максимум!</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Перезапуск закінчено (панелі нижче вже не рахуються); запис — у METRICS і NMT_METRICS
+record = profiling.finish(SECTIONS[analysis_type])
+
+# Debug-панелі (?debug=1): пам'ять процесу і сесії, час фаз і кеші
+if st.query_params.get("debug"):
+    with st.sidebar.expander("🧠 Пам'ять (debug)", expanded=True):
+        memory = process_memory()
+        mb = 1024 * 1024
+        if memory is None:
+            st.caption("Пам'ять процесу недоступна на цій платформі")
+        elif memory['rss'] is not None:
+            st.metric("RSS процесу", f"{memory['rss'] / mb:.1f} МБ", f"пік {memory['peak_rss'] / mb:.1f} МБ",
+                      delta_color="off")
+        else:
+            st.metric("Піковий RSS процесу", f"{memory['peak_rss'] / mb:.1f} МБ")
+        st.metric("Ця сесія (session_state)", f"{deep_size(dict(st.session_state)) / 1024:.1f} КБ")
+        st.caption(f"Спільні результати: {len(DATA.counts.shared)} шт., ~{DATA.counts.shared.nbytes() / mb:.2f} МБ "
+                   f"(влучань {DATA.counts.shared.hits}, промахів {DATA.counts.shared.misses})")
+        st.caption(f"Спільні графіки: {len(DATA.counts.figures)} шт., ~{DATA.counts.figures.nbytes() / mb:.2f} МБ")
+        st.caption(f"Дані: {DATA.n_variants} варіантів, лічильники для {len(DATA.counts._totals)} наборів років")
+
+    with st.sidebar.expander("⏱️ Профіль (debug)", expanded=True):
+        st.metric("Цей перезапуск", f"{record['total'] * 1000:.0f} мс")
+        st.caption(" · ".join(f"{name} {seconds * 1000:.1f} мс" for name, seconds in record['phases'].items()))
+        for name, cache in record['caches'].items():
+            requests = cache['hits'] + cache['misses']
+            rate = f"{cache['hits'] / requests * 100:.0f}%" if requests else "—"
+            st.caption(f"Кеш {name}: {cache['hits']}/{requests} влучань ({rate})")
+        section_pct = profiling.METRICS.percentiles(record['section'])
+        st.caption(f"Розділ {record['section']}, перцентилі за останні перезапуски процесу:")
+        st.dataframe(dataframe({
+            'Фаза': list(section_pct),
+            **{f'p{q}, мс': [round(values[q] * 1000, 1) for values in section_pct.values()] for q in (50, 95, 99)},
+        }), use_container_width=True, hide_index=True)
@@ -0,0 +1,24 @@
+from .dataset import (
+    DEFAULT_DATA_PATH, LETTERS, LETTER_CODE, MATCH_TASKS, OPEN_TASKS,
+    Dataset, from_dict, load_dataset, read_raw,
+)
+from .aggregates import Aggregate, Counts, combo_codes, combo_label, combo_letters
+from .matching import MatchTables, state_code
+from .sequences import SequenceAggregate, SequenceCounts
+from .policy import MATCH_GUESS, MATCH_GUESS_LABELS, PolicyTable
+from .scoring import (
+    SCORE_LUT, SCORE_TABLE, SCORE_TABLES, STRATEGIES, ScoreSurface,
+    guess_rates, nmt_scores, score_lut, score_surface, test_to_nmt_score,
+)
+from .distribution import (
+    ScoreDistribution, calculator_distribution, poisson_binomial, random_subset_pmfs,
+    score_distribution, strategy_question_probs,
+)
+from .simulate import (
+    MATCH_POLICIES, SimulationResult, SimulationSpec, calculator_spec, simulate, strategy_matrices,
+)
+from .backtest import BacktestResult, expected_hits, leave_one_out, train_test
+from . import analytics
+from .figures import LETTER_COLORS, figure, sorted_comparison, strategy_color
+from . import profiling
+from .shared import FrozenDict, SharedCache, deep_size, freeze, process_memory, shared
@@ -0,0 +1,184 @@
+"""Лічильники відповідей, побудовані один раз під час завантаження.
+
+`Counts` зберігає кількості з окремою віссю року, тож фільтр років —
+це лише сума по цій осі, а не повторний прохід по варіантах.
+"""
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+
+from .dataset import LETTERS
+
+N_LETTERS = len(LETTERS)
+N_COMBOS = N_LETTERS ** 3
+
+
+def combo_codes(triples):
+    """(..., 3) коди літер → одне ціле 0..124 на трійку пар."""
+    triples = np.asarray(triples, dtype=np.int16)
+    return (triples[..., 0] * N_LETTERS + triples[..., 1]) * N_LETTERS + triples[..., 2]
+
+
+def combo_letters(code):
+    code = int(code)
+    return LETTERS[code // 25], LETTERS[code // 5 % 5], LETTERS[code % 5]
+
+
+def combo_label(code):
+    return '-'.join(combo_letters(code))
+
+
+@dataclass(frozen=True)
+class Aggregate:
+    years: tuple
+    n_variants: int
+    tests: np.ndarray    # (15, 5) — [питання, літера]
+    matches: np.ndarray  # (3, 3, 5) — [завдання 16-18, пара, літера]
+    combos: np.ndarray   # (3, 125) — [завдання 16-18, код трійки]
+
+    @property
+    def letters(self):
+        return self.tests.sum(axis=0)
+
+    @property
+    def n_answers(self):
+        return self.n_variants * self.tests.shape[0]
+
+    @property
+    def optimal_letters(self):
+        return self.tests.argmax(axis=1)
+
+    @property
+    def optimal_rates(self):
+        return self.tests.max(axis=1) / max(self.n_variants, 1)
+
+    @property
+    def optimal_success(self):
+        return float(self.optimal_rates.mean())
+
+    @cached_property
+    def lut(self):
+        """Таблиця переводу балів для цих років."""
+        from .scoring import score_lut_for
+        return score_lut_for(self.years)
+
+    @cached_property
+    def surface(self):
+        """Поверхня балів калькулятора (див. scoring.score_surface)."""
+        from .scoring import guess_rates, score_surface
+        return score_surface(guess_rates(self), self.lut)
+
+    @cached_property
+    def match_tables(self):
+        """Таблиці вгадування 16-18 за спільним розподілом трійок (див. matching)."""
+        from .matching import MatchTables
+        return MatchTables.from_combos(self.combos)
+
+    @cached_property
+    def match_surface(self):
+        """Поверхня балів, якщо невідомі пари 16-18 вгадуються за match_tables."""
+        from .scoring import guess_rates, score_surface
+        return score_surface(guess_rates(self), self.lut, match_guess=self.match_tables.expected_guess)
+
+    @cached_property
+    def policy(self):
+        """Оптимальна політика за балом НМТ для кожного стану калькулятора (див. policy)."""
+        from .policy import PolicyTable
+        return PolicyTable.solve(self)
+
+    @cached_property
+    def resamples(self):
+        """Кеш бутстрепу й перестановочних тестів цих років за параметрами (див. analytics)."""
+        from .shared import SharedCache
+        return SharedCache(maxsize=64)
+
+    @cached_property
+    def guess_pmfs(self):
+        """(S, 16, 16) — [стратегія, невідомих 1-15, вгадано] (див. distribution)."""
+        from .distribution import random_subset_pmfs, strategy_question_probs
+        pmfs = np.stack([random_subset_pmfs(p) for p in strategy_question_probs(self)])
+        pmfs.setflags(write=False)
+        return pmfs
+
+
+@dataclass(frozen=True)
+class Counts:
+    years: tuple
+    n_variants: np.ndarray  # (Y,)
+    tests: np.ndarray       # (Y, 15, 5)
+    matches: np.ndarray     # (Y, 3, 3, 5)
+    combos: np.ndarray      # (Y, 3, 125)
+    _totals: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @cached_property
+    def figures(self):
+        """Кеш специфікацій графіків для цього набору даних (див. figures)."""
+        from .shared import SharedCache
+        return SharedCache()
+
+    @cached_property
+    def shared(self):
+        """Кеш спільних для всіх сесій результатів analytics (див. shared)."""
+        from .shared import SharedCache
+        return SharedCache(maxsize=4096)
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        n_years = len(dataset.years)
+        tensors = (
+            np.zeros(n_years, dtype=np.int64),
+            np.zeros((n_years, 15, N_LETTERS), dtype=np.int64),
+            np.zeros((n_years, 3, 3, N_LETTERS), dtype=np.int64),
+            np.zeros((n_years, 3, N_COMBOS), dtype=np.int64),
+        )
+        return cls._build(dataset, tensors, slice(None))
+
+    @classmethod
+    def updated(cls, previous, dataset, rows):
+        """Лічильники `dataset` з `previous` плюс внесок лише рядків `rows`.
+
+        `dataset` — це попередні варіанти плюс нові (можливо, з новими
+        роками); вартість пропорційна кількості нових рядків.
+        """
+        remap = [dataset.years.index(year) for year in previous.years]
+        tensors = []
+        for old in (previous.n_variants, previous.tests, previous.matches, previous.combos):
+            array = np.zeros((len(dataset.years), *old.shape[1:]), dtype=np.int64)
+            array[remap] = old
+            tensors.append(array)
+        return cls._build(dataset, tensors, np.asarray(rows, dtype=np.intp))
+
+    @classmethod
+    def _build(cls, dataset, tensors, rows):
+        """Додає до (n_variants, tests, matches, combos) one-hot внесок рядків `rows`."""
+        n_variants, tests, matches, combos = tensors
+        y = dataset.year_idx[rows].astype(np.intp)
+        answers, pairs = dataset.tests[rows], dataset.matches[rows]
+
+        n_variants += np.bincount(y, minlength=len(n_variants))
+        np.add.at(tests, (y[:, None], np.arange(15), answers), 1)
+        np.add.at(matches, (y[:, None, None], np.arange(3)[:, None], np.arange(3), pairs), 1)
+        np.add.at(combos, (y[:, None], np.arange(3), combo_codes(pairs)), 1)
+
+        for array in tensors:
+            array.setflags(write=False)
+        return cls(dataset.years, n_variants, tests, matches, combos)
+
+    def total(self, years=None):
+        """Сумарні лічильники для підмножини років (None — всі роки)."""
+        key = self.years if years is None else tuple(y for y in self.years if y in set(years))
+        aggregate = self._totals.get(key)
+        if aggregate is None:
+            idx = [self.years.index(y) for y in key]
+            aggregate = Aggregate(
+                years=key,
+                n_variants=int(self.n_variants[idx].sum()),
+                tests=self.tests[idx].sum(axis=0),
+                matches=self.matches[idx].sum(axis=0),
+                combos=self.combos[idx].sum(axis=0),
+            )
+            for array in (aggregate.tests, aggregate.matches, aggregate.combos):
+                array.setflags(write=False)
+            self._totals[key] = aggregate
+        return aggregate
@@ -0,0 +1,371 @@
+"""Дані кожного розділу дашборду без Streamlit.
+
+Функції повертають прості списки словників (готові для JSON), тож їх
+використовують і дашборд, і CLI, і будь-які нічні скрипти.
+"""
+import numpy as np
+
+from .aggregates import combo_label
+from .backtest import leave_one_out, train_test
+from .dataset import LETTERS, MATCH_TASKS, OPEN_TASKS
+from .distribution import calculator_distribution
+from .numeric import DEFAULT_TOLERANCE
+from .policy import MATCH_GUESS_LABELS
+from .resampling import bootstrap, chi_square, percentile_interval, permutation_test
+from .scoring import MAX_1_15, STRATEGIES, guess_rates, nmt_scores
+from .sequences import CONTEXTS
+from .shared import freeze
+
+
+def ranked(counts, labels):
+    """[(мітка, кількість)] у порядку спадання без нулів; нічиї — за порядком міток."""
+    counts = np.asarray(counts)
+    order = np.argsort(-counts, kind='stable')
+    return [(labels[i], int(counts[i])) for i in order if counts[i] > 0]
+
+
+def letter_stats(aggregate):
+    n = aggregate.n_answers
+    return [
+        {'letter': letter, 'count': int(count), 'pct': count / n * 100 if n else 0.0}
+        for letter, count in zip(LETTERS, aggregate.letters)
+    ]
+
+
+def question_table(aggregate, n_alternatives=2):
+    """Оптимальна літера для кожного питання 1-15 з альтернативами."""
+    n = max(aggregate.n_variants, 1)
+    rows = []
+    for q, counts in enumerate(aggregate.tests, 1):
+        ranking = ranked(counts, LETTERS)
+        best, best_count = ranking[0]
+        rows.append({
+            'question': q,
+            'best': best,
+            'count': best_count,
+            'rate': best_count / n,
+            'alternatives': [{'letter': l, 'count': c, 'rate': c / n} for l, c in ranking[1:1 + n_alternatives]],
+        })
+    return rows
+
+
+def sequence_stats(sequences, position=None, top=5):
+    """Переходи між сусідніми питаннями 1-15, трійки поспіль і серії однакових літер.
+
+    `sequences` — SequenceAggregate; position=None — переходи і трійки,
+    сумовані по всіх позиціях, інакше — лише q→q+1 і q→q+2 для питання q.
+    Для трійок — скільки їх було б за незалежних питань з тими самими
+    частотами літер.
+    """
+    counts = sequences.pooled if position is None else sequences.bigrams[position - 1]
+    starts = range(len(sequences.trigrams)) if position is None else range(position - 1, min(position, 13))
+    marginals = sequences.tests / max(sequences.n_variants, 1)
+    trigrams, by_chance = np.zeros(sequences.trigrams.shape[1]), np.zeros(sequences.trigrams.shape[1])
+    for q in starts:
+        trigrams += sequences.trigrams[q]
+        by_chance += sequences.n_variants * np.einsum(
+            'a,b,c->abc', marginals[q], marginals[q + 1], marginals[q + 2]).ravel()
+    rows = counts.sum(axis=1, keepdims=True)
+    probs = np.divide(counts, rows, out=np.zeros(counts.shape), where=rows > 0)
+    observed, independent = sequences.repeat_rates
+    n = max(sequences.n_variants, 1)
+    return {
+        'position': 'всі' if position is None else f'{position}→{position + 1}',
+        'letters': list(LETTERS),
+        'counts': counts.tolist(),
+        'probs': probs.tolist(),
+        'repeat_rate': observed,
+        'repeat_rate_independent': independent,
+        'runs': [{'length': length, 'count': int(c)} for length, c in enumerate(sequences.runs) if c],
+        'longest': [{'length': length, 'variants': int(c), 'rate': c / n}
+                    for length, c in enumerate(sequences.longest) if c],
+        'mean_longest': float(sequences.longest @ np.arange(len(sequences.longest)) / n),
+        'trigrams': [
+            {'trigram': combo_label(code), 'count': int(trigrams[code]), 'independent': float(by_chance[code])}
+            for code in np.argsort(-trigrams, kind='stable')[:top] if trigrams[code]
+        ],
+    }
+
+
+def conditional_strategy(sequences, known_1_15):
+    """Умовна стратегія 1-15: leave-one-out успішність за контекстом і очікувано вгаданих.
+
+    `sequences` — SequenceAggregate; для порівняння — leave-one-out
+    найчастішої літери питання (контекст 'none' для всіх питань).
+    """
+    unknown = MAX_1_15 - known_1_15
+    pmf = sequences.guess_pmfs[unknown, :unknown + 1]
+    return {
+        'known_1_15': known_1_15,
+        'rates': {context: rates.tolist() for context, rates in zip(CONTEXTS, sequences.conditional_rates)},
+        'probs': sequences.conditional_probs(known_1_15).tolist(),
+        'expected_guessed': float(pmf @ np.arange(len(pmf))),
+        'optimal_expected_guessed': float(unknown * sequences.conditional_rates[2].mean()),
+    }
+
+
+def completion(sequences, known):
+    """Найкраще доповнення невідомих відповідей 1-15 за відомими в тому ж варіанті.
+
+    `known` — 15 літер або None; для кожного невідомого питання —
+    апостеріорні P(літера) з урахуванням профілю (див. completion).
+    """
+    result = sequences.completion.solve(known)
+    return {
+        'known': ''.join('?' if code is None else LETTERS[code] for code in result.known),
+        'balance': sequences.completion.balance,
+        'questions': [
+            {'question': q + 1, 'best': LETTERS[result.best[q]], 'prob': float(result.marginals[q].max()),
+             'probs': dict(zip(LETTERS, result.marginals[q].tolist()))}
+            for q in result.unknown
+        ],
+        'expected_correct': result.expected_correct,
+        'prior_expected': result.prior_expected,
+        'likeliest': ''.join(LETTERS[code] for code in result.likeliest),
+        'likeliest_prob': result.likeliest_prob,
+    }
+
+
+def pair_stats(aggregate, task):
+    """Розподіл літер для кожної пари завдання 16-18 і найчастіша трійка."""
+    t = MATCH_TASKS.index(task)
+    n = max(aggregate.n_variants, 1)
+    pairs = [
+        {'pair': p, 'ranking': [{'letter': l, 'count': c, 'rate': c / n} for l, c in ranked(counts, LETTERS)]}
+        for p, counts in enumerate(aggregate.matches[t], 1)
+    ]
+    combos = ranked(aggregate.combos[t], [combo_label(code) for code in range(aggregate.combos.shape[1])])
+    best_combo, best_count = combos[0] if combos else ('-', 0)
+    return {
+        'task': task,
+        'n_variants': aggregate.n_variants,
+        'pairs': pairs,
+        'best_combo': {'combo': best_combo, 'count': best_count, 'rate': best_count / n},
+    }
+
+
+def match_guess(aggregate, task, known=(None, None, None), top=5):
+    """Найкраща спільна трійка завдання 16-18 і доповнення при відомих парах.
+
+    `known` — літера або None для кожної пари; бали — очікувана кількість
+    правильних пар з 3 (разом із відомими), для доповнення — leave-one-out
+    (див. matching).
+    """
+    t = MATCH_TASKS.index(task)
+    tables = aggregate.match_tables
+    code, points = tables.completion(t, known)
+    return {
+        'task': task,
+        'distinct': bool(tables.distinct[t]),
+        'known': ['?' if letter is None else letter for letter in known],
+        'best': {'combo': combo_label(code), 'points': points},
+        'candidates': [{'combo': combo, 'points': p} for combo, p in tables.ranking(t, top)],
+    }
+
+
+def numeric_answers(dataset, years, task, top=5, tolerance=DEFAULT_TOLERANCE):
+    """Відповіді завдання 19-22: всі значення, топ-N і розподіл по роках.
+
+    Значення, ближчі за `tolerance`, вважаються однією відповіддю; нічиї
+    в топі — за першою появою (як value_counts()).
+    """
+    mask = dataset.year_mask(years)
+    index = dataset.numeric_index
+    order, (values, counts, _, per_year) = index.top(task, None, tolerance, years)
+    n = max(int(counts.sum()), 1)
+    return {
+        'task': task,
+        'answers': [
+            {'year': y, 'date': d, 'value': v}
+            for y, d, v in zip(dataset.year_labels()[mask].tolist(), dataset.dates[mask].tolist(),
+                               dataset.numeric[mask, OPEN_TASKS.index(task)].tolist())
+        ],
+        'top': [{'value': float(values[i]), 'count': int(counts[i]), 'rate': counts[i] / n} for i in order[:top]],
+        'by_year': [
+            {'value': float(values[i]), **{year: int(c) for year, c in zip(index.years, per_year[i]) if c}}
+            for i in order
+        ],
+    }
+
+
+def numeric_lookup(dataset, years, task, value, tolerance=DEFAULT_TOLERANCE, k=5):
+    """Чи траплялася відповідь `value` і найближчі до неї історичні відповіді."""
+    index = dataset.numeric_index
+    labels, dates = dataset.year_labels(), dataset.dates
+    return {
+        'task': task,
+        'value': value,
+        'matches': index.count_between(task, value - tolerance, value + tolerance, years),
+        'nearest': [
+            {'value': v, 'distance': abs(v - value), 'year': str(labels[row]), 'date': str(dates[row])}
+            for v, row in index.nearest(task, value, k, years)
+        ],
+    }
+
+
+def numeric_distribution(dataset, years, task, bins=20):
+    """Гістограма значень і розподіл за порядком величини |x| (10^k)."""
+    index = dataset.numeric_index
+    edges, counts = index.histogram(task, bins, years)
+    magnitudes = index.magnitudes(task, years)
+    return {
+        'task': task,
+        'histogram': {'edges': edges.tolist(), 'counts': counts.tolist()},
+        'magnitudes': [
+            {'order': order, 'label': '0' if order is None else f'1e{order}', 'count': count}
+            for order, count in sorted(magnitudes.items(), key=lambda item: -10**9 if item[0] is None else item[0])
+        ],
+    }
+
+
+def strategy_comparison(aggregate, known_1_15, known_16_18, known_19_22, threshold=150, guess_matches=False):
+    """Бал кожної стратегії: очікуваний тестовий, НМТ з поверхні і точний розподіл.
+
+    guess_matches — невідомі пари 16-18 теж вгадуються (aggregate.match_surface).
+    """
+    surface = aggregate.match_surface if guess_matches else aggregate.surface
+    test_scores, nmt_scores = surface.at(known_1_15, known_16_18, known_19_22)
+    rows = []
+    for i, strategy in enumerate(surface.strategies):
+        dist = calculator_distribution(aggregate, i, known_1_15, known_16_18, known_19_22,
+                                       guess_matches=guess_matches)
+        rows.append({
+            'strategy': strategy,
+            'test_score': float(test_scores[i]),
+            'nmt_score': int(nmt_scores[i]),
+            'mean_nmt': dist.mean_nmt,
+            'median_nmt': dist.median_nmt,
+            'p_at_least': dist.prob_at_least(threshold),
+        })
+    return rows
+
+
+def best_policy(aggregate, known_1_15, known_16_18, known_19_22, threshold=150):
+    """Політики з найбільшим E[бал НМТ] і з найбільшою P(бал ≥ threshold) з готової таблиці."""
+    rows = {}
+    for objective, value in (('expected', None), ('at_least', threshold)):
+        strategy, match_guess, score = aggregate.policy.best(known_1_15, known_16_18, known_19_22, value)
+        rows[objective] = {
+            'strategy': strategy,
+            'match_guess': match_guess,
+            'match_label': MATCH_GUESS_LABELS[match_guess],
+            'value': score,
+        }
+    return {'threshold': threshold, **rows}
+
+
+def year_comparison(dataset, years_a, years_b):
+    """Розподіл літер 1-15 для двох наборів років і різниця між ними."""
+    a, b = dataset.counts.total(years_a), dataset.counts.total(years_b)
+    rows = []
+    for letter, count_a, count_b in zip(LETTERS, a.letters, b.letters):
+        pct_a = count_a / a.n_answers * 100 if a.n_answers else 0.0
+        pct_b = count_b / b.n_answers * 100 if b.n_answers else 0.0
+        rows.append({
+            'letter': letter,
+            'count_a': int(count_a), 'pct_a': pct_a,
+            'count_b': int(count_b), 'pct_b': pct_b,
+            'diff': int(count_b - count_a), 'diff_pct': pct_b - pct_a,
+        })
+    return rows
+
+
+def letter_comparison(dataset, groups):
+    """Розподіл літер 1-15 для N наборів років; `spread` — розкид часток у п.п."""
+    aggregates = [dataset.counts.total(group) for group in groups]
+    rows = []
+    for i, letter in enumerate(LETTERS):
+        counts = [int(agg.letters[i]) for agg in aggregates]
+        pcts = [count / agg.n_answers * 100 if agg.n_answers else 0.0 for count, agg in zip(counts, aggregates)]
+        rows.append({'letter': letter, 'counts': counts, 'pcts': pcts, 'spread': max(pcts) - min(pcts)})
+    return rows
+
+
+def bootstrap_intervals(dataset, years, n_resamples=20_000, level=0.95, seed=0):
+    """Бутстреп-інтервали (по варіантах) для часток літер, успішності питань і стратегій 1-15.
+
+    Час росте з варіантами × вибірками, тож результат (лише для читання)
+    кешується на Aggregate для (роки, n_resamples, level, seed).
+    """
+    aggregate = dataset.counts.total(years)
+    return aggregate.resamples.get(('bootstrap', n_resamples, level, seed),
+                                   lambda: freeze(_bootstrap_intervals(dataset, aggregate, n_resamples, level, seed)))
+
+
+def _bootstrap_intervals(dataset, aggregate, n_resamples, level, seed):
+    result = bootstrap(dataset, aggregate.years, n_resamples, seed)
+
+    def rows(key, labels, estimates, samples):
+        low, high = percentile_interval(samples, level)
+        return [
+            {key: label, 'estimate': float(e), 'low': float(lo), 'high': float(hi)}
+            for label, e, lo, hi in zip(labels, estimates, low, high)
+        ]
+
+    return {
+        'n_variants': result.n_variants,
+        'n_resamples': n_resamples,
+        'level': level,
+        'letters': rows('letter', LETTERS, aggregate.letters / max(aggregate.n_answers, 1), result.letters),
+        'questions': rows('question', range(1, 16), aggregate.optimal_rates, result.optimal_rates),
+        'strategies': rows('strategy', STRATEGIES, guess_rates(aggregate), result.strategy_rates),
+    }
+
+
+def strategy_score_intervals(aggregate, intervals, known_1_15, known_16_18, known_19_22, guess_matches=False):
+    """((стратегія, нижній, верхній бал НМТ), ...) з інтервалів успішності bootstrap_intervals.
+
+    Бал монотонний за успішністю, тож межі балу — це бали на межах успішності.
+    """
+    known = known_1_15 + known_16_18 + known_19_22
+    if guess_matches:
+        known += aggregate.match_tables.expected_guess[known_16_18]
+    unknown = MAX_1_15 - known_1_15
+    return tuple(
+        (row['strategy'], *(int(score) for score in nmt_scores(
+            [known + unknown * row['low'], known + unknown * row['high']], aggregate.lut)))
+        for row in intervals['strategies']
+    )
+
+
+def letter_count_intervals(intervals, n_answers):
+    """((нижня, верхня) кількість, ...) по літерах з інтервалів часток."""
+    return tuple((row['low'] * n_answers, row['high'] * n_answers) for row in intervals['letters'])
+
+
+def year_significance(dataset, years_a, years_b, n_permutations=20_000, seed=0):
+    """Чи різняться розподіли літер 1-15 двох наборів років: χ² і перестановочний тест (кешується, як бутстреп)."""
+    a, b = dataset.counts.total(years_a), dataset.counts.total(years_b)
+    return a.resamples.get(('permutation', b.years, n_permutations, seed),
+                           lambda: freeze(_year_significance(dataset, a, b, n_permutations, seed)))
+
+
+def _year_significance(dataset, a, b, n_permutations, seed):
+    years_a, years_b = a.years, b.years
+    chi2, df, p_chi2 = chi_square(a.letters, b.letters)
+    _, p_permutation = permutation_test(dataset, years_a, years_b, n_permutations, seed)
+    return {
+        'a': list(years_a), 'b': list(years_b),
+        'chi2': chi2, 'df': df, 'p_chi2': p_chi2,
+        'p_permutation': p_permutation, 'n_permutations': n_permutations,
+    }
+
+
+def backtest_table(dataset, years):
+    """Успішність стратегій 1-15: на тих самих даних, leave-one-out і між роками."""
+    backtest = leave_one_out(dataset, years)
+    rows = [
+        {'strategy': s, 'in_sample': float(i), 'leave_one_out': float(o)}
+        for s, i, o in zip(backtest.strategies, backtest.in_sample, backtest.out_of_sample)
+    ]
+    for train_year in years:
+        for test_year in years:
+            if train_year != test_year:
+                rates = train_test(dataset, [train_year], [test_year])
+                for row, rate in zip(rows, rates):
+                    row[f'{train_year}->{test_year}'] = float(rate)
+    return {
+        'strategies': rows,
+        'pairs_in_sample': backtest.pairs_in_sample,
+        'pairs_leave_one_out': backtest.pairs_out_of_sample,
+    }
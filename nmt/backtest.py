@@ -0,0 +1,83 @@
+"""Перевірка стратегій вгадування на варіантах, яких не було в «навчанні».
+
+«Оптимальна» стратегія підбирається й оцінюється на тих самих варіантах,
+тож її успішність завищена. Тут для кожного відкладеного варіанта
+найчастіші літери беруться з решти даних: внесок варіанта просто
+віднімається з готових лічильників, без повторного підрахунку.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .dataset import LETTERS
+from .scoring import STRATEGIES
+
+N_LETTERS = len(LETTERS)
+
+
+def one_hot(codes):
+    """(..., n) коди літер → (..., n, 5) одинички."""
+    return (np.asarray(codes)[..., None] == np.arange(N_LETTERS)).astype(np.int64)
+
+
+def expected_hits(train_counts, keys):
+    """Очікувана частка влучань, якщо обирати найчастішу літеру.
+
+    Нічия між кількома літерами розігрується рівномірно, тому влучання
+    рахується як 1/кількість_рівних, а не за першою з них.
+    """
+    is_max = train_counts == train_counts.max(axis=-1, keepdims=True)
+    hit = np.take_along_axis(is_max, keys[..., None].astype(np.intp), axis=-1)[..., 0]
+    return hit / is_max.sum(axis=-1)
+
+
+@dataclass(frozen=True)
+class BacktestResult:
+    strategies: tuple
+    in_sample: np.ndarray      # (S,) частка вгаданих 1-15 при навчанні на всіх даних
+    per_variant: np.ndarray    # (S, V) частка вгаданих на кожному відкладеному варіанті
+    pairs_in_sample: float     # те саме для пар 16-18 (найчастіша літера пари)
+    pairs_per_variant: np.ndarray  # (V,)
+
+    @property
+    def out_of_sample(self):
+        return self.per_variant.mean(axis=1)
+
+    @property
+    def pairs_out_of_sample(self):
+        return float(self.pairs_per_variant.mean())
+
+
+def _fixed_rates(tests):
+    """Стратегії без навчання: (5, V) для «Завжди X» і (V,) для випадкової."""
+    letters = (tests[None] == np.arange(N_LETTERS)[:, None, None]).mean(axis=2)
+    return letters, np.full(len(tests), 1 / N_LETTERS)
+
+
+def leave_one_out(dataset, years=None):
+    """Leave-one-variant-out для всіх STRATEGIES на вибраних роках."""
+    years = dataset.years if years is None else years
+    mask = dataset.year_mask(years)
+    tests, matches = dataset.tests[mask], dataset.matches[mask]
+    aggregate = dataset.counts.total(years)
+
+    # лічильники без i-го варіанта: (V, 15, 5) = total - внесок варіанта
+    optimal = expected_hits(aggregate.tests - one_hot(tests), tests).mean(axis=1)
+    letters, uniform = _fixed_rates(tests)
+    per_variant = np.vstack([optimal, letters, uniform])
+
+    pairs = expected_hits(aggregate.matches - one_hot(matches), matches).mean(axis=(1, 2))
+
+    fixed_in_sample = aggregate.letters / max(aggregate.n_answers, 1)
+    in_sample = np.concatenate(([aggregate.optimal_success], fixed_in_sample, [1 / N_LETTERS]))
+    pairs_in_sample = float(aggregate.matches.max(axis=-1).mean() / max(aggregate.n_variants, 1))
+    return BacktestResult(STRATEGIES, in_sample, per_variant, pairs_in_sample, pairs)
+
+
+def train_test(dataset, train_years, test_years):
+    """(S,) частка вгаданих 1-15 на test_years зі стратегією, підібраною на train_years."""
+    train = dataset.counts.total(train_years)
+    tests = dataset.tests[dataset.year_mask(test_years)]
+    optimal = expected_hits(np.broadcast_to(train.tests, tests.shape + (N_LETTERS,)), tests)
+    letters, uniform = _fixed_rates(tests)
+    return np.concatenate(([optimal.mean()], letters.mean(axis=1), [uniform.mean()]))
@@ -0,0 +1,195 @@
+"""Бенчмарк обчислень кожного розділу дашборду на реальних і синтетичних даних.
+
+    python -m nmt bench --scales 10 100 1000 --out bench.json
+    python -m nmt bench --out new.json --baseline old.json
+
+Синтетичні набори мають ту саму схему, що й nmt_full_data.json: кожен
+рік розмножується в `scale` разів, літери беруться з реальних частот
+кожного питання/пари, відповіді 19-22 — переважно з реальних значень.
+Для кожного повтору набір будується заново, тож міряються холодні
+обчислення (лічильники вже є — їх будує load_dataset). Пікова пам'ять
+міряється окремим запуском під tracemalloc (він бачить і буфери NumPy,
+але сповільнює Python-код, тож на час не впливає).
+"""
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from . import analytics
+from .dataset import DEFAULT_DATA_PATH, LETTERS, MATCH_TASKS, OPEN_TASKS, from_dict
+
+DEFAULT_SCALES = (10, 100, 1000)
+
+
+def synthetic_raw(dataset, scale, seed=0):
+    """Словник у форматі nmt_full_data.json з `scale` × варіантів кожного року."""
+    rng = np.random.default_rng(seed)
+    letters = np.array(LETTERS)
+    raw = {}
+    for y, year in enumerate(dataset.years):
+        mask = dataset.year_idx == y
+        n = int(mask.sum()) * scale
+        if not n:
+            continue
+        counts = dataset.counts.tests[y] + 1               # (15, 5), +1 — жодна літера не виключена
+        tests = _sample(rng, counts / counts.sum(axis=1, keepdims=True), n)
+        pairs = dataset.counts.matches[y].reshape(9, -1) + 1
+        matches = _sample(rng, pairs / pairs.sum(axis=1, keepdims=True), n).reshape(n, 3, 3)
+        real = dataset.numeric[mask]
+        numeric = real[rng.integers(len(real), size=n)]
+        fresh = rng.random(numeric.shape) < 0.3
+        numeric[fresh] = np.round(rng.normal(0, 50, size=int(fresh.sum())), 1)
+
+        dates = [f'{d}/{k}' for k in range(scale) for d in dataset.dates[mask]]
+        raw[year] = {
+            date: {
+                '1-15': list(letters[tests[i]]),
+                **{str(t): list(letters[matches[i, j]]) for j, t in enumerate(MATCH_TASKS)},
+                '19-22': [float(x) for x in numeric[i]],
+            }
+            for i, date in enumerate(dates)
+        }
+    return raw
+
+
+def _sample(rng, probs, n):
+    """(n, Q) кодів: для кожної колонки q — незалежно з розподілом probs[q]."""
+    cdf = probs.cumsum(axis=1)
+    u = rng.random((n, len(probs), 1))
+    return (u > cdf[None, :, :-1]).sum(axis=2).astype(np.int8)
+
+
+def _calculator(dataset, years):
+    aggregate = dataset.counts.total(years)
+    return analytics.strategy_comparison(aggregate, 10, 6, 4)
+
+
+def _tests(dataset, years):
+    aggregate = dataset.counts.total(years)
+    return aggregate.tests.T.tolist(), analytics.question_table(aggregate), analytics.letter_stats(aggregate)
+
+
+def _matches(dataset, years):
+    aggregate = dataset.counts.total(years)
+    return [analytics.pair_stats(aggregate, task) for task in MATCH_TASKS]
+
+
+def _numeric(dataset, years):
+    return [analytics.numeric_answers(dataset, years, task) for task in OPEN_TASKS]
+
+
+def _years(dataset, years):
+    return analytics.year_comparison(dataset, years[:1], years[1:])
+
+
+def _resampling(dataset, years):
+    return analytics.bootstrap_intervals(dataset, years), analytics.year_significance(dataset, years[:1], years[1:])
+
+
+SECTIONS = {
+    'calculator': _calculator,
+    'tests_1_15': _tests,
+    'matches_16_18': _matches,
+    'numeric_19_22': _numeric,
+    'year_comparison': _years,
+    'resampling': _resampling,
+}
+
+
+def _peak_bytes(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _measure(make_call, repeat):
+    """(часи `repeat` холодних запусків, пік пам'яті ще одного) — make_call() готує свіжий виклик."""
+    times = []
+    for _ in range(repeat):
+        call = make_call()
+        started = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - started)
+    return times, _peak_bytes(make_call())
+
+
+def _section_call(raw, section):
+    dataset = from_dict(raw)
+    dataset.counts
+    return lambda: SECTIONS[section](dataset, dataset.years)
+
+
+def bench_raw(name, raw, repeat=5, sections=None):
+    """Рядки результатів для одного набору даних (найкращий з `repeat` холодних запусків)."""
+    payload = json.dumps(raw, ensure_ascii=False)
+    n_variants = from_dict(raw).n_variants
+    rows = [_row(name, n_variants, 'load', *_measure(lambda: lambda: from_dict(json.loads(payload)).counts, repeat))]
+    for section in sections or SECTIONS:
+        rows.append(_row(name, n_variants, section, *_measure(lambda: _section_call(raw, section), repeat)))
+    return rows
+
+
+def _row(name, n_variants, section, times, peak):
+    return {
+        'dataset': name,
+        'n_variants': n_variants,
+        'section': section,
+        'best_s': min(times),
+        'median_s': float(np.median(times)),
+        'peak_bytes': peak,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(path=DEFAULT_DATA_PATH, scales=DEFAULT_SCALES, repeat=5, seed=0, sections=None):
+    """Повний звіт: метадані запуску і рядки для реальних та синтетичних даних."""
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    dataset = from_dict(raw)
+    results = bench_raw('real', raw, repeat, sections)
+    for scale in scales:
+        results += bench_raw(f'x{scale}', synthetic_raw(dataset, scale, seed), repeat, sections)
+    return {
+        'meta': {
+            'commit': _commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare_reports(baseline, current):
+    """Відношення часу current/baseline для спільних (набір, розділ); > 1 — повільніше."""
+    old = {(row['dataset'], row['section']): row for row in baseline['results']}
+    return [
+        {
+            'dataset': row['dataset'],
+            'section': row['section'],
+            'time_ratio': row['best_s'] / old[key]['best_s'] if old[key]['best_s'] else None,
+            'memory_ratio': row['peak_bytes'] / old[key]['peak_bytes'] if old[key]['peak_bytes'] else None,
+        }
+        for row in current['results']
+        if (key := (row['dataset'], row['section'])) in old
+    ]
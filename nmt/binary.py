@@ -0,0 +1,143 @@
+"""Компактний бінарний формат даних, що читається через mmap.
+
+Поруч з JSON (`nmt_full_data.json.bin/`) лежать `.npy` з кодами літер
+(uint8), відповідями 19-22 (float64), датами й роками сесій, а також
+готові лічильники `Counts`. `meta.json` пам'ятає відбиток (mtime,
+розмір) джерела: якщо JSON змінився (напр. ingest), бінарна копія
+вважається застарілою — load_dataset читає JSON і перезаписує з
+прочитаного копію, тож ingest сам її не переписує.
+
+Масиви відкриваються з mmap_mode='r', тож усі процеси Streamlit ділять
+одну копію в page cache, а час завантаження не росте з історією.
+Кожен експорт пишеться в нову підтеку, і лише потім атомарно
+підміняється meta.json — читач ніколи не бачить половину запису.
+
+    python -m nmt export-binary
+"""
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+FORMAT_VERSION = 1
+ARRAYS = ('year_idx', 'dates', 'tests', 'matches', 'numeric')
+COUNTS = ('n_variants', 'tests', 'matches', 'combos')
+
+
+def binary_path(path):
+    """Тека бінарної копії для файлу або теки JSON."""
+    path = Path(path).resolve()
+    return path.with_name(path.name + '.bin')
+
+
+def _jsonable(stamp):
+    return json.loads(json.dumps(stamp))
+
+
+def export_binary(path):
+    """Перечитує JSON з `path` і записує його бінарну копію; повертає meta."""
+    from .dataset import _stamp, from_dict, read_raw
+
+    path = Path(path).resolve()
+    stamp = _stamp(path)
+    dataset = from_dict(read_raw(path))
+    if _stamp(path) != stamp:
+        raise RuntimeError(f'{path} змінився під час експорту — повторіть')
+    return _write(dataset, path, stamp)
+
+
+def _write(dataset, path, stamp):
+    out = binary_path(path)
+    out.mkdir(exist_ok=True)
+    token = uuid.uuid4().hex
+    target = out / token
+    target.mkdir()
+    for name in ARRAYS:
+        array = getattr(dataset, name)
+        if name in ('tests', 'matches'):
+            array = array.astype(np.uint8)
+        np.save(target / f'{name}.npy', np.ascontiguousarray(array))
+    for name in COUNTS:
+        np.save(target / f'counts_{name}.npy', getattr(dataset.counts, name))
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'data': token,
+        'years': list(dataset.years),
+        'n_variants': dataset.n_variants,
+        'source_stamp': _jsonable(stamp),
+    }
+    fd, tmp = tempfile.mkstemp(dir=out, prefix='.meta.', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.chmod(tmp, 0o644)  # mkstemp створює 0600, а читати мають усі процеси
+    os.replace(tmp, out / 'meta.json')
+
+    # старі підтеки: відкриті mmap у інших процесах живуть до закриття
+    for child in out.iterdir():
+        if child.is_dir() and child.name != token:
+            shutil.rmtree(child, ignore_errors=True)
+    return meta
+
+
+def _source_stamp(out):
+    try:
+        with open(out / 'meta.json', 'r', encoding='utf-8') as f:
+            return json.load(f).get('source_stamp')
+    except (OSError, ValueError):
+        return None
+
+
+def refresh_binary(dataset, path, stamp):
+    """Перезаписує застарілу бінарну копію з уже прочитаного `dataset` (версії `stamp`).
+
+    Нічого не робить, якщо копії немає (її не просили) або вона свіжа;
+    з кількох процесів копію пише один (flock), решта бачать свіжий meta.
+    """
+    from .diskcache import locked
+
+    out = binary_path(path)
+    if not out.is_dir():
+        return
+    try:
+        with locked(out / '.lock'):
+            if _source_stamp(out) != _jsonable(stamp):
+                _write(dataset, Path(path).resolve(), stamp)
+    except OSError:
+        pass
+
+
+def load_binary(path, stamp):
+    """Dataset з бінарної копії або None, якщо її немає, вона застаріла чи іншої версії."""
+    from .aggregates import Counts
+    from .dataset import Dataset
+
+    out = binary_path(path)
+    try:
+        with open(out / 'meta.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != FORMAT_VERSION or meta.get('source_stamp') != _jsonable(stamp):
+            return None
+        data = out / meta['data']
+        arrays = {name: np.load(data / f'{name}.npy', mmap_mode='r') for name in ARRAYS}
+        counts = {name: np.load(data / f'counts_{name}.npy') for name in COUNTS}
+    except (OSError, ValueError, KeyError):
+        return None
+
+    years = tuple(meta['years'])
+    dataset = Dataset(
+        years=years,
+        year_idx=arrays['year_idx'],
+        dates=arrays['dates'],
+        tests=arrays['tests'].view(np.int8),
+        matches=arrays['matches'].view(np.int8),
+        numeric=arrays['numeric'],
+    )
+    for array in counts.values():
+        array.setflags(write=False)
+    dataset.__dict__['counts'] = Counts(years, **counts)  # значення для cached_property
+    return dataset
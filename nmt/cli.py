@@ -0,0 +1,367 @@
+"""Командний рядок: ті самі розрахунки, що й у дашборді, без Streamlit.
+
+    python -m nmt strategies --years 2024
+    python -m nmt stats --task 17 --years 2024 2025
+    python -m nmt grade answers.csv results.csv --workers 4
+    python -m nmt serve --port 8080 --warm
+    python -m nmt startup --repeat 3
+    python -m nmt bench --scales 10 100 1000 --out bench.json
+    python -m nmt ingest 2026 23.05 session.json
+    python -m nmt export-binary
+    python -m nmt policy --out policy.npz
+    python -m nmt metrics metrics.jsonl --bucket 3600
+    python -m nmt prerender --out site --workers 4
+    python -m nmt calculator --known-1-15 10 --known-16-18 6 --known-19-22 4 --json
+    python -m nmt complete "АБ?ГД??В??А?Б??"
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from . import analytics
+from .dataset import DEFAULT_DATA_PATH, LETTERS, MATCH_TASKS, OPEN_TASKS, load_dataset
+from .profiling import PHASES
+from .startup import SECTIONS as STARTUP_SECTIONS
+
+
+def _section_calculator(dataset, years, args):
+    aggregate = dataset.counts.total(years)
+    return {
+        'known': {'1-15': args.known_1_15, '16-18': args.known_16_18, '19-22': args.known_19_22},
+        'threshold': args.threshold,
+        'guess_16_18': args.guess_16_18,
+        'strategies': analytics.strategy_comparison(
+            aggregate, args.known_1_15, args.known_16_18, args.known_19_22, args.threshold, args.guess_16_18),
+        'policy': analytics.best_policy(aggregate, args.known_1_15, args.known_16_18, args.known_19_22, args.threshold),
+        'conditional': analytics.conditional_strategy(dataset.sequences.total(years), args.known_1_15),
+    }
+
+
+def _section_stats(dataset, years, args):
+    aggregate = dataset.counts.total(years)
+    if args.task in MATCH_TASKS:
+        known = tuple(None if letter == '?' else letter for letter in args.known) if args.known else (None,) * 3
+        return {**analytics.pair_stats(aggregate, args.task), 'joint': analytics.match_guess(aggregate, args.task, known)}
+    if args.task in OPEN_TASKS:
+        if args.value is not None:
+            return analytics.numeric_lookup(dataset, years, args.task, args.value, args.tolerance)
+        return {
+            **analytics.numeric_answers(dataset, years, args.task, tolerance=args.tolerance),
+            **analytics.numeric_distribution(dataset, years, args.task),
+        }
+    return {
+        'letters': analytics.letter_stats(aggregate),
+        'heatmap': aggregate.tests.tolist(),
+        'questions': analytics.question_table(aggregate, n_alternatives=0),
+        'sequences': analytics.sequence_stats(dataset.sequences.total(years), args.position),
+    }
+
+
+def _section_strategies(dataset, years, args):
+    aggregate = dataset.counts.total(years)
+    return {
+        'questions': analytics.question_table(aggregate),
+        'optimal_success': aggregate.optimal_success,
+        'backtest': analytics.backtest_table(dataset, years),
+        'intervals': analytics.bootstrap_intervals(dataset, years, args.resamples),
+        'pairs': [analytics.pair_stats(aggregate, task) for task in MATCH_TASKS],
+        'numeric': [
+            {k: v for k, v in analytics.numeric_answers(dataset, years, task).items() if k != 'answers'}
+            for task in OPEN_TASKS
+        ],
+    }
+
+
+def _section_compare(dataset, years, args):
+    years_a = args.a or [dataset.years[0]]
+    years_b = args.b or [dataset.years[-1]]
+    return {
+        'a': list(years_a),
+        'b': list(years_b),
+        'letters': analytics.year_comparison(dataset, years_a, years_b),
+        'significance': analytics.year_significance(dataset, years_a, years_b, args.resamples),
+        'by_year': {
+            'years': list(years),
+            'letters': analytics.letter_comparison(dataset, [(year,) for year in years]),
+        },
+    }
+
+
+def _section_complete(dataset, years, args):
+    key = args.key.replace(' ', '')
+    if len(key) != 15 or set(key) - set(LETTERS) - {'?'}:
+        raise SystemExit('Ключ — 15 символів: літери А-Д або ? для невідомих')
+    return analytics.completion(dataset.sequences.total(years), tuple(None if c == '?' else c for c in key))
+
+
+def _section_grade(dataset, years, args):
+    from .grader import grade_file
+    return grade_file(args.src, args.dst, dataset, args.chunk_size, args.workers, args.tolerance)
+
+
+def _section_serve(dataset, years, args):
+    """Після зупинки (Ctrl+C) — статистика сервісу: запити, кеш і затримки."""
+    import asyncio
+    from .server import ScoringService, serve
+    service = ScoringService(dataset, path=args.data)
+    if args.warm:
+        service.warm()
+    print(f'Сервіс калькулятора: http://{args.host}:{args.port}/calculator', file=sys.stderr)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return service.stats()
+
+
+def _section_startup(dataset, years, args):
+    from .startup import startup_report
+    return startup_report(args.sections, args.repeat)
+
+
+def _section_bench(dataset, years, args):
+    from .bench import compare_reports, run_benchmarks
+    report = run_benchmarks(args.data, args.scales, args.repeat, args.seed)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    result = {'out': args.out, 'results': report['results']}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            result['vs_baseline'] = compare_reports(json.load(f), report)
+    return result
+
+
+def _section_ingest(dataset, years, args):
+    from .ingest import add_session
+    if args.session == '-':
+        tasks = json.load(sys.stdin)
+    else:
+        with open(args.session, 'r', encoding='utf-8') as f:
+            tasks = json.load(f)
+    try:
+        target = add_session(args.year, args.date, tasks, args.data)
+    except ValueError as exc:
+        raise SystemExit(f'Сесію не додано: {exc}') from None
+    updated = load_dataset(args.data)
+    return {'file': str(target), 'years': list(updated.years), 'n_variants': updated.n_variants}
+
+
+def _section_export_binary(dataset, years, args):
+    from .binary import binary_path, export_binary
+    meta = export_binary(args.data)
+    return {'dir': str(binary_path(args.data)), 'years': meta['years'], 'n_variants': meta['n_variants']}
+
+
+def _section_policy(dataset, years, args):
+    """Таблиці політик для кожного року окремо і для всіх разом; --out — у .npz.
+
+    solve_ms — час самого PolicyTable.solve: властивість `policy` зазвичай
+    приходить з дискового кешу, тож її час — лише пошук у словнику.
+    """
+    from .policy import PolicyTable
+    filters = [(year,) for year in years] + ([years] if len(years) > 1 else [])
+    tables, rows = {}, []
+    for key in filters:
+        aggregate = dataset.counts.total(key)
+        start = time.perf_counter()
+        table = PolicyTable.solve(aggregate)
+        elapsed = time.perf_counter() - start
+        # виграш над політикою з максимумом очікуваних тестових балів
+        gain = table.expected_nmt.max(axis=0) - table.expected_nmt[table.policies.index(('Оптимальна', 'expected'))]
+        rows.append({
+            'years': '+'.join(key),
+            'solve_ms': elapsed * 1000,
+            'states': int(gain.size),
+            'better_than_expected_points': int((gain > 1e-9).sum()),
+            'max_gain_nmt': float(gain.max()),
+        })
+        tables['+'.join(key)] = table
+    if args.out:
+        np.savez_compressed(args.out, policies=np.array(next(iter(tables.values())).policies), **{
+            f'{name}/{field}': getattr(table, field)
+            for name, table in tables.items()
+            for field in ('expected_nmt', 'best_expected', 'best_at_least', 'p_at_least')
+        })
+    return {'out': args.out, 'filters': rows}
+
+
+def _section_metrics(dataset, years, args):
+    """Перцентилі часу перезапусків з JSONL-файлу NMT_METRICS: за розділами і, з --bucket, за часом."""
+    from .profiling import read_jsonl, summarize
+    records = read_jsonl(args.file)
+    groups = {}
+    for record in records:
+        bucket = int(record['ts'] // args.bucket * args.bucket) if args.bucket else None
+        groups.setdefault((bucket, record['section']), []).append(record)
+    rows = []
+    for (bucket, section), group in sorted(groups.items(), key=lambda item: (item[0][0] or 0, item[0][1])):
+        summary = summarize(group, args.quantiles)
+        row = {'section': section, 'reruns': len(group)}
+        if bucket is not None:
+            row['from'] = time.strftime('%Y-%m-%d %H:%M', time.localtime(bucket))
+        for name in ('total', *args.phases):
+            row.update({f'{name}_p{q}_ms': summary[name][q] * 1000 for q in args.quantiles})
+        rows.append(row)
+    return {'file': args.file, 'reruns': len(records), 'groups': rows}
+
+
+def _section_prerender(dataset, years, args):
+    from .prerender import prerender
+    return prerender(args.out, args.data, args.workers, args.resamples, args.force)
+
+
+SECTIONS = {
+    'calculator': _section_calculator,
+    'stats': _section_stats,
+    'strategies': _section_strategies,
+    'compare': _section_compare,
+    'complete': _section_complete,
+    'grade': _section_grade,
+    'serve': _section_serve,
+    'startup': _section_startup,
+    'bench': _section_bench,
+    'ingest': _section_ingest,
+    'export-binary': _section_export_binary,
+    'policy': _section_policy,
+    'metrics': _section_metrics,
+    'prerender': _section_prerender,
+}
+
+
+def _inline(value):
+    if isinstance(value, float):
+        return f'{value:.4g}'
+    if isinstance(value, dict):
+        return ' '.join(f'{k}={_inline(v)}' for k, v in value.items())
+    if isinstance(value, list):
+        return '[' + '; '.join(_inline(item) for item in value) + ']' if value else '-'
+    return str(value)
+
+
+def _format(value, indent=0):
+    """Читабельний текст: словники — з відступами, списки словників — рядок на елемент."""
+    pad = '  ' * indent
+    if isinstance(value, dict):
+        lines = []
+        for key, item in value.items():
+            if isinstance(item, (dict, list)) and item:
+                lines.append(f'{pad}{key}:')
+                lines.append(_format(item, indent + 1))
+            else:
+                lines.append(f'{pad}{key}: {_inline(item)}')
+        return '\n'.join(lines)
+    if isinstance(value, list) and all(isinstance(item, dict) for item in value):
+        return '\n'.join(pad + '- ' + _inline(item) for item in value)
+    return pad + _inline(value)
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--data', default=str(DEFAULT_DATA_PATH), help='шлях до nmt_full_data.json')
+    common.add_argument('--years', nargs='+', help='роки для аналізу (за замовчуванням — всі)')
+    common.add_argument('--json', action='store_true', help='вивести JSON замість тексту')
+
+    parser = argparse.ArgumentParser(prog='python -m nmt', description='Аналітика НМТ з математики без дашборду.')
+    sub = parser.add_subparsers(dest='section', required=True)
+
+    calc = sub.add_parser('calculator', parents=[common], help='порівняння стратегій вгадування')
+    calc.add_argument('--known-1-15', type=int, default=10, choices=range(16), metavar='0..15')
+    calc.add_argument('--known-16-18', type=int, default=6, choices=range(10), metavar='0..9')
+    calc.add_argument('--known-19-22', type=int, default=4, choices=range(9), metavar='0..8')
+    calc.add_argument('--threshold', type=int, default=150, help='цільовий бал НМТ')
+    calc.add_argument('--guess-16-18', action='store_true', help='вгадувати невідомі пари 16-18 спільною трійкою')
+
+    stats = sub.add_parser('stats', parents=[common], help='статистика по завданнях')
+    stats.add_argument('--task', type=int, default=1, help='1 (завдання 1-15), 16-18 або 19-22')
+    stats.add_argument('--known', nargs=3, choices=(*LETTERS, '?'), metavar='А..Д|?',
+                       help='16-18: відомі літери трьох пар (? — невідома) для найкращого доповнення')
+    stats.add_argument('--position', type=int, choices=range(1, 15), metavar='1..14',
+                       help='1-15: переходи лише q→q+1 (за замовчуванням — по всіх сусідніх питаннях)')
+    stats.add_argument('--value', type=float, help='19-22: чи траплялася така відповідь і найближчі до неї')
+    stats.add_argument('--tolerance', type=float, default=1e-6, help='19-22: допуск, у межах якого відповіді однакові')
+
+    strategies = sub.add_parser('strategies', parents=[common], help='оптимальні стратегії і бектест')
+    strategies.add_argument('--resamples', type=int, default=20_000, help='бутстреп-вибірок для 95% інтервалів')
+
+    compare = sub.add_parser('compare', parents=[common], help='порівняння двох наборів років')
+    compare.add_argument('--a', nargs='+', help='перший набір років')
+    compare.add_argument('--b', nargs='+', help='другий набір років')
+    compare.add_argument('--resamples', type=int, default=20_000, help='перестановок для тесту різниці')
+
+    complete = sub.add_parser('complete', parents=[common], help='доповнити невідомі відповіді 1-15 за відомими')
+    complete.add_argument('key', help='15 символів: літери А-Д, ? — невідома відповідь')
+
+    grade = sub.add_parser('grade', parents=[common], help='перевірка файлу бланків учнів (CSV або JSONL)')
+    grade.add_argument('src', help='вхідний файл бланків')
+    grade.add_argument('dst', help='куди писати результати (.csv або .jsonl)')
+    grade.add_argument('--chunk-size', type=int, default=100_000, help='бланків в одному шматку')
+    grade.add_argument('--workers', type=int, default=1, help='кількість процесів')
+    grade.add_argument('--tolerance', type=float, default=1e-6, help='допуск для відповідей 19-22')
+
+    serve = sub.add_parser('serve', parents=[common], help='JSON-сервіс калькулятора по HTTP')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--warm', action='store_true', help='заздалегідь порахувати всі відповіді')
+
+    startup = sub.add_parser('startup', parents=[common], help='час холодного старту кожного розділу дашборду')
+    startup.add_argument('--sections', nargs='+', default=list(STARTUP_SECTIONS), choices=STARTUP_SECTIONS)
+    startup.add_argument('--repeat', type=int, default=1, help='запусків на розділ (береться найшвидший)')
+
+    bench = sub.add_parser('bench', parents=[common], help='бенчмарк розділів на реальних і синтетичних даних')
+    bench.add_argument('--scales', nargs='*', type=int, default=[10, 100, 1000], help='множники синтетичних наборів')
+    bench.add_argument('--repeat', type=int, default=5, help='холодних запусків на розділ')
+    bench.add_argument('--seed', type=int, default=0)
+    bench.add_argument('--out', default='bench.json', help='куди записати JSON з результатами')
+    bench.add_argument('--baseline', help='попередній JSON для порівняння')
+
+    ingest = sub.add_parser('ingest', parents=[common], help='додати нову сесію до даних')
+    ingest.add_argument('year')
+    ingest.add_argument('date', help='дата сесії, напр. 23.05')
+    ingest.add_argument('session', help='JSON {"1-15": [...], "16": [...], ..., "19-22": [...]} або - для stdin')
+
+    sub.add_parser('export-binary', parents=[common], help='записати бінарну копію даних для швидкого mmap-читання')
+
+    policy = sub.add_parser('policy', parents=[common], help='таблиця оптимальних політик за балом НМТ')
+    policy.add_argument('--out', help='записати таблиці у .npz')
+
+    metrics = sub.add_parser('metrics', parents=[common], help='перцентилі часу перезапусків дашборду з файлу метрик')
+    metrics.add_argument('file', help='JSONL-файл, який пише дашборд з NMT_METRICS=metrics.jsonl')
+    metrics.add_argument('--bucket', type=int, help='групувати за інтервалами часу, с (напр. 3600)')
+    metrics.add_argument('--quantiles', nargs='+', type=int, default=[50, 95, 99])
+    metrics.add_argument('--phases', nargs='+', default=[], choices=PHASES, help='крім total, ще й ці фази')
+
+    prerender = sub.add_parser('prerender', parents=[common], help='статичні HTML-звіти для всіх розділів і років')
+    prerender.add_argument('--out', default='site', help='тека для сторінок та index.html')
+    prerender.add_argument('--workers', type=int, default=1, help='кількість процесів')
+    prerender.add_argument('--resamples', type=int, default=20_000, help='бутстреп-вибірок і перестановок')
+    prerender.add_argument('--force', action='store_true', help='рендерити всі сторінки, навіть незмінені')
+    return parser
+
+
+def run(argv=None):
+    """Результат розділу як словник (без виводу)."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    dataset = load_dataset(args.data)
+    years = tuple(args.years) if args.years else dataset.years
+    for option, values in (('--years', years), ('--a', getattr(args, 'a', None)), ('--b', getattr(args, 'b', None))):
+        unknown = [y for y in values or () if y not in dataset.years]
+        if unknown:
+            parser.error(f"{option}: невідомі роки {', '.join(unknown)} (є: {', '.join(dataset.years)})")
+    return args, SECTIONS[args.section](dataset, years, args)
+
+
+def main(argv=None):
+    args, result = run(argv)
+    if args.json:
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print(_format(result))
+
+
+if __name__ == '__main__':
+    main()
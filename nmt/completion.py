@@ -0,0 +1,213 @@
+"""Доповнення невідомих відповідей 1-15 з урахуванням відомих у тому ж варіанті.
+
+У ключах 1-15 літери розподілені доволі рівномірно (профіль варіанта —
+вектор кількостей А..Д із сумою 15), тож 10 відомих відповідей щось
+кажуть про решту 5. Модель: незалежні апріорні P(літера | питання),
+нахилені до збалансованих профілів:
+
+    P(ключ) ∝ Π_q p_q(x_q) · exp(-λ · D(профіль)),  D(c) = Σ (c_i - 3)²,
+
+де λ підбирається так, щоб середній D моделі дорівнював середньому D
+історичних профілів варіантів (нахил з максимальною ентропією). Самі
+частоти профілів не годяться: різних профілів тисячі, а варіантів —
+десятки. Leave-one-out на наявних даних показує, що баланс літер
+переноситься на новий варіант, а частоти окремих питань — майже ні,
+тож апріорні p_q сильно стягнуті до рівномірних (PRIOR).
+
+Перебір 5^k доповнень замінено динамікою по станах «скільки кожної
+літери вже використано» (композиції числа з 5 доданків, не більше 3876
+на рівень): прямий і зворотний прохід дають точні апостеріорні P(літера)
+для кожного невідомого питання, а максимум очікуваної кількості
+вгаданих — це найімовірніша літера кожного з них. Той самий прохід з
+max замість суми дає найімовірніший повний ключ. Навіть для 15
+невідомих це ~15 мс.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from .dataset import LETTERS
+
+N_LETTERS = len(LETTERS)
+N_QUESTIONS = 15
+PRIOR = 20.0  # псевдолічильник кожної літери в апріорних p_q (див. docstring модуля)
+
+
+def _codes(counts):
+    """(..., 5) кількості (≤ 15) → ціле в системі числення з основою 16."""
+    return np.asarray(counts, dtype=np.int64) @ (16 ** np.arange(N_LETTERS - 1, -1, -1))
+
+
+@lru_cache(maxsize=None)
+def compositions(total):
+    """(n, 5) — усі профілі з сумою total у лексикографічному порядку (він же — порядок кодів)."""
+    grid = np.stack(np.meshgrid(*[np.arange(total + 1)] * (N_LETTERS - 1), indexing='ij'), -1)
+    grid = grid.reshape(-1, N_LETTERS - 1)
+    grid = grid[grid.sum(axis=1) <= total]
+    result = np.column_stack([grid, total - grid.sum(axis=1)])
+    result.setflags(write=False)
+    return result
+
+
+@lru_cache(maxsize=None)
+def _sorted_codes(total):
+    codes = _codes(compositions(total))
+    codes.setflags(write=False)
+    return codes
+
+
+def composition_rank(counts, total=N_QUESTIONS):
+    """Номер профілю (..., 5) серед compositions(total)."""
+    return np.searchsorted(_sorted_codes(total), _codes(counts))
+
+
+@lru_cache(maxsize=None)
+def _successors(total):
+    """(n, 5) — номер профілю рівня total+1 після додавання кожної літери."""
+    comps = compositions(total)
+    result = composition_rank(comps[:, None, :] + np.eye(N_LETTERS, dtype=np.int64), total + 1)
+    result.setflags(write=False)
+    return result
+
+
+def spread(counts):
+    """D(c) = Σ (c_i - 3)² — наскільки профіль відхиляється від рівних кількостей."""
+    return ((np.asarray(counts) - N_QUESTIONS / N_LETTERS) ** 2).sum(axis=-1)
+
+
+SPREAD = spread(compositions(N_QUESTIONS))  # (3876,) D кожного повного профілю
+SPREAD.setflags(write=False)
+
+
+def _fit_balance(priors, profiles, low=-2.0, high=5.0, steps=60):
+    """λ, за якого E[D] нахиленої моделі дорівнює середньому D профілів (бісекція; E[D] спадає з λ)."""
+    if not profiles.sum():
+        return 0.0
+    target = profiles @ SPREAD / profiles.sum()
+    with np.errstate(divide='ignore'):
+        log_p0 = np.log(_forward(priors)[-1])
+    for _ in range(steps):
+        balance = (low + high) / 2
+        log_w = log_p0 - balance * SPREAD
+        w = np.exp(log_w - log_w.max())
+        if w @ SPREAD / w.sum() > target:
+            low = balance
+        else:
+            high = balance
+    return (low + high) / 2
+
+
+def _forward(priors):
+    """[F_0, ..., F_k]: F_i[s] = сума Π p по призначеннях перших i питань з профілем s."""
+    levels = [np.ones(1)]
+    for i, p in enumerate(priors):
+        nxt = np.zeros(len(compositions(i + 1)))
+        successors = _successors(i)
+        for letter in range(N_LETTERS):  # для фіксованої літери переходи ін'єктивні
+            nxt[successors[:, letter]] += levels[-1] * p[letter]
+        levels.append(nxt)
+    return levels
+
+
+@dataclass(frozen=True)
+class Completion:
+    known: tuple               # (15,) код літери або None
+    marginals: np.ndarray      # (15, 5) — P(літера) для кожного питання (відомі — одиниці)
+    best: tuple                # (15,) — найімовірніша літера кожного питання
+    expected_correct: float    # очікувано вгаданих невідомих при виборі best
+    prior_expected: float      # те саме за самими апріорними p_q (без профілю)
+    likeliest: tuple           # (15,) — найімовірніший повний ключ
+    likeliest_prob: float      # його ймовірність серед доповнень
+
+    @property
+    def unknown(self):
+        return tuple(q for q, code in enumerate(self.known) if code is None)
+
+
+@dataclass(frozen=True)
+class CompletionModel:
+    priors: np.ndarray   # (15, 5) — згладжені P(літера | питання)
+    balance: float       # λ
+    weights: np.ndarray  # (3876,) — exp(-λ·D) кожного повного профілю
+
+    @classmethod
+    def fit(cls, tests, profiles, prior=PRIOR, balance=None):
+        """tests — (15, 5) лічильники питань, profiles — (3876,) варіантів з кожним профілем.
+
+        balance=None — λ з профілів; 0 — без профілю, лише апріорні частоти питань.
+        """
+        tests = np.asarray(tests, dtype=np.float64)
+        priors = (tests + prior) / (tests.sum(axis=1, keepdims=True) + N_LETTERS * prior)
+        if balance is None:
+            balance = _fit_balance(priors, np.asarray(profiles, dtype=np.float64))
+        weights = np.exp(-balance * (SPREAD - SPREAD.min()))
+        model = cls(priors, float(balance), weights)
+        for array in (model.priors, model.weights):
+            array.setflags(write=False)
+        return model
+
+    def solve(self, known):
+        """known — 15 літер або None (невідоме питання); див. Completion."""
+        known = tuple(None if letter is None else LETTERS.index(letter) for letter in known)
+        if len(known) != N_QUESTIONS:
+            raise ValueError(f'потрібно {N_QUESTIONS} відповідей (None — невідома)')
+        unknown = [q for q, code in enumerate(known) if code is None]
+        known_counts = np.bincount([code for code in known if code is not None], minlength=N_LETTERS)
+        priors = self.priors[unknown]
+        k = len(unknown)
+
+        # W для кожного профілю невідомих: повний профіль = відомі + невідомі
+        final = self.weights[composition_rank(known_counts + compositions(k))]
+
+        forward = _forward(priors)
+        backward = [final]
+        for i in range(k - 1, -1, -1):
+            backward.append((priors[i] * backward[-1][_successors(i)]).sum(axis=1))
+        backward.reverse()
+        evidence = forward[-1] @ final
+
+        marginals = np.zeros((N_QUESTIONS, N_LETTERS))
+        for q, code in enumerate(known):
+            if code is not None:
+                marginals[q, code] = 1.0
+        for i, q in enumerate(unknown):
+            marginals[q] = (forward[i][:, None] * priors[i] * backward[i + 1][_successors(i)]).sum(axis=0) / evidence
+
+        best = marginals.argmax(axis=1)
+        likeliest, likeliest_prob = self._likeliest(priors, final, evidence)
+        key = np.array([-1 if code is None else code for code in known])
+        key[unknown] = likeliest
+        return Completion(
+            known=known,
+            marginals=marginals,
+            best=tuple(int(code) for code in best),
+            expected_correct=float(marginals[unknown].max(axis=1).sum()),
+            prior_expected=float(priors.max(axis=1).sum()),
+            likeliest=tuple(int(code) for code in key),
+            likeliest_prob=likeliest_prob,
+        )
+
+    @staticmethod
+    def _likeliest(priors, final, evidence):
+        """Найімовірніше доповнення (max-product по тих самих станах) і його ймовірність."""
+        scores, back = [np.ones(1)], []
+        for i, p in enumerate(priors):
+            candidates = (scores[-1][:, None] * p).ravel()
+            targets = _successors(i).ravel()
+            # найкращий попередник кожного стану: сортування за (стан, -оцінка)
+            order = np.lexsort((-candidates, targets))
+            first = order[np.r_[True, targets[order][1:] != targets[order][:-1]]]
+            best = np.zeros(len(compositions(i + 1)))
+            parent = np.zeros(len(best), dtype=np.intp)
+            best[targets[first]] = candidates[first]
+            parent[targets[first]] = first
+            scores.append(best)
+            back.append(parent)
+        state = int(np.argmax(scores[-1] * final))
+        prob = float(scores[-1][state] * final[state] / evidence) if evidence > 0 else 0.0
+        letters = []
+        for parent in reversed(back):
+            state, letter = divmod(int(parent[state]), N_LETTERS)
+            letters.append(letter)
+        return letters[::-1], prob
@@ -0,0 +1,262 @@
+"""Колоночне представлення бази правильних відповідей НМТ.
+
+Дані — один JSON {рік: {дата: завдання}} або тека JSON-файлів (по
+файлу на рік: `2026.json` з {дата: завдання}, або будь-які файли
+повного формату). Роки й сесії знаходяться автоматично. JSON
+розбирається один раз на процес і кешується до зміни файлів
+(mtime + розмір), тож усі сесії Streamlit та всі розділи дашборду
+читають одні й ті самі незмінні масиви. Якщо поруч є свіжа бінарна
+копія (див. binary), масиви відкриваються з неї через mmap.
+"""
+import json
+import os
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+
+LETTERS = ('А', 'Б', 'В', 'Г', 'Д')
+LETTER_CODE = {letter: code for code, letter in enumerate(LETTERS)}
+MATCH_TASKS = (16, 17, 18)
+OPEN_TASKS = (19, 20, 21, 22)
+
+DEFAULT_DATA_PATH = Path(os.environ.get('NMT_DATA') or Path(__file__).resolve().parent.parent / 'nmt_full_data.json')
+
+
+def _frozen(array):
+    array.setflags(write=False)
+    return array
+
+
+@dataclass(frozen=True)
+class Dataset:
+    years: tuple           # роки у порядку появи у файлі
+    year_idx: np.ndarray   # (V,) int8 — індекс року в `years` для кожного варіанта
+    dates: np.ndarray      # (V,) дата сесії, напр. '18.05'
+    tests: np.ndarray      # (V, 15) int8 — коди літер завдань 1-15
+    matches: np.ndarray    # (V, 3, 3) int8 — [варіант, завдання 16-18, пара]
+    numeric: np.ndarray    # (V, 4) float64 — відповіді 19-22
+
+    @property
+    def n_variants(self):
+        return len(self.year_idx)
+
+    @cached_property
+    def counts(self):
+        """Лічильники відповідей по роках (див. aggregates.Counts)."""
+        from .aggregates import Counts
+        return Counts.from_dataset(self)
+
+    @cached_property
+    def numeric_index(self):
+        """Відсортований індекс відповідей 19-22 (див. numeric.NumericIndex)."""
+        from .numeric import NumericIndex
+        return NumericIndex.from_dataset(self)
+
+    @cached_property
+    def sequences(self):
+        """Лічильники переходів і серій у ключах 1-15 по роках (див. sequences.SequenceCounts)."""
+        from .sequences import SequenceCounts
+        return SequenceCounts.from_dataset(self)
+
+    def __len__(self):
+        return self.n_variants
+
+    @cached_property
+    def sessions(self):
+        """{(рік, дата): номер варіанта} — індекс сесій, будується один раз."""
+        return {(self.years[y], str(d)): i for i, (y, d) in enumerate(zip(self.year_idx, self.dates))}
+
+    @cached_property
+    def year_rows(self):
+        """{рік: номери його варіантів}."""
+        return {year: _frozen(np.flatnonzero(self.year_idx == y)) for y, year in enumerate(self.years)}
+
+    def year_mask(self, years):
+        codes = [self.years.index(y) for y in years if y in self.years]
+        return np.isin(self.year_idx, codes)
+
+    def select(self, years):
+        """Підмножина варіантів для заданих років (масиви-копії лише для читання)."""
+        mask = self.year_mask(years)
+        return Dataset(
+            years=self.years,
+            year_idx=_frozen(self.year_idx[mask]),
+            dates=_frozen(self.dates[mask]),
+            tests=_frozen(self.tests[mask]),
+            matches=_frozen(self.matches[mask]),
+            numeric=_frozen(self.numeric[mask]),
+        )
+
+    def year_labels(self):
+        return np.array(self.years)[self.year_idx]
+
+    def with_session(self, year, date, tasks, sort_years=False):
+        """(новий Dataset, номер рядка) з ще однією сесією там, де її поставило б повне читання.
+
+        Рядки згруповані за роками, тож сесія йде в кінець свого року;
+        новий рік — у кінець (або за порядком, якщо `sort_years`, як у теці).
+        """
+        row = from_dict({year: {date: tasks}})
+        years = self.years if year in self.years else self.years + (year,)
+        if sort_years:
+            years = tuple(sorted(years))
+        remap = np.array([years.index(y) for y in self.years], dtype=np.int8)
+        year_idx = remap[self.year_idx]
+        code = years.index(year)
+        at = int(np.searchsorted(year_idx, code, side='right'))
+
+        def insert(old, new):
+            return _frozen(np.concatenate([old[:at], new, old[at:]]))
+
+        dataset = Dataset(
+            years=years,
+            year_idx=insert(year_idx, np.array([code], dtype=np.int8)),
+            dates=insert(self.dates, row.dates),
+            tests=insert(self.tests, row.tests),
+            matches=insert(self.matches, row.matches),
+            numeric=insert(self.numeric, row.numeric),
+        )
+        return dataset, at
+
+
+def encode_letters(letters):
+    return [LETTER_CODE[letter] for letter in letters]
+
+
+def _is_sessions(content):
+    """{дата: завдання} одного року, а не {рік: {дата: завдання}}."""
+    return all(isinstance(tasks, dict) and '1-15' in tasks for tasks in content.values())
+
+
+def read_raw(path):
+    """{рік: {дата: завдання}} з файлу або з теки файлів; роки — за зростанням."""
+    path = Path(path)
+    if not path.is_dir():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    files = sorted(path.glob('*.json'))
+    if not files:
+        raise FileNotFoundError(f'У теці {path} немає JSON-файлів')
+    raw = {}
+    for file in files:
+        with open(file, 'r', encoding='utf-8') as f:
+            content = json.load(f)
+        years = {file.stem: content} if _is_sessions(content) else content
+        for year, sessions in years.items():
+            raw.setdefault(str(year), {}).update(sessions)
+    return dict(sorted(raw.items()))
+
+
+def from_dict(raw):
+    """Будує Dataset з вкладеного словника {рік: {дата: завдання}}."""
+    years = tuple(raw)
+    year_idx, dates, tests, matches, numeric = [], [], [], [], []
+    for y, year in enumerate(years):
+        for date, tasks in raw[year].items():
+            year_idx.append(y)
+            dates.append(date)
+            tests.append(encode_letters(tasks['1-15']))
+            matches.append([encode_letters(tasks[str(t)]) for t in MATCH_TASKS])
+            numeric.append([float(x) for x in tasks['19-22']])
+
+    return Dataset(
+        years=years,
+        year_idx=_frozen(np.array(year_idx, dtype=np.int8)),
+        dates=_frozen(np.array(dates, dtype=str)),
+        tests=_frozen(np.array(tests, dtype=np.int8).reshape(-1, 15)),
+        matches=_frozen(np.array(matches, dtype=np.int8).reshape(-1, 3, 3)),
+        numeric=_frozen(np.array(numeric, dtype=np.float64).reshape(-1, 4)),
+    )
+
+
+def appended_rows(previous, dataset):
+    """Номери нових варіантів, якщо `dataset` — це `previous` плюс нові сесії; інакше None."""
+    if not set(previous.years) <= set(dataset.years) or len(previous.sessions) != previous.n_variants:
+        return None
+    rows = [dataset.sessions.get(key) for key in previous.sessions]
+    if None in rows:
+        return None
+    rows = np.asarray(rows, dtype=np.intp)
+    unchanged = (
+        np.array_equal(dataset.tests[rows], previous.tests)
+        and np.array_equal(dataset.matches[rows], previous.matches)
+        and np.array_equal(dataset.numeric[rows], previous.numeric, equal_nan=True)
+    )
+    if not unchanged:
+        return None
+    fresh = np.ones(dataset.n_variants, dtype=bool)
+    fresh[rows] = False
+    return np.flatnonzero(fresh)
+
+
+def _seed_counts(dataset, previous, rows):
+    """Заповнює dataset.counts (і вже побудовані sequences) дельтою від previous замість повного перерахунку."""
+    from .aggregates import Counts
+    dataset.__dict__['counts'] = Counts.updated(previous.counts, dataset, rows)  # значення для cached_property
+    if 'sequences' in previous.__dict__:
+        from .sequences import SequenceCounts
+        dataset.__dict__['sequences'] = SequenceCounts.updated(previous.sequences, dataset, rows)
+
+
+_CACHE = {}
+_LOCK = threading.Lock()
+
+
+def _stamp(path):
+    """Відбиток файлу (mtime, розмір) або всіх JSON-файлів теки."""
+    if path.is_dir():
+        return tuple((f.name, *_stamp(f)) for f in sorted(path.glob('*.json')))
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_dataset(path=DEFAULT_DATA_PATH):
+    """Dataset з кешу процесу; файл перечитується лише якщо він змінився.
+
+    Агрегати нового набору беруться з дискового кешу (див. diskcache).
+    """
+    path = Path(path).resolve()
+    stamp = _stamp(path)
+    cached = _CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    with _LOCK:
+        cached = _CACHE.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        from .binary import load_binary, refresh_binary
+        from .diskcache import attach
+        dataset = load_binary(path, stamp)
+        if dataset is not None:
+            attach(dataset, path)
+            _CACHE[path] = (stamp, dataset)
+            return dataset
+
+        dataset = from_dict(read_raw(path))
+        # Додані сесії (ingest або інший процес): лічильники й агрегати — лише дельтою
+        rows = appended_rows(cached[1], dataset) if cached is not None else None
+        if rows is not None:
+            _seed_counts(dataset, cached[1], rows)
+            attach(dataset, path, cached[1], rows)
+        else:
+            attach(dataset, path)
+        dataset.counts
+        refresh_binary(dataset, path, stamp)
+        _CACHE[path] = (stamp, dataset)
+        return dataset
+
+
+def update_cached(path, stamp, update):
+    """Після запису файлу: якщо кеш відповідав версії `stamp`, замінює його на update(dataset).
+
+    Так процес, що сам дописав дані, не перечитує весь JSON.
+    """
+    path = Path(path).resolve()
+    with _LOCK:
+        cached = _CACHE.get(path)
+        if cached is not None and cached[0] == stamp:
+            _CACHE[path] = (_stamp(path), update(cached[1]))
@@ -0,0 +1,246 @@
+"""Дисковий кеш агрегатів, адресований вмістом даних.
+
+Лічильники `Counts` і `SequenceCounts`, а для всіх років разом і
+кожного року окремо — поверхні балів, таблиці 16-18, розподіли
+вгадувань і таблиця оптимальних політик записуються в один `.npz`.
+Ім'я запису — хеш варіантів (роки, ключі, відповіді, дати), SCHEMA_VERSION
+і вихідного коду пакета, тож будь-яка зміна даних чи розрахунків дає
+новий запис, а старі записи того ж файлу даних видаляються.
+
+Новий процес читає запис одним read і підставляє значення в
+cached_property — без перерахунку. Якщо запису немає, його будує
+лише один процес (flock на `.lock`), решта чекають і читають готовий;
+після дописаних сесій агрегати років, яких вони не торкнулися,
+переносяться з запису попередньої версії даних (див. attach);
+файл пишеться у тимчасовий і атомарно підміняється (os.replace), тож
+читач не бачить половини запису навіть без flock.
+
+Тека — `nmt_full_data.json.cache/` поруч з даними або NMT_CACHE;
+NMT_CACHE=off вимикає кеш.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from dataclasses import fields
+from pathlib import Path
+
+import numpy as np
+
+SCHEMA_VERSION = 1
+AGGREGATE_PROPERTIES = ('surface', 'match_surface', 'match_tables', 'guess_pmfs', 'policy')
+
+
+def code_version():
+    """Хеш вихідного коду пакета: будь-яка зміна розрахунків робить старі результати застарілими."""
+    digest = hashlib.sha256()
+    for path in sorted(Path(__file__).resolve().parent.glob('*.py')):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def content_hash(dataset):
+    """Хеш усіх варіантів набору (не відбитку файлу: той самий вміст — той самий запис)."""
+    digest = hashlib.sha256('\n'.join(dataset.years).encode())
+    for name in ('year_idx', 'tests', 'matches', 'numeric'):
+        digest.update(np.ascontiguousarray(getattr(dataset, name)).tobytes())
+    digest.update('\n'.join(map(str, dataset.dates)).encode())
+    return digest.hexdigest()
+
+
+def cache_dir(path):
+    """Тека кешу для файлу або теки даних; None — кеш вимкнено."""
+    setting = os.environ.get('NMT_CACHE', '')
+    if setting.lower() in ('0', 'off', 'no', 'false'):
+        return None
+    if setting:
+        return Path(setting)
+    path = Path(path).resolve()
+    return path.with_name(path.name + '.cache')
+
+
+def _source(path):
+    """Префікс записів одного файлу даних — щоб спільна NMT_CACHE не витісняла чужі записи."""
+    return hashlib.sha256(str(Path(path).resolve()).encode()).hexdigest()[:12]
+
+
+def entry_path(dataset, path):
+    directory = cache_dir(path)
+    if directory is None:
+        return None
+    key = hashlib.sha256(f'{SCHEMA_VERSION}\n{code_version()}\n{content_hash(dataset)}'.encode()).hexdigest()
+    return directory / f'{_source(path)}-{key}.npz'
+
+
+def filters(years):
+    """Набори років, для яких агрегати кешуються: ті самі, що у фільтрі дашборду."""
+    return [tuple(years), *((year,) for year in years)] if years else []
+
+
+def _encode(value):
+    return np.asarray(value, dtype=str) if isinstance(value, tuple) else np.asarray(value)
+
+
+def _decode(array):
+    if array.dtype.kind == 'U':
+        return tuple(map(tuple, array.tolist())) if array.ndim == 2 else tuple(array.tolist())
+    array.setflags(write=False)
+    return array
+
+
+def _stored_fields(cls):
+    return [f.name for f in fields(cls) if f.init and not f.name.startswith('_')]
+
+
+def _dump(value, prefix, arrays):
+    if isinstance(value, np.ndarray):
+        arrays[prefix] = value
+        return
+    for name in _stored_fields(type(value)):
+        arrays[f'{prefix}.{name}'] = _encode(getattr(value, name))
+
+
+def _load(cls, prefix, arrays):
+    if cls is None:
+        return _decode(arrays[prefix])
+    return cls(**{name: _decode(arrays[f'{prefix}.{name}']) for name in _stored_fields(cls)})
+
+
+def _classes():
+    from .aggregates import Counts
+    from .matching import MatchTables
+    from .policy import PolicyTable
+    from .scoring import ScoreSurface
+    from .sequences import SequenceCounts
+    return {
+        'counts': Counts, 'sequences': SequenceCounts,
+        'surface': ScoreSurface, 'match_surface': ScoreSurface, 'match_tables': MatchTables,
+        'guess_pmfs': None, 'policy': PolicyTable,
+    }
+
+
+def dump(dataset):
+    """{ім'я: масив} усіх кешованих агрегатів (що ще не пораховані — рахуються тут)."""
+    arrays = {}
+    _dump(dataset.counts, 'counts', arrays)
+    _dump(dataset.sequences, 'sequences', arrays)
+    for years in filters(dataset.years):
+        aggregate = dataset.counts.total(years)
+        for name in AGGREGATE_PROPERTIES:
+            _dump(getattr(aggregate, name), f'{"+".join(years)}:{name}', arrays)
+    return arrays
+
+
+def restore(dataset, arrays, only=None):
+    """Підставляє агрегати з `arrays` у cached_property (вже пораховані не чіпає).
+
+    `only` — лише агрегати цих наборів років, без лічильників.
+    """
+    classes = _classes()
+    if only is None:
+        for name in ('counts', 'sequences'):
+            if name not in dataset.__dict__:
+                dataset.__dict__[name] = _load(classes[name], name, arrays)  # значення для cached_property
+    for years in filters(dataset.years) if only is None else only:
+        aggregate = dataset.counts.total(years)
+        for name in AGGREGATE_PROPERTIES:
+            if name not in aggregate.__dict__:
+                aggregate.__dict__[name] = _load(classes[name], f'{"+".join(years)}:{name}', arrays)
+
+
+def read_entry(entry):
+    """{ім'я: масив} із запису одним читанням файлу або None, якщо запису немає чи він пошкоджений."""
+    try:
+        data = entry.read_bytes()
+        with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+            return {name: npz[name] for name in npz.files}
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+
+
+def write_entry(entry, arrays):
+    fd, tmp = tempfile.mkstemp(dir=entry.parent, prefix=f'.{entry.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.chmod(tmp, 0o644)  # mkstemp створює 0600, а читати мають усі процеси
+        os.replace(tmp, entry)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def evict(entry):
+    """Видаляє інші записи того самого файлу даних (застарілі дані чи код)."""
+    prefix = entry.name.split('-', 1)[0] + '-'
+    for other in entry.parent.glob(f'{prefix}*.npz'):
+        if other.name != entry.name:
+            try:
+                other.unlink()
+            except OSError:
+                pass
+
+
+@contextmanager
+def locked(lock_path):
+    """Ексклюзивний flock на файл `lock_path` між процесами (запис кешу, ingest)."""
+    try:
+        import fcntl
+    except ImportError:  # Windows: лишається атомарна підміна файлу
+        yield
+        return
+    with open(lock_path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _carry(dataset, previous, path, rows):
+    """Агрегати років без нових рядків `rows` — із запису `previous`, а не перерахунком.
+
+    Лічильники `dataset` вже оновлені дельтою (sequences, якщо ще не
+    побудовані, — тут, від попереднього запису); заново рахуються лише
+    набори років, що містять нові сесії.
+    """
+    arrays = read_entry(entry_path(previous, path))
+    if arrays is None:
+        return
+    if 'sequences' not in dataset.__dict__:
+        sequences = _load(_classes()['sequences'], 'sequences', arrays)
+        dataset.__dict__['sequences'] = type(sequences).updated(sequences, dataset, rows)
+    changed = {dataset.years[i] for i in dataset.year_idx[rows]}
+    restore(dataset, arrays, only=[years for years in filters(dataset.years) if not changed & set(years)])
+
+
+def attach(dataset, path, previous=None, rows=None):
+    """Агрегати `dataset` з дискового кешу; без запису — рахує їх і записує. True — якщо влучання.
+
+    Якщо `dataset` — це `previous` плюс рядки `rows` (ingest, дописаний
+    файл), новий запис будується з попереднього і дельти.
+    Помилки файлової системи (тека лише для читання тощо) не заважають
+    роботі: агрегати просто рахуються в пам'яті.
+    """
+    entry = entry_path(dataset, path)
+    if entry is None:
+        return False
+    arrays = read_entry(entry)
+    if arrays is None:
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            with locked(entry.parent / '.lock'):
+                arrays = read_entry(entry)  # інший процес міг записати, поки ми чекали
+                if arrays is None:
+                    if previous is not None:
+                        _carry(dataset, previous, path, rows)
+                    write_entry(entry, dump(dataset))
+                    evict(entry)
+                    return False
+        except OSError:
+            return False
+    restore(dataset, arrays)
+    return True
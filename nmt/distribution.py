@@ -0,0 +1,119 @@
+"""Точний розподіл тестового і НМТ балу замість одного очікуваного значення.
+
+Кількість вгаданих завдань 1-15 — сума незалежних Бернуллі з різними
+ймовірностями (Poisson-binomial), тож розподіл рахується динамікою
+O(n²) без жодної симуляції.
+"""
+from dataclasses import dataclass
+from math import comb
+
+import numpy as np
+
+from .dataset import LETTERS
+from .scoring import MAX_1_15, MAX_16_18, MAX_TEST_SCORE, SCORE_LUT
+
+
+def poisson_binomial(probs):
+    """pmf[s] = P(рівно s успіхів) для незалежних подій з ймовірностями probs."""
+    pmf = np.zeros(len(probs) + 1)
+    pmf[0] = 1.0
+    for n, p in enumerate(probs, 1):
+        pmf[1:n + 1] = pmf[1:n + 1] * (1 - p) + pmf[:n] * p
+        pmf[0] *= 1 - p
+    return pmf
+
+
+def random_subset_pmfs(probs):
+    """table[k, s] = P(s успіхів), якщо невідомі k питань — випадкова підмножина.
+
+    Та сама динаміка, що й у poisson_binomial, з додатковим виміром
+    «скільки питань уже обрано»; усі k = 0..n рахуються за один прохід.
+    """
+    n = len(probs)
+    table = np.zeros((n + 1, n + 1))
+    table[0, 0] = 1.0
+    for p in probs:
+        shifted = np.zeros_like(table)
+        shifted[1:, 1:] += table[:-1, :-1] * p
+        shifted[1:, :] += table[:-1, :] * (1 - p)
+        table = table + shifted
+    return table / np.array([comb(n, k) for k in range(n + 1)])[:, None]
+
+
+def strategy_question_probs(aggregate):
+    """(S, 15) — ймовірність вгадати кожне питання 1-15 для кожної зі STRATEGIES."""
+    n = max(aggregate.n_variants, 1)
+    optimal = aggregate.optimal_rates
+    fixed = (aggregate.tests / n).T
+    uniform = np.full(aggregate.tests.shape[0], 1 / len(LETTERS))
+    return np.vstack([optimal, fixed, uniform])
+
+
+@dataclass(frozen=True)
+class ScoreDistribution:
+    pmf: np.ndarray  # (33,) P(тестовий бал = t)
+    lut: np.ndarray  # таблиця переводу, див. scoring.score_lut
+
+    @property
+    def mean_test(self):
+        return float(self.pmf @ np.arange(len(self.pmf)))
+
+    @property
+    def mean_nmt(self):
+        return float(self.pmf @ self.lut)
+
+    def test_quantile(self, q):
+        cdf = np.cumsum(self.pmf)
+        return int(np.searchsorted(cdf, q - 1e-12))
+
+    def nmt_quantile(self, q):
+        # шкала монотонна, тож квантиль НМТ — це lut від квантиля тестового балу
+        return int(self.lut[self.test_quantile(q)])
+
+    @property
+    def median_nmt(self):
+        return self.nmt_quantile(0.5)
+
+    def percentiles(self, qs=(10, 25, 50, 75, 90)):
+        return {q: self.nmt_quantile(q / 100) for q in qs}
+
+    def prob_at_least(self, nmt_threshold):
+        return float(self.pmf[self.lut >= nmt_threshold].sum())
+
+    def nmt_pmf(self):
+        """{бал НМТ: ймовірність} без нульових значень."""
+        result = {}
+        for test_score in np.flatnonzero(self.pmf > 0):
+            nmt = int(self.lut[test_score])
+            result[nmt] = result.get(nmt, 0.0) + float(self.pmf[test_score])
+        return result
+
+
+def score_distribution(guess_pmf, known_points, lut=SCORE_LUT):
+    """Розподіл для відомих балів + випадкової кількості вгаданих."""
+    pmf = np.zeros(MAX_TEST_SCORE + 1)
+    pmf[known_points:known_points + len(guess_pmf)] = guess_pmf
+    return ScoreDistribution(pmf, lut)
+
+
+def calculator_distribution(aggregate, strategy_idx, known_1_15, known_16_18, known_19_22, probs=None,
+                            guess_matches=False, guess_pmfs=None):
+    """Розподіл балу калькулятора.
+
+    Без probs невідомі завдання — випадкова підмножина з 15 і береться
+    готова таблиця aggregate.guess_pmfs; з probs — задані користувачем
+    ймовірності для кожного невідомого завдання. З guess_matches невідомі
+    пари 16-18 вгадуються (aggregate.match_tables.guess_pmfs). guess_pmfs —
+    власна таблиця (16, 16) [невідомих, вгадано] замість
+    aggregate.guess_pmfs[strategy_idx], напр. умовної стратегії (sequences).
+    """
+    if probs is None:
+        unknown = MAX_1_15 - known_1_15
+        table = aggregate.guess_pmfs[strategy_idx] if guess_pmfs is None else np.asarray(guess_pmfs)
+        guess_pmf = table[unknown, :unknown + 1]
+    else:
+        guess_pmf = poisson_binomial(probs)
+    if guess_matches:
+        guess_pmf = np.convolve(guess_pmf, aggregate.match_tables.guess_pmfs[known_16_18, :MAX_16_18 - known_16_18 + 1])
+    known = known_1_15 + known_16_18 + known_19_22
+    return score_distribution(guess_pmf, known, aggregate.lut)
@@ -0,0 +1,232 @@
+"""Специфікації графіків Plotly як звичайні словники, з кешем.
+
+Графік залежить лише від (розділ, роки, параметри), тож готовий словник
+`{'data': [...], 'layout': {...}}` кешується на `Counts` (shared.SharedCache)
+і спільний для всіх сесій, тож змінювати його не можна. Plotly тут не
+імпортується: `st.plotly_chart` приймає словник і сам копіює його.
+
+    spec = figure(dataset.counts, 'calculator/strategies', years, 10, 6, 4, 150)
+"""
+import numpy as np
+
+from . import analytics
+from .dataset import LETTERS
+from .distribution import calculator_distribution
+from .profiling import phase
+from .scoring import STRATEGIES
+
+LETTER_COLORS = {'А': '#FF6B6B', 'Б': '#4ECDC4', 'В': '#45B7D1', 'Г': '#FFA07A', 'Д': '#98D8C8'}
+FALLBACK_COLOR = '#95a5a6'
+GROUP_COLORS = ('#ff6b6b', '#4ecdc4', '#45b7d1', '#ffa07a', '#9b59b6', '#98d8c8')
+
+
+def strategy_color(strategy):
+    """'Завжди Б' → колір літери Б; 'Оптимальна' — фіолетовий."""
+    if strategy == 'Оптимальна':
+        return '#9b59b6'
+    return LETTER_COLORS.get(strategy.split()[-1], FALLBACK_COLOR)
+
+
+def sorted_comparison(rows):
+    """Рядки strategy_comparison від найкращого балу НМТ (стабільно)."""
+    return sorted(rows, key=lambda row: -row['nmt_score'])
+
+
+def _calculator_distribution(counts, years, strategy_idx, known_1_15, known_16_18, known_19_22,
+                             threshold, probs=None, guess_matches=False, guess_pmfs=None):
+    """guess_pmfs — кортеж рядків таблиці умовної стратегії (див. distribution.calculator_distribution)."""
+    dist = calculator_distribution(counts.total(years), strategy_idx, known_1_15, known_16_18, known_19_22, probs,
+                                   guess_matches, guess_pmfs)
+    name = STRATEGIES[strategy_idx] if guess_pmfs is None else 'Умовна'
+
+    pmf = dist.nmt_pmf()
+    scores = np.fromiter(pmf, dtype=int, count=len(pmf))
+    pct = np.fromiter(pmf.values(), dtype=float, count=len(pmf)) * 100
+    return {
+        'data': [{
+            'type': 'bar',
+            'x': scores.astype(str).tolist(),
+            'y': pct.tolist(),
+            'marker': {'color': np.where(scores >= threshold, '#28a745', FALLBACK_COLOR).tolist()},
+            'text': [f'{p:.1f}%' for p in pct],
+            'textposition': 'outside',
+        }],
+        'layout': {
+            'title': {'text': f'Ймовірність кожного балу НМТ ({name})'},
+            'height': 400,
+            'xaxis': {'title': {'text': 'Бал НМТ'}, 'type': 'category'},
+            'yaxis': {'title': {'text': 'Ймовірність, %'}},
+        },
+    }
+
+
+def _error_bars(values, intervals):
+    """error_y Plotly з інтервалів (нижня, верхня межа) навколо values."""
+    return {
+        'type': 'data',
+        'symmetric': False,
+        'array': [max(high - value, 0) for value, (_, high) in zip(values, intervals)],
+        'arrayminus': [max(value - low, 0) for value, (low, _) in zip(values, intervals)],
+        'color': '#555',
+    }
+
+
+def _calculator_strategies(counts, years, known_1_15, known_16_18, known_19_22, threshold, guess_matches=False,
+                           intervals=None):
+    """intervals — кортеж (стратегія, нижній, верхній бал НМТ), див. analytics.strategy_score_intervals."""
+    rows = sorted_comparison(analytics.strategy_comparison(
+        counts.total(years), known_1_15, known_16_18, known_19_22, threshold, guess_matches))
+    bars = {
+        'type': 'bar',
+        'x': [row['strategy'] for row in rows],
+        'y': [row['nmt_score'] for row in rows],
+        'marker': {'color': [strategy_color(row['strategy']) for row in rows]},
+        'text': [str(row['nmt_score']) for row in rows],
+        'textposition': 'outside',
+        'showlegend': False,
+    }
+    if intervals:
+        bounds = {strategy: (low, high) for strategy, low, high in intervals}
+        bars['error_y'] = _error_bars(bars['y'], [bounds[row['strategy']] for row in rows])
+        bars['textposition'] = 'inside'
+    return {
+        'data': [bars],
+        'layout': {
+            'title': {'text': f'Ваш бал НМТ при різних стратегіях вгадування (знаєте {known_1_15}/15)'},
+            'height': 500,
+            'yaxis': {'range': [0, 210], 'title': {'text': 'Бал НМТ'}},
+            'xaxis': {'title': {'text': 'Стратегія'}},
+        },
+    }
+
+
+def _calculator_curves(counts, years, known_16_18, known_19_22, guess_matches=False):
+    aggregate = counts.total(years)
+    curves = (aggregate.match_surface if guess_matches else aggregate.surface).curves(known_16_18, known_19_22)
+    x = list(range(curves.shape[1]))
+    return {
+        'data': [
+            {'type': 'scatter', 'x': x, 'y': curve.tolist(), 'mode': 'lines+markers', 'name': strategy,
+             'line': {'color': strategy_color(strategy)}}
+            for strategy, curve in zip(STRATEGIES, curves)
+        ],
+        'layout': {
+            'title': {'text': f'16-18: {known_16_18}/9{" + вгадування" if guess_matches else ""}, 19-22: {known_19_22}/8'},
+            'height': 450,
+            'xaxis': {'title': {'text': 'Скільки знаю напевно (1-15)'}, 'dtick': 1},
+            'yaxis': {'title': {'text': 'Бал НМТ'}},
+        },
+    }
+
+
+def _stats_heatmap(counts, years):
+    z = counts.total(years).tests.T
+    return {
+        'data': [{
+            'type': 'heatmap',
+            'z': z.tolist(),
+            'x': [str(i) for i in range(1, z.shape[1] + 1)],
+            'y': list(LETTERS),
+            'colorscale': 'RdYlGn',
+            'text': z.astype(str).tolist(),
+            'texttemplate': '%{text}',
+            'textfont': {'size': 12},
+            'colorbar': {'title': {'text': 'Кількість<br>разів'}},
+        }],
+        'layout': {
+            'title': {'text': 'Скільки разів кожна відповідь була правильною для кожного питання'},
+            'xaxis': {'title': {'text': 'Номер питання'}, 'side': 'bottom'},
+            'yaxis': {'title': {'text': 'Відповідь'}},
+            'height': 400,
+        },
+    }
+
+
+def _stats_letters(counts, years):
+    ranking = analytics.ranked(counts.total(years).letters, LETTERS)
+    return {
+        'data': [{
+            'type': 'pie',
+            'labels': [letter for letter, _ in ranking],
+            'values': [count for _, count in ranking],
+            'hole': 0.4,
+            'marker': {'colors': [LETTER_COLORS[letter] for letter, _ in ranking]},
+        }],
+        'layout': {'title': {'text': 'Загальний розподіл відповідей А-Д'}, 'height': 500},
+    }
+
+
+def _stats_transitions(counts, position, matrix):
+    """matrix — кортеж рядків лічильників переходів з analytics.sequence_stats."""
+    z = np.asarray(matrix, dtype=float)
+    rows = z.sum(axis=1, keepdims=True)
+    probs = np.divide(z, rows, out=np.zeros(z.shape), where=rows > 0) * 100
+    return {
+        'data': [{
+            'type': 'heatmap',
+            'z': probs.tolist(),
+            'x': list(LETTERS),
+            'y': list(LETTERS),
+            'colorscale': 'Blues',
+            'text': [[f'{p:.0f}%<br>({int(c)})' for p, c in zip(prow, crow)] for prow, crow in zip(probs, z)],
+            'texttemplate': '%{text}',
+            'colorbar': {'title': {'text': 'P(наступна | поточна), %'}},
+        }],
+        'layout': {
+            'title': {'text': f'Переходи між сусідніми питаннями ({position})'},
+            'xaxis': {'title': {'text': 'Відповідь наступного питання'}},
+            'yaxis': {'title': {'text': 'Відповідь поточного питання'}, 'autorange': 'reversed'},
+            'height': 450,
+        },
+    }
+
+
+def _stats_numeric_magnitudes(counts, task, magnitudes):
+    """magnitudes — кортеж (мітка, кількість) з analytics.numeric_distribution."""
+    return {
+        'data': [{
+            'type': 'bar',
+            'x': [label for label, _ in magnitudes],
+            'y': [count for _, count in magnitudes],
+            'marker': {'color': '#45B7D1'},
+        }],
+        'layout': {
+            'title': {'text': f'Завдання {task}: порядок величини відповідей'},
+            'height': 350,
+            'xaxis': {'title': {'text': '|відповідь| ≈'}, 'type': 'category'},
+            'yaxis': {'title': {'text': 'Кількість'}},
+        },
+    }
+
+
+def _compare_letters(counts, groups, names, intervals=None):
+    """intervals — для кожної групи кортеж (нижня, верхня межа кількості) по літерах."""
+    bars = [
+        {'type': 'bar', 'name': name, 'x': list(LETTERS), 'y': counts.total(group).letters.tolist(),
+         'marker': {'color': GROUP_COLORS[i % len(GROUP_COLORS)]}}
+        for i, (group, name) in enumerate(zip(groups, names))
+    ]
+    for bar, bounds in zip(bars, intervals or ()):
+        bar['error_y'] = _error_bars(bar['y'], bounds)
+    return {
+        'data': bars,
+        'layout': {'title': {'text': 'Порівняння розподілів відповідей'}, 'barmode': 'group', 'height': 500},
+    }
+
+
+BUILDERS = {
+    'calculator/distribution': _calculator_distribution,
+    'calculator/strategies': _calculator_strategies,
+    'calculator/curves': _calculator_curves,
+    'stats/heatmap': _stats_heatmap,
+    'stats/letters': _stats_letters,
+    'stats/transitions': _stats_transitions,
+    'stats/numeric_magnitudes': _stats_numeric_magnitudes,
+    'compare/letters': _compare_letters,
+}
+
+
+def figure(counts, name, *params):
+    """Специфікація графіка `name`; параметри мають бути хешованими (роки — кортеж)."""
+    with phase('figure'):
+        return counts.figures.get((name, params), lambda: BUILDERS[name](counts, *params))
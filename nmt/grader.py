@@ -0,0 +1,251 @@
+"""Потокова перевірка бланків учнів за ключами з бази.
+
+Файл (CSV або JSONL) читається шматками фіксованого розміру, кожен
+шматок кодується в цілі коди й оцінюється векторно, а результати
+дописуються у вихідний файл одразу — пам'ять обмежена розміром шматка.
+
+CSV: колонки id, year, date, 1..22; у 16-18 — три літери ("АБВ" або "А-Б-В").
+JSONL: {"id", "year", "date", "1-15": [...], "16": [...], "17", "18", "19-22": [...]}
+— тобто та сама структура, що й у nmt_full_data.json.
+
+Латинські A і B, які на бланку не відрізнити від кириличних А і В,
+читаються як кириличні. Клітинку, яку не можна прочитати однозначно
+(кілька літер у 1-15, більше трьох у 16-18, інші символи, не число в
+19-22), ніхто не вгадує: вона отримує 0 балів і потрапляє в колонку
+`invalid` результату. Порожня клітинка, «-» чи «?» — пропуск.
+"""
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .dataset import LETTER_CODE, MATCH_TASKS, OPEN_TASKS
+from .scoring import MAX_TEST_SCORE, score_lut_for
+
+TEST_COLUMNS = [str(q) for q in range(1, 16)]
+MATCH_COLUMNS = [str(t) for t in MATCH_TASKS]
+OPEN_COLUMNS = [str(t) for t in OPEN_TASKS]
+N_PAIRS = 3
+RESULT_COLUMNS = ['id', 'year', 'date', 'points_1_15', 'points_16_18', 'points_19_22', 'test_score', 'nmt_score',
+                  'invalid']
+LOOKALIKES = {'A': 'А', 'B': 'В'}  # латинські літери, що на бланку виглядають як кириличні
+BLANKS = ('', '?')
+
+
+def session_label(year, date):
+    return f'{year}/{date}'
+
+
+@dataclass(frozen=True)
+class AnswerKeys:
+    """Ключі всіх сесій у вигляді, зручному для передачі в інші процеси."""
+    sessions: tuple        # мітки 'рік/дата' у порядку варіантів
+    tests: np.ndarray      # (V, 15)
+    matches: np.ndarray    # (V, 3, 3)
+    numeric: np.ndarray    # (V, 4)
+    luts: np.ndarray       # (V, 33) таблиця переводу для року кожного варіанта
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        years = dataset.year_labels()
+        luts = {y: score_lut_for((y,)) for y in dataset.years}
+        return cls(
+            sessions=tuple(session_label(y, d) for y, d in zip(years, dataset.dates)),
+            tests=dataset.tests,
+            matches=dataset.matches,
+            numeric=dataset.numeric,
+            luts=np.stack([luts[y] for y in years]),
+        )
+
+
+def _by_unique(pd, column, parse, width, fill):
+    """Розбирає лише унікальні значення колонки і розкладає результат назад.
+
+    У бланках різних значень одиниці (А-Д, кілька десятків трійок, чисел),
+    тож рядкові операції виконуються не для кожного учня, а для кожного
+    унікального значення.
+    """
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    table = np.full((len(uniques) + 1, width), fill)
+    for i, value in enumerate(uniques):
+        table[i] = parse(value)
+    return table[codes]  # код -1 (порожньо) → останній рядок із fill
+
+
+def _parse_letters(value, width=N_PAIRS):
+    """[код кожної з width клітинок (-1 — пропуск), ознака невалідної клітинки]."""
+    text = str(value).strip().upper()
+    if not text.strip('-? '):
+        return [-1] * width + [0]
+    if '-' in text:  # "А-Б-В", "А--В"
+        tokens = [token.strip() for token in text.split('-')]
+    else:
+        tokens = [char for char in text if not char.isspace() and char not in ',;/']
+    codes = [-1 if token in BLANKS else LETTER_CODE.get(LOOKALIKES.get(token, token)) for token in tokens]
+    if len(codes) > width or None in codes:
+        return [-1] * width + [1]
+    return codes + [-1] * (width - len(codes)) + [0]
+
+
+def _parse_number(value):
+    text = str(value).strip()
+    if text in BLANKS or text == '-':
+        return [np.nan, 0]
+    try:
+        return [float(text.replace(',', '.')), 0]
+    except ValueError:
+        return [np.nan, 1]
+
+
+def _invalid_labels(invalid, columns):
+    """Для кожного рядка — колонки з невалідними клітинками через ';' (зазвичай таких рядків немає)."""
+    labels = np.full(len(invalid), '', dtype=object)
+    columns = np.asarray(columns)
+    for row in np.flatnonzero(invalid.any(axis=1)):
+        labels[row] = ';'.join(columns[invalid[row]])
+    return labels
+
+
+def grade_frame(frame, keys, tolerance=1e-6):
+    """Оцінює DataFrame бланків; повертає DataFrame з RESULT_COLUMNS.
+
+    Бланки з невідомою сесією отримують порожні бали.
+    """
+    import pandas as pd
+
+    n = len(frame)
+    sessions = frame['year'].astype(str) + '/' + frame['date'].astype(str)
+    variant = pd.Categorical(sessions, categories=keys.sessions).codes.astype(np.intp)
+    known = variant >= 0
+    v = np.where(known, variant, 0)
+
+    # останній стовпець кожної клітинки — ознака, що її не прочитати
+    if n:
+        tests = np.stack([_by_unique(pd, frame[c], lambda x: _parse_letters(x, 1), 2, [-1, 0])
+                          for c in TEST_COLUMNS], axis=1)
+        pairs = np.stack([_by_unique(pd, frame[c], _parse_letters, N_PAIRS + 1, [-1] * N_PAIRS + [0])
+                          for c in MATCH_COLUMNS], axis=1)
+        numbers = np.stack([_by_unique(pd, frame[c], _parse_number, 2, [np.nan, 0])
+                            for c in OPEN_COLUMNS], axis=1)
+    else:
+        tests = np.zeros((0, 15, 2), np.int8)
+        pairs = np.zeros((0, 3, N_PAIRS + 1), np.int8)
+        numbers = np.zeros((0, 4, 2))
+    points_1_15 = ((tests[..., 0] == keys.tests[v]) & (tests[..., 0] >= 0)).sum(axis=1)
+    points_16_18 = ((pairs[..., :N_PAIRS] == keys.matches[v]) & (pairs[..., :N_PAIRS] >= 0)).sum(axis=(1, 2))
+    points_19_22 = 2 * (np.abs(numbers[..., 0] - keys.numeric[v]) <= tolerance).sum(axis=1)
+    invalid = np.concatenate([tests[..., -1], pairs[..., -1], numbers[..., -1]], axis=1).astype(bool)
+
+    test_score = points_1_15 + points_16_18 + points_19_22
+    nmt_score = keys.luts[v, np.minimum(test_score, MAX_TEST_SCORE)]
+
+    result = pd.DataFrame({
+        'id': frame['id'].to_numpy() if 'id' in frame else np.arange(n),
+        'year': frame['year'].to_numpy(),
+        'date': frame['date'].to_numpy(),
+        'points_1_15': points_1_15,
+        'points_16_18': points_16_18,
+        'points_19_22': points_19_22,
+        'test_score': test_score,
+        'nmt_score': nmt_score,
+        'invalid': _invalid_labels(invalid, TEST_COLUMNS + MATCH_COLUMNS + OPEN_COLUMNS),
+    })
+    score_columns = RESULT_COLUMNS[3:-1]
+    result[score_columns] = result[score_columns].astype('Int64')
+    result.loc[~known, score_columns] = pd.NA
+    return result
+
+
+def _flatten_record(record):
+    """Запис JSONL у плоскі колонки CSV-формату."""
+    row = {'id': record.get('id'), 'year': record.get('year'), 'date': record.get('date')}
+    tests = record.get('1-15') or [None] * 15
+    row.update(zip(TEST_COLUMNS, list(tests)))
+    for column in MATCH_COLUMNS:
+        value = record.get(column)
+        row[column] = ''.join(value) if isinstance(value, list) else value
+    numeric = record.get('19-22') or [None] * 4
+    row.update(zip(OPEN_COLUMNS, numeric))
+    return row
+
+
+def read_chunks(path, chunk_size=100_000):
+    """Ітератор DataFrame-шматків з CSV або JSONL (за розширенням)."""
+    import pandas as pd
+
+    path = Path(path)
+    if path.suffix.lower() in ('.jsonl', '.ndjson'):
+        with open(path, 'r', encoding='utf-8') as f:
+            batch = []
+            for line in f:
+                if line.strip():
+                    batch.append(_flatten_record(json.loads(line)))
+                if len(batch) == chunk_size:
+                    yield pd.DataFrame(batch)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch)
+    else:
+        yield from pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size)
+
+
+def _write_chunk(result, path, first):
+    if path.suffix.lower() in ('.jsonl', '.ndjson'):
+        with open(path, 'w' if first else 'a', encoding='utf-8') as f:
+            result.to_json(f, orient='records', lines=True, force_ascii=False)
+    else:
+        result.to_csv(path, mode='w' if first else 'a', header=first, index=False)
+
+
+def _grade_chunk(args):
+    frame, keys, tolerance = args
+    return grade_frame(frame, keys, tolerance)
+
+
+def _bounded_map(pool, fn, items, max_pending):
+    """Як pool.map, але не більше max_pending шматків у роботі — пам'ять обмежена."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def grade_file(src, dst, dataset, chunk_size=100_000, workers=1, tolerance=1e-6):
+    """Перевіряє всі бланки з src і пише результати в dst; повертає підсумок."""
+    keys = AnswerKeys.from_dataset(dataset)
+    dst = Path(dst)
+    started = time.perf_counter()
+    jobs = ((frame, keys, tolerance) for frame in read_chunks(src, chunk_size))
+
+    summary = {'rows': 0, 'graded': 0, 'unknown_session': 0, 'invalid_rows': 0}
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = _bounded_map(pool, _grade_chunk, jobs, max_pending=2 * workers)
+    else:
+        pool = None
+        results = map(_grade_chunk, jobs)
+    try:
+        for i, result in enumerate(results):
+            _write_chunk(result, dst, first=i == 0)
+            graded = int(result['test_score'].notna().sum())
+            summary['rows'] += len(result)
+            summary['graded'] += graded
+            summary['unknown_session'] += len(result) - graded
+            summary['invalid_rows'] += int((result['invalid'] != '').sum())
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if summary['rows'] == 0:
+        import pandas as pd
+        _write_chunk(pd.DataFrame(columns=RESULT_COLUMNS), dst, first=True)
+
+    summary['seconds'] = time.perf_counter() - started
+    summary['rows_per_minute'] = summary['rows'] / summary['seconds'] * 60 if summary['seconds'] else 0.0
+    return summary
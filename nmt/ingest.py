@@ -0,0 +1,150 @@
+"""Додавання нової сесії НМТ до бази без повного перерахунку.
+
+    python -m nmt ingest 2026 23.05 session.json
+
+Сесія перевіряється за схемою, дописується у файл даних (атомарно, під
+flock, у форматі самого файлу), а закешований у процесі Dataset
+оновлюється лише її внеском: лічильники `Counts` отримують one-hot
+дельту, а в дисковий кеш ідуть агрегати з попереднього запису, крім
+набору з роком нової сесії. Інші процеси побачать зміну за mtime файлу
+і теж застосують лише дельту (див. dataset.load_dataset). Бінарна
+копія, якщо є, лише застаріває: її перезапише наступне читання JSON.
+"""
+import json
+import math
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from .dataset import (
+    DEFAULT_DATA_PATH, LETTERS, MATCH_TASKS, _is_sessions, _seed_counts, _stamp, load_dataset, update_cached,
+)
+from .diskcache import attach, locked
+
+TASK_KEYS = ('1-15', *(str(t) for t in MATCH_TASKS), '19-22')
+DEFAULT_STYLE = {'indent': 2, 'separators': (',', ': '), 'ensure_ascii': False, 'newline': True}  # новий файл
+
+
+def _letters(tasks, key, n):
+    value = tasks.get(key)
+    if not isinstance(value, list) or len(value) != n:
+        raise ValueError(f"'{key}': очікується список з {n} літер")
+    bad = [x for x in value if x not in LETTERS]
+    if bad:
+        raise ValueError(f"'{key}': невідомі літери {bad} (дозволені {''.join(LETTERS)})")
+    return list(value)
+
+
+def validate_session(tasks):
+    """Нормалізована копія завдань однієї сесії або ValueError з описом помилки."""
+    if not isinstance(tasks, dict):
+        raise ValueError('сесія має бути об\'єктом {завдання: відповіді}')
+    unknown = set(tasks) - set(TASK_KEYS)
+    missing = [key for key in TASK_KEYS if key not in tasks]
+    if unknown or missing:
+        raise ValueError(f'ключі сесії: бракує {missing}, зайві {sorted(unknown)}')
+
+    session = {'1-15': _letters(tasks, '1-15', 15)}
+    for task in MATCH_TASKS:
+        session[str(task)] = _letters(tasks, str(task), 3)
+
+    numbers = tasks['19-22']
+    if not isinstance(numbers, list) or len(numbers) != 4:
+        raise ValueError("'19-22': очікується список з 4 чисел")
+    for x in numbers:
+        if isinstance(x, bool) or not isinstance(x, (int, float)) or not math.isfinite(x):
+            raise ValueError(f"'19-22': {x!r} не є скінченним числом")
+    session['19-22'] = numbers
+    return session
+
+
+def json_style(text):
+    """Параметри json.dumps, з якими записано `text`: відступ, роздільники, ensure_ascii, \\n в кінці.
+
+    Ingest переписує файл цілком, тож без цього перший же запис
+    переформатував би весь файл користувача.
+    """
+    match = re.search(r'\n([ \t]+)\S', text)
+    indent = match.group(1) if match else None
+    colon = ': ' if re.search(r'":\s', text) else ':'
+    comma = ',' if indent is not None or not re.search(r'[\]}"\d], ', text) else ', '
+    return {
+        'indent': indent,
+        'separators': (comma, colon),
+        'ensure_ascii': '\\u' in text and text.isascii(),
+        'newline': text.endswith('\n'),
+    }
+
+
+def _dumps(content, style):
+    style = dict(style)
+    newline = style.pop('newline')
+    return json.dumps(content, **style) + ('\n' if newline else '')
+
+
+def _write_text(path, text):
+    """Атомарний запис: тимчасовий файл у тій самій теці і os.replace."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.chmod(tmp, path.stat().st_mode & 0o777 if path.exists() else 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def lock_path(path):
+    """Файл flock, під яким ingest читає, перевіряє і підміняє дані `path` (файл або теку)."""
+    path = Path(path)
+    return path / '.ingest.lock' if path.is_dir() else path.with_name(f'.{path.name}.lock')
+
+
+def add_session(year, date, tasks, path=DEFAULT_DATA_PATH):
+    """Додає сесію до файлу або теки даних; повертає шлях зміненого файлу.
+
+    У теці сесія йде у `<рік>.json` (формат {дата: завдання}).
+    Наявну сесію не перезаписує — виправлення робіть у файлі вручну.
+    Паралельні ingest одних даних виконуються по черзі (flock), тож
+    жодна сесія не губиться; формат файлу зберігається (json_style).
+    """
+    year, date = str(year), str(date)
+    session = validate_session(tasks)
+    path = Path(path)
+    in_dir = path.is_dir()
+    target = path / f'{year}.json' if in_dir else path
+
+    with locked(lock_path(path)):
+        stamp = _stamp(path)
+        if (year, date) in load_dataset(path).sessions:
+            raise ValueError(f'сесія {year}/{date} вже є в даних')
+
+        if target.exists():
+            with open(target, 'r', encoding='utf-8') as f:
+                text = f.read()
+            content, style = json.loads(text), json_style(text)
+        else:
+            content, style = {}, DEFAULT_STYLE
+        new_year = False
+        if in_dir and _is_sessions(content):
+            sessions = content
+        else:
+            new_year = year not in content
+            sessions = content.setdefault(year, {})
+            if new_year:  # роки у файлі — за зростанням, як у теці
+                content = dict(sorted(content.items()))
+        if date in sessions:
+            raise ValueError(f'сесія {year}/{date} вже є у {target}')
+        sessions[date] = session
+        _write_text(target, _dumps(content, style))
+
+        def apply(dataset):
+            updated, row = dataset.with_session(year, date, session, sort_years=in_dir or new_year)
+            _seed_counts(updated, dataset, [row])
+            attach(updated, path, dataset, [row])
+            return updated
+
+        update_cached(path, stamp, apply)
+    return target
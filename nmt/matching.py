@@ -0,0 +1,181 @@
+"""Спільний розподіл трійок 16-18 і таблиці найкращого вгадування.
+
+Три пари завдання кодуються одним цілим 0..124 (aggregates.combo_codes),
+тож розподіл ключів — це вже лічильник `Aggregate.combos`. З нього один
+раз на набір років рахуються таблиці:
+
+- очікувані бали кожної з 125 трійок-кандидатів;
+- найкраще доповнення для кожного стану знань: кожна пара або відома
+  (літера), або ні — 6³ = 216 станів;
+- розподіл вгаданих балів для «знаю k пар з 9», щоб калькулятор міг
+  додати вгадування 16-18 без жодних обчислень під час рендеру.
+
+Доповнення обирається за всіма варіантами, але його бали (best_points,
+guess_pmfs) оцінюються leave-one-out, як у backtest: для кожного ключа
+вибір робиться за лічильником без цього ключа. На кількох десятках
+варіантів оцінка на тих самих даних завищена майже вдвічі — вгадана
+трійка просто запам'ятовує ключі.
+
+Якщо в жодному ключі завдання літери не повторюються, вважається, що
+діє обмеження «без повторів», і вгадування теж обирає лише трійки з
+різними літерами.
+"""
+from dataclasses import dataclass
+from math import comb
+
+import numpy as np
+
+from .aggregates import N_COMBOS, N_LETTERS, combo_label
+from .dataset import LETTERS, MATCH_TASKS
+
+N_PAIRS = 3
+UNKNOWN = N_LETTERS                    # «пара невідома» в коді стану
+N_STATES = (N_LETTERS + 1) ** N_PAIRS  # 216
+MAX_PAIRS = N_PAIRS * len(MATCH_TASKS)  # 9
+
+TRIPLES = np.stack([np.arange(N_COMBOS) // 25, np.arange(N_COMBOS) // 5 % 5, np.arange(N_COMBOS) % 5], axis=1)
+DISTINCT = (TRIPLES[:, 0] != TRIPLES[:, 1]) & (TRIPLES[:, 0] != TRIPLES[:, 2]) & (TRIPLES[:, 1] != TRIPLES[:, 2])
+# AGREE[g, k, p] — трійка g збігається з ключем k у парі p
+AGREE = TRIPLES[:, None, :] == TRIPLES[None, :, :]
+
+STATES = np.stack([np.arange(N_STATES) // 36, np.arange(N_STATES) // 6 % 6, np.arange(N_STATES) % 6], axis=1)
+STATE_KNOWN = STATES != UNKNOWN                                   # (216, 3)
+STATE_MASK = STATE_KNOWN @ (1 << np.arange(N_PAIRS)[::-1])        # номер маски відомих пар 0..7
+CONSISTENT = ((STATES[:, None, :] == TRIPLES[None, :, :]) | ~STATE_KNOWN[:, None, :]).all(axis=-1)  # (216, 125)
+# UNKNOWN_AGREE[m, g, k] — збіги g з k лише в невідомих парах маски m
+MASKS = np.array([[(m >> (N_PAIRS - 1 - p)) & 1 for p in range(N_PAIRS)] for m in range(1 << N_PAIRS)], dtype=bool)
+UNKNOWN_AGREE = (AGREE[None] & ~MASKS[:, None, None, :]).sum(axis=-1)
+
+for _array in (TRIPLES, DISTINCT, AGREE, STATES, STATE_KNOWN, STATE_MASK, CONSISTENT, MASKS, UNKNOWN_AGREE):
+    _array.setflags(write=False)
+
+
+def state_code(known):
+    """(літера або None для кожної пари) → код стану 0..215."""
+    code = 0
+    for letter in known:
+        code = code * (N_LETTERS + 1) + (UNKNOWN if letter is None else LETTERS.index(letter))
+    return code
+
+
+def _state_probs(weights, states):
+    """(B, S, 125) — P(ключ | відомі пари стану) для кожного рядка ваг (B, 125).
+
+    Якщо узгоджених зі станом ключів немає — за всіма ключами рядка, а
+    без жодного ключа — рівноймовірно.
+    """
+    weights = np.asarray(weights, dtype=np.float64)[:, None, :]
+    p = weights * CONSISTENT[states]
+    empty = ~p.any(axis=-1, keepdims=True)
+    p = np.where(empty, weights, p)
+    p = np.where(p.any(axis=-1, keepdims=True), p, 1.0)
+    return p / p.sum(axis=-1, keepdims=True)
+
+
+def _choose(weights, states, m, distinct, objective):
+    """(B, S) — найкращий кандидат для станів маски m за кожним рядком ваг (B, 125)."""
+    probs = _state_probs(weights, states)
+    points = probs @ UNKNOWN_AGREE[m].T  # (B, стани, кандидати)
+    if objective == 'exact':  # нічиї — за очікуваними балами
+        score = probs @ (UNKNOWN_AGREE[m] == (~MASKS[m]).sum()).T + points * 1e-9
+    else:
+        score = points
+    valid = CONSISTENT[states] & (DISTINCT if distinct else True)
+    # відомі літери вже повторюються — обмеження не виконати, лишаємо узгодженість
+    valid[~valid.any(axis=1)] = CONSISTENT[states][~valid.any(axis=1)]
+    return np.where(valid, score, -np.inf).argmax(axis=-1)
+
+
+@dataclass(frozen=True)
+class MatchTables:
+    distinct: np.ndarray     # (3,) bool — обмеження «без повторів» для завдання
+    expected: np.ndarray     # (3, 125) — очікувані бали (з 3) кожної трійки без знань
+    best: np.ndarray         # (3, 216) — найкраща трійка для кожного стану знань
+    best_points: np.ndarray  # (3, 216) — її очікувані бали разом із відомими парами
+    guess_pmfs: np.ndarray   # (10, 10) — [відомо пар з 9, вгадано пар]
+
+    @classmethod
+    def from_combos(cls, combos, distinct=None, objective='expected'):
+        """Таблиці з лічильника (3, 125); distinct=None — обмеження визначається з даних.
+
+        objective — як обирається доповнення: 'expected' — максимум очікуваних
+        правильних пар, 'exact' — максимум імовірності вгадати всі невідомі пари.
+        """
+        combos = np.asarray(combos, dtype=np.float64)
+        if distinct is None:
+            distinct = ~(combos[:, ~DISTINCT] > 0).any(axis=1)
+        distinct = np.broadcast_to(np.asarray(distinct, dtype=bool), (len(combos),)).copy()
+
+        expected = np.zeros(combos.shape)
+        best = np.zeros((len(combos), N_STATES), dtype=np.int16)
+        best_points = np.zeros((len(combos), N_STATES))
+        per_size = np.zeros((len(combos), N_PAIRS + 1, N_PAIRS + 1))  # [завдання, відомо, вгадано]
+        for t, weights in enumerate(combos):
+            expected[t] = AGREE.sum(axis=-1) @ _state_probs(weights[None], [N_STATES - 1])[0, 0]
+            if weights.any():
+                keys = np.flatnonzero(weights)
+                key_probs = weights[keys] / weights.sum()
+                held_out = weights - np.eye(N_COMBOS)[keys]  # (K, 125) — лічильник без свого ключа
+            else:  # даних немає — рівноймовірні ключі і вибір без даних
+                keys = np.arange(N_COMBOS)
+                key_probs = np.full(N_COMBOS, 1 / N_COMBOS)
+                held_out = np.zeros((1, N_COMBOS))
+            for m, known in enumerate(MASKS):
+                states = np.flatnonzero(STATE_MASK == m)
+                size = known.sum()
+                if size == N_PAIRS:  # усе відомо: доповнення — сам ключ, вгадувати нічого
+                    best[t, states] = CONSISTENT[states].argmax(axis=1)
+                    best_points[t, states] = N_PAIRS
+                    per_size[t, N_PAIRS, 0] += 1.0
+                    continue
+                best[t, states] = _choose(weights[None], states, m, distinct[t], objective)[0]
+                # hits[k, s] — вгадано невідомих пар ключа k вибором, зробленим без k
+                hits = UNKNOWN_AGREE[m, _choose(held_out, states, m, distinct[t], objective), keys[:, None]]
+                probs = _state_probs(weights[None], states)[0][:, keys]  # (S, K) — P(ключ | стан)
+                best_points[t, states] = (probs * hits.T).sum(axis=1) + size
+
+                # для розподілу: відомі пари — з самого ключа; маски одного розміру рівноймовірні
+                own = np.where(known, TRIPLES[keys], UNKNOWN) @ ((N_LETTERS + 1) ** np.arange(N_PAIRS)[::-1])
+                own_hits = hits[np.arange(len(keys)), np.searchsorted(states, own)]
+                per_size[t, size] += (np.bincount(own_hits, weights=key_probs, minlength=N_PAIRS + 1)
+                                      / comb(N_PAIRS, size))
+
+        tables = cls(distinct, expected, best, best_points, cls._guess_pmfs(per_size))
+        for array in (tables.distinct, tables.expected, tables.best, tables.best_points, tables.guess_pmfs):
+            array.setflags(write=False)
+        return tables
+
+    @staticmethod
+    def _guess_pmfs(per_size):
+        """table[j, c] = P(вгадано c пар), якщо відомі j з 9 пар — випадкова підмножина.
+
+        per_size[t, a, c] — P(вгадано c невідомих пар завдання t | відомо a
+        його пар); розміри по завданнях — гіпергеометрично.
+        """
+        table = np.zeros((MAX_PAIRS + 1, MAX_PAIRS + 1))
+        for sizes in np.ndindex(*(N_PAIRS + 1,) * len(per_size)):
+            j = sum(sizes)
+            weight = np.prod([comb(N_PAIRS, a) for a in sizes]) / comb(MAX_PAIRS, j)
+            pmf = np.ones(1)
+            for t, a in enumerate(sizes):
+                pmf = np.convolve(pmf, per_size[t, a, :N_PAIRS - a + 1])
+            table[j, :len(pmf)] += weight * pmf
+        return table
+
+    @property
+    def expected_guess(self):
+        """(10,) — очікувано вгаданих пар, якщо відомі j з 9."""
+        return self.guess_pmfs @ np.arange(MAX_PAIRS + 1)
+
+    def completion(self, task_idx, known=(None, None, None)):
+        """(код найкращої трійки, очікувані бали) при відомих парах `known`."""
+        state = state_code(known)
+        return int(self.best[task_idx, state]), float(self.best_points[task_idx, state])
+
+    def ranking(self, task_idx, top=None):
+        """[(мітка трійки, очікувані бали)] за спаданням; з обмеженням — лише дозволені трійки."""
+        expected = self.expected[task_idx]
+        codes = np.argsort(-expected, kind='stable')
+        if self.distinct[task_idx]:
+            codes = codes[DISTINCT[codes]]
+        return [(combo_label(code), float(expected[code])) for code in codes[:top]]
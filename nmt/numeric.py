@@ -0,0 +1,112 @@
+"""Відсортований індекс відповідей 19-22 і запити до нього бінарним пошуком.
+
+Для кожного завдання і року значення зберігаються відсортованими, тож
+«скільки відповідей у [a, b]», «найближчі відповіді до x» і групування
+з допуском (22.5 і 22.50000001 — одна відповідь) коштують O(log n) або
+один прохід по вже відсортованому масиву, без value_counts() на сирих
+float. Індекс будується один раз на Dataset (Dataset.numeric_index).
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .dataset import OPEN_TASKS
+
+DEFAULT_TOLERANCE = 1e-6
+
+
+@dataclass(frozen=True)
+class NumericIndex:
+    years: tuple
+    values: np.ndarray   # (T, V) — значення кожного завдання за зростанням
+    rows: np.ndarray     # (T, V) — номер варіанта для кожного значення
+    year_idx: np.ndarray # (T, V) — індекс року для кожного значення
+    by_year: tuple       # [завдання][рік] — відсортовані значення одного року
+    _subsets: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        numeric = np.where(np.isfinite(dataset.numeric), dataset.numeric, np.inf)  # NaN — в кінець
+        # стабільне сортування: однакові значення лишаються в порядку появи
+        rows = np.argsort(numeric, axis=0, kind='stable').T
+        values = np.take_along_axis(dataset.numeric.T, rows, axis=1)
+        year_idx = dataset.year_idx[rows]
+        by_year = tuple(
+            tuple(values[t][(year_idx[t] == y) & np.isfinite(values[t])] for y in range(len(dataset.years)))
+            for t in range(len(OPEN_TASKS))
+        )
+        for array in (values, rows, year_idx, *(a for task in by_year for a in task)):
+            array.setflags(write=False)
+        return cls(dataset.years, values, rows, year_idx, by_year)
+
+    def _codes(self, years):
+        return range(len(self.years)) if years is None else [self.years.index(y) for y in self.years if y in years]
+
+    def subset(self, task, years=None):
+        """(значення, рядки, роки) завдання для набору років — досі відсортовані (кеш на набір)."""
+        t = OPEN_TASKS.index(task)
+        key = (t, tuple(self._codes(years)))
+        cached = self._subsets.get(key)
+        if cached is None:
+            mask = np.isin(self.year_idx[t], key[1]) & np.isfinite(self.values[t])
+            cached = tuple(a[t][mask] for a in (self.values, self.rows, self.year_idx))
+            self._subsets[key] = cached
+        return cached
+
+    def count_between(self, task, low, high, years=None):
+        """Кількість відповідей у [low, high]."""
+        t = OPEN_TASKS.index(task)
+        return int(sum(
+            np.searchsorted(a, high, side='right') - np.searchsorted(a, low, side='left')
+            for a in (self.by_year[t][y] for y in self._codes(years))
+        ))
+
+    def nearest(self, task, value, k=5, years=None):
+        """До k найближчих відповідей: [(значення, номер варіанта)] за зростанням відстані."""
+        values, rows, _ = self.subset(task, years)
+        at = int(np.searchsorted(values, value))
+        lo, hi = max(at - k, 0), min(at + k, len(values))
+        window = np.arange(lo, hi)
+        order = window[np.argsort(np.abs(values[window] - value), kind='stable')][:k]
+        return [(float(values[i]), int(rows[i])) for i in order]
+
+    def groups(self, task, tolerance=DEFAULT_TOLERANCE, years=None):
+        """Групи відповідей, що відрізняються не більше ніж на `tolerance` від сусіда.
+
+        Повертає (представник — найменше значення групи, кількість,
+        перша поява — найменший номер варіанта, (Y,) кількості по роках).
+        """
+        values, rows, year_idx = self.subset(task, years)
+        if not len(values):
+            empty = np.zeros(0)
+            return empty, empty.astype(np.int64), empty.astype(np.int64), np.zeros((0, len(self.years)), np.int64)
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(values) > tolerance) + 1])
+        group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(values))))
+        counts = np.diff(np.append(starts, len(values)))
+        first = np.minimum.reduceat(rows, starts)
+        per_year = np.zeros((len(starts), len(self.years)), dtype=np.int64)
+        np.add.at(per_year, (group, year_idx.astype(np.intp)), 1)
+        return values[starts], counts, first, per_year
+
+    def top(self, task, n=5, tolerance=DEFAULT_TOLERANCE, years=None):
+        """Номери груп за спаданням частоти, нічиї — за першою появою, і самі групи."""
+        groups = self.groups(task, tolerance, years)
+        _, counts, first, _ = groups
+        order = np.lexsort((first, -counts))
+        return order[:n] if n is not None else order, groups
+
+    def histogram(self, task, bins=20, years=None):
+        """(межі, кількості) рівномірної гістограми значень."""
+        values = self.subset(task, years)[0]
+        counts, edges = np.histogram(values, bins=bins)
+        return edges, counts
+
+    def magnitudes(self, task, years=None):
+        """{порядок: кількість} для |x| (10^k ≤ |x| < 10^(k+1)); нулі — під ключем None."""
+        values = self.subset(task, years)[0]
+        nonzero = values[values != 0]
+        orders, counts = np.unique(np.floor(np.log10(np.abs(nonzero))).astype(np.int64), return_counts=True)
+        result = {int(o): int(c) for o, c in zip(orders, counts)}
+        if len(nonzero) < len(values):
+            result[None] = len(values) - len(nonzero)
+        return result
@@ -0,0 +1,108 @@
+"""Таблиця оптимальної політики вгадування за балом НМТ, а не тестовими балами.
+
+Шкала переводу нелінійна (5→6 тестових балів — це +8 НМТ, 16→20 — по
++1), тож політика з найбільшим очікуваним тестовим балом не завжди дає
+найбільший очікуваний бал НМТ чи P(бал ≥ поріг). Розв'язувач перебирає
+всі політики для кожного стану (known_1_15, known_16_18, known_19_22)
+за точними розподілами і зберігає найкращу — UI лише індексує таблицю.
+
+Простір політик — стратегія 1-15 (STRATEGIES) × вгадування 16-18
+(MATCH_GUESS). Окрема літера для кожного питання 1-15 нічого не додає:
+шкала монотонна, а вищий шанс вгадати питання стохастично домінує, тож
+найчастіша літера кожного питання («Оптимальна») завжди не гірша. Для
+16-18 це не так: трійка з найбільшим очікуванням і трійка, що найчастіше
+вгадується повністю, мають різний розкид, і нелінійна шкала може
+віддати перевагу будь-якій з них.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .scoring import MAX_1_15, MAX_16_18, MAX_19_22, MAX_TEST_SCORE, STRATEGIES
+
+MATCH_GUESS = ('none', 'expected', 'exact')
+MATCH_GUESS_LABELS = {
+    'none': 'не вгадувати 16-18',
+    'expected': '16-18: трійка з найбільшим очікуванням',
+    'exact': '16-18: найчастіша повна трійка',
+}
+
+
+def _match_pmfs(aggregate):
+    """(3, 10, 10) — [MATCH_GUESS, відомо пар, вгадано пар].
+
+    Розподіли вгадувань 16-18 — leave-one-out (див. matching): на тих самих
+    варіантах обидва режими вгадування виглядали б кращими, ніж є.
+    """
+    from .matching import MatchTables
+    exact = MatchTables.from_combos(aggregate.combos, distinct=aggregate.match_tables.distinct, objective='exact')
+    none = np.zeros_like(exact.guess_pmfs)
+    none[:, 0] = 1.0
+    return np.stack([none, aggregate.match_tables.guess_pmfs, exact.guess_pmfs])
+
+
+@dataclass(frozen=True)
+class PolicyTable:
+    years: tuple
+    policies: tuple              # (стратегія 1-15, вгадування 16-18) для кожного номера політики
+    expected_nmt: np.ndarray     # (P, 16, 10, 9) — E[бал НМТ] кожної політики
+    best_expected: np.ndarray    # (16, 10, 9) — політика з найбільшим E[бал НМТ]
+    best_at_least: np.ndarray    # (34, 16, 10, 9) — [тестовий поріг t, ...] політика з макс. P(тест ≥ t)
+    p_at_least: np.ndarray       # (34, 16, 10, 9) — ця ймовірність
+    lut: np.ndarray
+
+    @classmethod
+    def solve(cls, aggregate):
+        lut = aggregate.lut
+        guess_1_15 = aggregate.guess_pmfs[:, ::-1]  # [стратегія, known_1_15, вгадано]
+        guess_16_18 = _match_pmfs(aggregate)         # [вгадування, known_16_18, вгадано]
+
+        # Розподіл усіх вгаданих балів для кожної політики: згортка по останній осі
+        n_guess = MAX_1_15 + MAX_16_18 + 1
+        pmf = np.zeros((len(STRATEGIES), len(MATCH_GUESS), MAX_1_15 + 1, MAX_16_18 + 1, n_guess))
+        for y in range(MAX_16_18 + 1):
+            pmf[..., y:y + MAX_1_15 + 1] += (
+                guess_1_15[:, None, :, None, :] * guess_16_18[None, :, None, :, y, None])
+        pmf = pmf.reshape(-1, MAX_1_15 + 1, MAX_16_18 + 1, n_guess)
+
+        k1 = np.arange(MAX_1_15 + 1)[:, None, None]
+        k2 = np.arange(MAX_16_18 + 1)[:, None]
+        k3 = np.arange(MAX_19_22 + 1)
+        known = k1 + k2 + k3                                               # (16, 10, 9)
+        total = known[..., None] + np.arange(n_guess)                      # (16, 10, 9, 25)
+        expected_nmt = np.einsum('pijx,ijkx->pijk', pmf, lut[np.minimum(total, MAX_TEST_SCORE)].astype(np.float64))
+
+        # P(тест ≥ t) = P(вгадано ≥ t - known); хвіст з нулями за межами
+        tail = np.concatenate([np.cumsum(pmf[..., ::-1], axis=-1)[..., ::-1], np.zeros(pmf.shape[:-1] + (1,))], -1)
+        need = np.clip(np.arange(MAX_TEST_SCORE + 2)[:, None, None, None] - known, 0, n_guess)  # (34, 16, 10, 9)
+        ii, jj = np.meshgrid(np.arange(MAX_1_15 + 1), np.arange(MAX_16_18 + 1), indexing='ij')
+        at_least = np.minimum(tail[:, ii[None, :, :, None], jj[None, :, :, None], need], 1.0)  # (P, 34, 16, 10, 9)
+
+        # Нічиї (з точністю до похибки): для E[НМТ] — за порядком політик, простіша раніше;
+        # для порогу — за E[НМТ] (напр., коли P = 0 чи 1 для всіх)
+        best_expected = np.round(expected_nmt, 9).argmax(axis=0)
+        best_at_least = (np.round(at_least, 12) + expected_nmt[:, None] * 1e-16).argmax(axis=0)
+        p_at_least = np.take_along_axis(at_least, best_at_least[None], axis=0)[0]
+
+        policies = tuple((s, m) for s in STRATEGIES for m in MATCH_GUESS)
+        table = cls(aggregate.years, policies, expected_nmt,
+                    best_expected.astype(np.int8), best_at_least.astype(np.int8), p_at_least, lut)
+        for array in (table.expected_nmt, table.best_expected, table.best_at_least, table.p_at_least):
+            array.setflags(write=False)
+        return table
+
+    def test_threshold(self, nmt_threshold):
+        """Найменший тестовий бал, що дає ≥ nmt_threshold балів НМТ (33 — недосяжно)."""
+        return int(np.searchsorted(self.lut, nmt_threshold))
+
+    def best(self, known_1_15, known_16_18, known_19_22, threshold=None):
+        """(стратегія 1-15, вгадування 16-18, значення) — O(1) з таблиці.
+
+        Без threshold — максимум E[бал НМТ]; з threshold — максимум P(бал ≥ threshold).
+        """
+        state = (known_1_15, known_16_18, known_19_22)
+        if threshold is None:
+            p = int(self.best_expected[state])
+            return (*self.policies[p], float(self.expected_nmt[(p, *state)]))
+        t = self.test_threshold(threshold)
+        return (*self.policies[self.best_at_least[(t, *state)]], float(self.p_at_least[(t, *state)]))
@@ -0,0 +1,432 @@
+"""Статичні HTML-звіти для кожного розділу і фільтра років.
+
+    python -m nmt prerender --out site --workers 4
+
+Сторінки статистики (1-15 і кожне із завдань 16-22) і оптимальних
+стратегій рендеряться для всіх років разом і для кожного року окремо,
+порівняння — для кожної підмножини з двох і більше років. Кожна
+сторінка — самодостатній HTML: таблиці й специфікації графіків з
+figures (Plotly JSON) вбудовані, а plotly.min.js копіюється один раз у
+корінь теки (або, без пакета plotly, береться з CDN). Теку можна
+віддавати будь-яким вебсервером без Python.
+
+Сторінки рендеряться пулом процесів. У manifest.json для кожної
+сторінки зберігається хеш її входів: варіанти саме її років, вихідний
+код пакета і параметри. Повторний запуск рендерить лише сторінки, чиї
+входи змінилися (наприклад, після ingest нового року — лише сторінки з
+цим роком); сторінки, яких більше немає, видаляються.
+"""
+import hashlib
+import html
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+
+from . import analytics
+from .dataset import DEFAULT_DATA_PATH, MATCH_TASKS, OPEN_TASKS, load_dataset
+from .diskcache import code_version
+from .figures import figure, sorted_comparison
+
+PLOTLY_CDN = 'https://cdn.plot.ly/plotly-2.35.2.min.js'
+MANIFEST = 'manifest.json'
+TASKS = ('1-15', *MATCH_TASKS, *OPEN_TASKS)
+SECTION_TITLES = {
+    'stats': '📊 Статистика',
+    'strategies': '💡 Оптимальні стратегії',
+    'compare': '🔥 Порівняння років',
+}
+
+STYLE = """
+body { font-family: system-ui, sans-serif; max-width: 1100px; margin: 0 auto; padding: 1rem 2rem; color: #222; }
+h1 { color: #1f77b4; }
+nav a { margin-right: 1rem; }
+table { border-collapse: collapse; margin: 1rem 0; }
+th, td { border: 1px solid #ddd; padding: 0.3rem 0.7rem; text-align: right; }
+th { background: #f5f5f5; }
+td:first-child, th:first-child { text-align: left; }
+.insight-box { background: #e8f4f8; border-left: 5px solid #1f77b4; padding: 0.5rem 1.5rem; margin: 1rem 0; }
+.caption { color: #666; font-size: 0.9rem; }
+footer { color: #666; text-align: center; margin-top: 3rem; }
+"""
+
+
+@dataclass(frozen=True)
+class Page:
+    section: str      # 'stats' | 'strategies' | 'compare'
+    years: tuple      # фільтр років (для compare — роки, що порівнюються)
+    task: str = None  # лише для stats: '1-15' або номер завдання 16-22
+
+    @property
+    def path(self):
+        slug = '-'.join(self.years)
+        if self.section == 'stats':
+            return f'stats/{slug}/{self.task}.html'
+        return f'{self.section}/{slug}.html'
+
+    @property
+    def title(self):
+        years = ', '.join(f'НМТ {year}' for year in self.years)
+        if self.section == 'stats':
+            task = 'завдання 1-15' if self.task == '1-15' else f'завдання {self.task}'
+            return f'Статистика: {task} ({years})'
+        if self.section == 'strategies':
+            return f'Оптимальні стратегії ({years})'
+        return 'Порівняння ' + ' vs '.join(f'НМТ {year}' for year in self.years)
+
+
+def pages(years):
+    """Усі комбінації розділу і фільтра років, які є в дашборді."""
+    filters = [tuple(years)] + ([(year,) for year in years] if len(years) > 1 else [])
+    result = []
+    for group in filters:
+        result += [Page('stats', group, str(task)) for task in TASKS]
+        result.append(Page('strategies', group))
+    for size in range(2, len(years) + 1):
+        result += [Page('compare', group) for group in combinations(years, size)]
+    return result
+
+
+# ----- хеші входів -----
+
+def year_hashes(dataset):
+    """{рік: хеш його варіантів} — сторінка залежить лише від варіантів своїх років."""
+    hashes = {}
+    for year, rows in dataset.year_rows.items():
+        digest = hashlib.sha256()
+        for array in (dataset.tests[rows], dataset.matches[rows], dataset.numeric[rows]):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        digest.update('\n'.join(map(str, dataset.dates[rows])).encode())
+        hashes[year] = digest.hexdigest()
+    return hashes
+
+
+def page_hash(page, code, years_hash, resamples):
+    key = [code, page.section, page.task, resamples, *((year, years_hash[year]) for year in page.years)]
+    return hashlib.sha256(json.dumps(key, ensure_ascii=False).encode()).hexdigest()
+
+
+# ----- HTML -----
+
+def _format(value):
+    if isinstance(value, float):
+        return f'{value:.1f}'
+    return html.escape(str(value))
+
+
+def _table(columns, rows):
+    head = ''.join(f'<th>{html.escape(c)}</th>' for c in columns)
+    body = ''.join('<tr>' + ''.join(f'<td>{_format(v)}</td>' for v in row) + '</tr>' for row in rows)
+    return f'<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def _pct(rate):
+    return f'{rate * 100:.1f}%'
+
+
+def _ci(row):
+    return f"{row['low'] * 100:.1f}–{row['high'] * 100:.1f}%"
+
+
+def _stats_1_15(dataset, years, resamples):
+    aggregate = dataset.counts.total(years)
+    intervals = analytics.bootstrap_intervals(dataset, years, resamples)
+    questions = analytics.question_table(aggregate, n_alternatives=2)
+    sequences = analytics.sequence_stats(dataset.sequences.total(years))
+    parts = [
+        '<h2>Розподіл відповідей А-Д</h2>',
+        _table(['Літера', 'Кількість', 'Частка', '95% ДІ'], [
+            (row['letter'], row['count'], f"{row['pct']:.1f}%", _ci(ci))
+            for row, ci in zip(analytics.letter_stats(aggregate), intervals['letters'])
+        ]),
+        {'figure': figure(dataset.counts, 'stats/letters', years)},
+        {'figure': figure(dataset.counts, 'stats/heatmap', years)},
+        {'figure': figure(dataset.counts, 'stats/transitions', sequences['position'],
+                          tuple(map(tuple, sequences['counts'])))},
+        f"<p class='caption'>Та сама літера, що й у попередньому питанні: {_pct(sequences['repeat_rate'])} "
+        f"(при незалежних питаннях — {_pct(sequences['repeat_rate_independent'])}).</p>",
+        '<h3>Найчастіші трійки відповідей поспіль</h3>',
+        _table(['Трійка', 'Разів', 'Очікувано при незалежних'], [
+            (row['trigram'], row['count'], f"{row['independent']:.1f}") for row in sequences['trigrams']]),
+        '<h2>Найчастіша відповідь кожного питання</h2>',
+        _table(['Питання', 'Відповідь', 'Разів', 'Частка', '95% ДІ', 'Далі'], [
+            (row['question'], row['best'], row['count'], _pct(row['rate']), _ci(ci),
+             ', '.join(f"{alt['letter']} ({_pct(alt['rate'])})" for alt in row['alternatives']))
+            for row, ci in zip(questions, intervals['questions'])
+        ]),
+    ]
+    return parts
+
+
+def _stats_match(dataset, years, task):
+    aggregate = dataset.counts.total(years)
+    stats = analytics.pair_stats(aggregate, task)
+    joint = analytics.match_guess(aggregate, task)
+    parts = []
+    for pair in stats['pairs']:
+        parts.append(f"<h3>Пара {pair['pair']}</h3>")
+        parts.append(_table(['Літера', 'Разів', 'Частка'], [
+            (row['letter'], row['count'], _pct(row['rate'])) for row in pair['ranking']]))
+    best = stats['best_combo']
+    parts.append(f"<div class='insight-box'><p>Найчастіша трійка: <b>{html.escape(best['combo'])}</b> "
+                 f"({best['count']} з {stats['n_variants']} варіантів). Трійка з найбільшим очікуванням: "
+                 f"<b>{html.escape(joint['best']['combo'])}</b> — {joint['best']['points']:.2f} пари з 3"
+                 f"{' (лише різні літери)' if joint['distinct'] else ''}.</p></div>")
+    parts.append(_table(['Трійка', 'Очікувано пар'], [
+        (row['combo'], f"{row['points']:.2f}") for row in joint['candidates']]))
+    return parts
+
+
+def _stats_numeric(dataset, years, task):
+    answers = analytics.numeric_answers(dataset, years, task)
+    distribution = analytics.numeric_distribution(dataset, years, task)
+    magnitudes = tuple((row['label'], row['count']) for row in distribution['magnitudes'])
+    return [
+        '<h2>Найчастіші відповіді</h2>',
+        _table(['Відповідь', 'Разів', 'Частка'], [
+            (f"{row['value']:g}", row['count'], _pct(row['rate'])) for row in answers['top']]),
+        {'figure': figure(dataset.counts, 'stats/numeric_magnitudes', task, magnitudes)},
+        '<h2>Усі відповіді по роках</h2>',
+        _table(['Відповідь', *years], [
+            (f"{row['value']:g}", *(row.get(year, 0) for year in years)) for row in answers['by_year']]),
+    ]
+
+
+def _strategies(dataset, years, resamples):
+    aggregate = dataset.counts.total(years)
+    intervals = analytics.bootstrap_intervals(dataset, years, resamples)
+    backtest = analytics.backtest_table(dataset, years)
+    rows = sorted_comparison(analytics.strategy_comparison(aggregate, 0, 0, 0))
+    strategy_ci = {row['strategy']: row for row in intervals['strategies']}
+    parts = [
+        '<h2>Оптимальна відповідь для кожного питання 1-15</h2>',
+        _table(['Питання', 'Відповідь', 'Успішність', '95% ДІ'], [
+            (row['question'], row['best'], _pct(row['rate']), _ci(ci))
+            for row, ci in zip(analytics.question_table(aggregate, 0), intervals['questions'])
+        ]),
+        '<h2>Успішність стратегій на 1-15</h2>',
+        _table(['Стратегія', 'На цих даних', '95% ДІ', 'Leave-one-out', 'Бал НМТ, якщо нічого не знаю'], [
+            (b['strategy'], _pct(b['in_sample']), _ci(strategy_ci[b['strategy']]), _pct(b['leave_one_out']),
+             next(r['nmt_score'] for r in rows if r['strategy'] == b['strategy']))
+            for b in backtest['strategies']
+        ]),
+        f"<p class='caption'>95% ДІ — бутстреп по варіантах ({intervals['n_resamples']} вибірок, "
+        f"{intervals['n_variants']} варіантів).</p>",
+        '<h2>Завдання 16-18</h2>',
+        _table(['Завдання', 'Пара 1', 'Пара 2', 'Пара 3', 'Найкраща трійка'], [
+            (task, *(pair['ranking'][0]['letter'] if pair['ranking'] else '-' for pair in stats['pairs']),
+             analytics.match_guess(aggregate, task)['best']['combo'])
+            for task, stats in ((task, analytics.pair_stats(aggregate, task)) for task in MATCH_TASKS)
+        ]),
+        '<h2>Завдання 19-22</h2>',
+        _table(['Завдання', 'Найчастіша відповідь', 'Разів'], [
+            (task, *((f"{top[0]['value']:g}", top[0]['count']) if top else ('-', 0)))
+            for task, top in ((task, analytics.numeric_answers(dataset, years, task, top=1)['top'])
+                              for task in OPEN_TASKS)
+        ]),
+    ]
+    return parts
+
+
+def _compare(dataset, years, resamples):
+    groups = tuple((year,) for year in years)
+    names = tuple(f'НМТ {year}' for year in years)
+    comparison = analytics.letter_comparison(dataset, groups)
+    bounds = tuple(
+        analytics.letter_count_intervals(analytics.bootstrap_intervals(dataset, group, resamples),
+                                         dataset.counts.total(group).n_answers)
+        for group in groups
+    )
+    tests = [analytics.year_significance(dataset, groups[0], group, resamples) for group in groups[1:]]
+    widest = max(comparison, key=lambda row: row['spread'])
+    significant = [test for test in tests if test['p_permutation'] < 0.05]
+    if significant:
+        changed = ', '.join(f"НМТ {test['b'][0]} (p = {test['p_permutation']:.3f})" for test in significant)
+        verdict = (f'Розподіл літер значуще відрізняється від НМТ {years[0]}: {changed}. Найбільше змінилася '
+                   f"частка літери <b>{widest['letter']}</b> ({widest['spread']:.1f} п.п.).")
+    else:
+        verdict = (f"Різниця між розподілами відповідей статистично не значуща (перестановочний тест, p ≥ 0.05; "
+                   f"частки літер різняться щонайбільше на {widest['spread']:.1f} п.п.).")
+    return [
+        _table(['Літера', *names, 'Розкид, п.п.'], [
+            (row['letter'], *(f'{c} ({p:.1f}%)' for c, p in zip(row['counts'], row['pcts'])), row['spread'])
+            for row in comparison
+        ]),
+        {'figure': figure(dataset.counts, 'compare/letters', groups, names, bounds)},
+        "<p class='caption'>Вуса — 95% бутстреп-інтервал кількості (вибірки варіантів кожного року).</p>",
+        _table(['Порівняння', 'χ²', 'p (χ²)', 'p (перестановки)'], [
+            (f"НМТ {years[0]} vs НМТ {test['b'][0]}", f"{test['chi2']:.2f}", f"{test['p_chi2']:.3f}",
+             f"{test['p_permutation']:.3f}")
+            for test in tests
+        ]),
+        f"<div class='insight-box'><h3>💡 Висновок:</h3><p>{verdict}</p></div>",
+    ]
+
+
+def page_parts(dataset, page, resamples):
+    """Вміст сторінки: HTML-фрагменти і {'figure': специфікація Plotly}."""
+    if page.section == 'compare':
+        return _compare(dataset, page.years, resamples)
+    if page.section == 'strategies':
+        return _strategies(dataset, page.years, resamples)
+    if page.task == '1-15':
+        return _stats_1_15(dataset, page.years, resamples)
+    task = int(page.task)
+    return _stats_match(dataset, page.years, task) if task in MATCH_TASKS else _stats_numeric(dataset, page.years, task)
+
+
+def _figure_json(spec):
+    # '</' всередині JSON закрив би <script>
+    return json.dumps(spec, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+
+def _document(title, body, plotly_src, root):
+    return f"""<!DOCTYPE html>
+<html lang="uk">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(title)}</title>
+<script src="{html.escape(plotly_src)}"></script>
+<style>{STYLE}</style>
+</head>
+<body>
+<nav><a href="{root}index.html">← Усі звіти</a></nav>
+<h1>{html.escape(title)}</h1>
+{body}
+<footer>📊 Статичний звіт аналітики НМТ з математики | 🎓 Для освітніх цілей</footer>
+</body>
+</html>
+"""
+
+
+def render_page(dataset, page, plotly_src, resamples):
+    root = '../' * page.path.count('/')
+    body, n_figures = [], 0
+    for part in page_parts(dataset, page, resamples):
+        if isinstance(part, dict):
+            div = f'fig{n_figures}'
+            n_figures += 1
+            spec = {**part['figure'], 'config': {'responsive': True}}
+            body.append(f'<div id="{div}"></div>\n<script>Plotly.newPlot("{div}", {_figure_json(spec)});</script>')
+        else:
+            body.append(part)
+    source = plotly_src if '://' in plotly_src else root + plotly_src
+    return _document(page.title, '\n'.join(body), source, root)
+
+
+def _index(dataset, plotly_src):
+    """index.html: посилання на всі сторінки, згруповані за розділами."""
+    items = {}
+    for page in pages(dataset.years):
+        items.setdefault(page.section, []).append(page)
+    body = [f"<p>{dataset.n_variants} варіантів НМТ {', '.join(dataset.years)}. "
+            f"Згенеровано {time.strftime('%Y-%m-%d %H:%M')}.</p>"]
+    for section, section_pages in items.items():
+        body.append(f'<h2>{SECTION_TITLES[section]}</h2><ul>')
+        body += [f'<li><a href="{page.path}">{html.escape(page.title)}</a></li>' for page in section_pages]
+        body.append('</ul>')
+    return _document('Аналітика НМТ з математики', '\n'.join(body), plotly_src, '')
+
+
+def _write_atomic(path, text):
+    """Вебсервер не повинен віддати напівзаписану сторінку."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# ----- пул процесів -----
+
+_WORKER = {}
+
+
+def _init_worker(data_path, out, plotly_src, resamples):
+    _WORKER.update(dataset=load_dataset(data_path), out=Path(out), plotly_src=plotly_src, resamples=resamples)
+
+
+def _render_job(page):
+    start = time.perf_counter()
+    text = render_page(_WORKER['dataset'], page, _WORKER['plotly_src'], _WORKER['resamples'])
+    _write_atomic(_WORKER['out'] / page.path, text)
+    return page.path, time.perf_counter() - start
+
+
+def _plotly_js(out):
+    """Відносний шлях до локальної копії plotly.min.js або, без пакета plotly, адреса CDN."""
+    from importlib.util import find_spec
+    spec = find_spec('plotly')
+    if spec is None or spec.origin is None:
+        return PLOTLY_CDN
+    bundled = Path(spec.origin).parent / 'package_data' / 'plotly.min.js'
+    if not bundled.exists():
+        return PLOTLY_CDN
+    target = out / 'plotly.min.js'
+    if not target.exists() or target.stat().st_size != bundled.stat().st_size:
+        shutil.copyfile(bundled, target)
+    return 'plotly.min.js'
+
+
+def _read_manifest(out):
+    try:
+        with open(out / MANIFEST, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def prerender(out, data_path=DEFAULT_DATA_PATH, workers=1, resamples=20_000, force=False):
+    """Рендерить змінені сторінки в теку `out`; повертає, що відрендерено, пропущено і видалено."""
+    start = time.perf_counter()
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    dataset = load_dataset(data_path)
+    plotly_src = _plotly_js(out)
+
+    code, years_hash = code_version(), year_hashes(dataset)
+    previous = _read_manifest(out).get('pages', {})
+    hashes = {page.path: page_hash(page, code, years_hash, resamples) for page in pages(dataset.years)}
+    # force лише пропускає порівняння хешів; видалені сторінки прибираються завжди
+    todo = [page for page in pages(dataset.years)
+            if force or previous.get(page.path) != hashes[page.path] or not (out / page.path).exists()]
+
+    args = (data_path, str(out), plotly_src, resamples)
+    if workers > 1 and len(todo) > 1:
+        from concurrent.futures import ProcessPoolExecutor  # потрібен лише тут
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=args) as pool:
+            # дорожчі сторінки (з бутстрепом) — першими, щоб пул не чекав на хвіст
+            todo.sort(key=lambda page: page.section == 'stats' and page.task != '1-15')
+            timings = dict(pool.map(_render_job, todo))
+    else:
+        _init_worker(*args)
+        timings = dict(map(_render_job, todo))
+
+    removed = sorted(set(previous) - set(hashes))
+    for path in removed:
+        (out / path).unlink(missing_ok=True)
+    _write_atomic(out / 'index.html', _index(dataset, plotly_src))
+    _write_atomic(out / MANIFEST, json.dumps({'code': code, 'years': years_hash, 'pages': hashes},
+                                             ensure_ascii=False, indent=1))
+    return {
+        'out': str(out),
+        'pages': len(hashes),
+        'rendered': len(todo),
+        'skipped': len(hashes) - len(todo),
+        'removed': removed,
+        'slowest': [{'page': path, 'ms': seconds * 1000}
+                    for path, seconds in sorted(timings.items(), key=lambda item: -item[1])[:5]],
+        'seconds': time.perf_counter() - start,
+    }
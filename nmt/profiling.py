@@ -0,0 +1,222 @@
+"""Час кожного перезапуску дашборду по фазах і експорт метрик.
+
+Перезапуск скрипта Streamlit ділиться на фази: завантаження даних
+(`load`), лічильники (`aggregate`), розрахунки analytics (`compute`,
+зокрема через shared.shared), побудова DataFrame (`dataframe`) і
+графіків (`figure`); решта часу — це `render`, тобто виклики st.* і
+сам скрипт. Фази вкладаються (фаза рахує лише власний час), а таймер
+прив'язаний до потоку: кожна сесія Streamlit — окремий потік, тож сесії
+не змішуються, а без активного таймера phase() нічого не робить.
+
+    profiling.start()
+    with profiling.phase('load'):
+        DATA = load_dataset()
+    ...
+    record = profiling.finish('calculator')
+
+Завершені перезапуски потрапляють у METRICS: останні записи для
+перцентилів у debug-панелі, гістограми для Prometheus і, якщо задано
+NMT_METRICS, у файл — JSON lines (по рядку на перезапуск) або, для
+шляху з `.prom`, текстовий формат Prometheus (для textfile-колектора
+node_exporter; файл перезаписується атомарно).
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+PHASES = ('load', 'aggregate', 'compute', 'dataframe', 'figure', 'render')
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+
+
+class RerunTimer:
+    """Ексклюзивний час фаз одного перезапуску і дельти лічильників кешів."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self._stack = []  # [час дочірніх фаз] для кожної відкритої фази
+        self._caches = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            yield
+        finally:
+            children = self._stack.pop()
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - children
+            if self._stack:
+                self._stack[-1] += elapsed
+
+    def watch(self, name, cache):
+        """Стежити за SharedCache: у записі будуть влучання/промахи за цей перезапуск.
+
+        Лічильники спільні для процесу, тож при паралельних сесіях дельта наближена.
+        """
+        self._caches[name] = (cache, cache.hits, cache.misses)
+
+    def record(self, section):
+        total = time.perf_counter() - self.started
+        phases = dict(self.phases)
+        phases['render'] = max(total - sum(v for k, v in phases.items() if k != 'render'), 0.0)
+        return {
+            'ts': time.time(),
+            'section': section,
+            'total': total,
+            'phases': phases,
+            'caches': {
+                name: {'hits': cache.hits - hits, 'misses': cache.misses - misses}
+                for name, (cache, hits, misses) in self._caches.items()
+            },
+        }
+
+
+def start():
+    """Новий таймер для перезапуску в цьому потоці."""
+    _local.timer = RerunTimer()
+    return _local.timer
+
+
+def current():
+    return getattr(_local, 'timer', None)
+
+
+@contextmanager
+def phase(name):
+    """Фаза `name` активного таймера потоку; без таймера — нічого."""
+    timer = current()
+    if timer is None:
+        yield
+    else:
+        with timer.phase(name):
+            yield
+
+
+def watch(name, cache):
+    timer = current()
+    if timer is not None:
+        timer.watch(name, cache)
+
+
+def finish(section):
+    """Завершує перезапуск: запис потрапляє в METRICS (і у файл NMT_METRICS)."""
+    timer = current()
+    if timer is None:
+        return None
+    _local.timer = None
+    record = timer.record(section)
+    METRICS.add(record)
+    return record
+
+
+class Metrics:
+    """Метрики процесу: останні перезапуски, гістограми фаз і сумарні лічильники кешів."""
+
+    def __init__(self, path=None, keep=1000, prometheus_interval=1.0):
+        self.path = Path(path) if path else None
+        self.recent = deque(maxlen=keep)
+        self._histograms = {}  # (розділ, фаза) → [кількості по BUCKETS + inf, сума]
+        self._caches = {}      # кеш → [влучання, промахи]
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._interval = prometheus_interval
+        self._written = 0.0
+
+    def add(self, record):
+        with self._lock:
+            self.recent.append(record)
+            for name, value in (('total', record['total']), *record['phases'].items()):
+                counts, total = self._histograms.get((record['section'], name), ([0] * (len(BUCKETS) + 1), 0.0))
+                counts[np.searchsorted(BUCKETS, value)] += 1
+                self._histograms[(record['section'], name)] = (counts, total + value)
+            for name, delta in record['caches'].items():
+                hits, misses = self._caches.get(name, (0, 0))
+                self._caches[name] = (hits + delta['hits'], misses + delta['misses'])
+        if self.path is not None:
+            self._export(record)
+
+    def _export(self, record):
+        with self._file_lock:
+            if self.path.suffix == '.prom':
+                now = time.monotonic()
+                if now - self._written >= self._interval:  # не частіше за раз на інтервал
+                    self._written = now
+                    _write_atomic(self.path, self.prometheus())
+            else:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def percentiles(self, section=None, qs=(50, 95, 99)):
+        """{фаза: {q: секунди}} за останніми перезапусками (розділ `section` або всі)."""
+        with self._lock:
+            records = [r for r in self.recent if section is None or r['section'] == section]
+        return summarize(records, qs)
+
+    def cache_totals(self):
+        with self._lock:
+            return {name: {'hits': h, 'misses': m} for name, (h, m) in self._caches.items()}
+
+    def prometheus(self):
+        """Текстовий формат Prometheus: гістограма nmt_rerun_seconds і лічильники кешів."""
+        lines = [
+            '# HELP nmt_rerun_seconds Час перезапуску дашборду за розділами і фазами.',
+            '# TYPE nmt_rerun_seconds histogram',
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            caches = sorted(self._caches.items())
+        for (section, name), (counts, total) in histograms:
+            labels = f'section="{section}",phase="{name}"'
+            cumulative = np.cumsum(counts)
+            for bound, count in zip((*BUCKETS, '+Inf'), cumulative):
+                lines.append(f'nmt_rerun_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'nmt_rerun_seconds_sum{{{labels}}} {total:.6f}')
+            lines.append(f'nmt_rerun_seconds_count{{{labels}}} {cumulative[-1]}')
+        lines += ['# HELP nmt_cache_requests_total Звернення до спільних кешів.',
+                  '# TYPE nmt_cache_requests_total counter']
+        for name, (hits, misses) in caches:
+            lines.append(f'nmt_cache_requests_total{{cache="{name}",result="hit"}} {hits}')
+            lines.append(f'nmt_cache_requests_total{{cache="{name}",result="miss"}} {misses}')
+        return '\n'.join(lines) + '\n'
+
+
+def summarize(records, qs=(50, 95, 99)):
+    """{фаза: {q: секунди}} для списку записів (також для рядків JSONL-файлу)."""
+    if not records:
+        return {}
+    columns = {'total': [r['total'] for r in records]}
+    for name in PHASES:
+        columns[name] = [r['phases'].get(name, 0.0) for r in records]
+    return {name: dict(zip(qs, np.percentile(values, qs).tolist())) for name, values in columns.items()}
+
+
+def read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _write_atomic(path, text):
+    """Prometheus-колектор не повинен побачити напівзаписаний файл."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+METRICS = Metrics(os.environ.get('NMT_METRICS'))
@@ -0,0 +1,157 @@
+"""Бутстреп і перевірка гіпотез для частот літер і успішності стратегій.
+
+Варіанти НМТ — одиниця вибірки: бутстреп-вибірка задається вагами
+(скільки разів кожен варіант потрапив у вибірку, мультиноміальний
+розподіл), тож усі лічильники 1-15 для тисяч вибірок — це одне множення
+матриці ваг (B, V) на one-hot відповіді (V, 15·5). Перестановочний тест
+так само множить маски груп на лічильники літер кожного варіанта.
+
+Вибірки рахуються шматками з незалежними потоками RNG з SeedSequence
+(як у simulate); розмір шматка залежить лише від кількості варіантів,
+тож результат для фіксованого seed не залежить від кількості процесів.
+"""
+from dataclasses import dataclass
+from math import erfc, exp, lgamma, log, sqrt
+
+import numpy as np
+
+from .backtest import one_hot
+from .dataset import LETTERS
+
+N_LETTERS = len(LETTERS)
+MAX_CELLS = 4_000_000  # елементів матриці ваг на шматок: B·V
+
+
+def chi2_sf(x, df):
+    """P(χ²(df) ≥ x) для цілого df без scipy: рекурсія по df від 1 або 2."""
+    if x <= 0:
+        return 1.0
+    half = x / 2
+    if df % 2:
+        sf, k = erfc(sqrt(half)), 1
+    else:
+        sf, k = exp(-half), 2
+    while k < df:
+        sf += exp((k / 2) * log(half) - half - lgamma(k / 2 + 1))
+        k += 2
+    return min(sf, 1.0)
+
+
+def chi_square(counts_a, counts_b):
+    """(статистика, ступені свободи, p) для таблиці 2×K лічильників; нульові стовпці відкидаються."""
+    table = np.vstack([counts_a, counts_b]).astype(np.float64)
+    table = table[:, table.sum(axis=0) > 0]
+    df = table.shape[1] - 1
+    if df < 1 or (table.sum(axis=1) == 0).any():
+        return 0.0, max(df, 0), 1.0
+    stat = float(_chi_square_stats(table[None])[0])
+    return stat, df, chi2_sf(stat, df)
+
+
+def _chi_square_stats(tables):
+    """(R, 2, K) таблиці → (R,) статистики χ² (стовпці з нулем очікуваного — без внеску)."""
+    rows = tables.sum(axis=2, keepdims=True)
+    cols = tables.sum(axis=1, keepdims=True)
+    expected = rows * cols / tables.sum(axis=(1, 2), keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(expected > 0, (tables - expected) ** 2 / expected, 0.0)
+    return terms.sum(axis=(1, 2))
+
+
+def percentile_interval(samples, level=0.95):
+    """(2, ...) — нижня і верхня межі перцентильного інтервалу по осі вибірок."""
+    tail = (1 - level) / 2 * 100
+    return np.percentile(samples, [tail, 100 - tail], axis=0)
+
+
+@dataclass(frozen=True)
+class BootstrapResult:
+    n_variants: int
+    letters: np.ndarray         # (B, 5) частка кожної літери серед відповідей 1-15
+    optimal_rates: np.ndarray   # (B, 15) успішність обраної (найчастішої в даних) літери кожного питання
+    strategy_rates: np.ndarray  # (B, S) частка вгаданих 1-15 для кожної зі STRATEGIES
+
+    @property
+    def n_resamples(self):
+        return len(self.letters)
+
+
+def _bootstrap_chunk(answers, choice, seed, size):
+    """answers — (V, 15·5) one-hot відповідей, choice — (15,) обрані літери.
+
+    Літери «Оптимальної» не перепідбираються в кожній вибірці: інтервал —
+    для успішності саме тієї таблиці, що показана (максимум по вибірці
+    був би зміщений угору).
+    """
+    rng = np.random.default_rng(seed)
+    n_variants = len(answers)
+    # ваги = скільки разів кожен варіант витягнуто (мультиноміальні), через один bincount
+    draws = rng.integers(n_variants, size=(size, n_variants)) + np.arange(size)[:, None] * n_variants
+    weights = np.bincount(draws.ravel(), minlength=size * n_variants).reshape(size, n_variants)
+    tests = (weights.astype(np.float64) @ answers).reshape(size, -1, N_LETTERS)  # float — через BLAS
+    n_questions = tests.shape[1]
+    letters = tests.sum(axis=1) / (n_variants * n_questions)
+    optimal = tests[:, np.arange(n_questions), choice] / n_variants
+    strategies = np.column_stack([optimal.mean(axis=1), letters, np.full(size, 1 / N_LETTERS)])
+    return letters, optimal, strategies
+
+
+def _run_chunk(args):
+    return _bootstrap_chunk(*args)
+
+
+def _chunks(n, chunk_size, seed):
+    sizes = [chunk_size] * (n // chunk_size) + ([n % chunk_size] if n % chunk_size else [])
+    return list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+
+def _map(fn, jobs, workers):
+    if workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor  # потрібен лише тут
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fn, jobs))
+    return [fn(job) for job in jobs]
+
+
+def bootstrap(dataset, years, n_resamples=20_000, seed=0, chunk_size=None, workers=1):
+    """Бутстреп по варіантах заданих років: частки літер, успішність питань і стратегій."""
+    tests = dataset.tests[dataset.year_mask(years)]
+    n_variants = len(tests)
+    if n_variants == 0:
+        empty = np.zeros((n_resamples, 0))
+        return BootstrapResult(0, empty, empty, empty)
+    answers = one_hot(tests).reshape(n_variants, -1).astype(np.float64)
+    choice = dataset.counts.total(years).optimal_letters
+    chunk_size = chunk_size or max(1, min(n_resamples, MAX_CELLS // n_variants))
+    jobs = [(answers, choice, s, size) for s, size in _chunks(n_resamples, chunk_size, seed)]
+    parts = _map(_run_chunk, jobs, workers)
+    letters, optimal, strategies = (np.concatenate(arrays) for arrays in zip(*parts))
+    return BootstrapResult(n_variants, letters, optimal, strategies)
+
+
+def _permutation_chunk(args):
+    letters, n_a, seed, size = args
+    rng = np.random.default_rng(seed)
+    # n_a найменших випадкових ключів — рівноймовірна підмножина (argpartition — O(n))
+    chosen = np.argpartition(rng.random((size, len(letters))), n_a - 1, axis=1)[:, :n_a]
+    in_a = np.zeros((size, len(letters)))
+    np.put_along_axis(in_a, chosen, 1.0, axis=1)
+    counts_a = in_a @ letters
+    tables = np.stack([counts_a, letters.sum(axis=0) - counts_a], axis=1)
+    return _chi_square_stats(tables)
+
+
+def permutation_test(dataset, years_a, years_b, n_permutations=20_000, seed=0, workers=1):
+    """(спостережена χ², p) — наскільки часто випадковий поділ варіантів дає таку ж різницю літер 1-15."""
+    letters_a = one_hot(dataset.tests[dataset.year_mask(years_a)]).sum(axis=1)
+    letters_b = one_hot(dataset.tests[dataset.year_mask(years_b)]).sum(axis=1)
+    letters = np.concatenate([letters_a, letters_b]).astype(np.float64)
+    if not len(letters_a) or not len(letters_b):
+        return 0.0, 1.0
+    observed = float(_chi_square_stats(np.stack([letters_a.sum(axis=0), letters_b.sum(axis=0)])[None])[0])
+    chunk_size = max(1, min(n_permutations, MAX_CELLS // len(letters)))
+    jobs = [(letters, len(letters_a), s, size) for s, size in _chunks(n_permutations, chunk_size, seed)]
+    stats = np.concatenate(_map(_permutation_chunk, jobs, workers))
+    # +1 у чисельнику і знаменнику: спостережений поділ — теж одна з перестановок
+    return observed, float((1 + (stats >= observed - 1e-9).sum()) / (1 + len(stats)))
+
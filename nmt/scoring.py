@@ -0,0 +1,92 @@
+"""Переведення тестових балів у шкалу НМТ і поверхня балів калькулятора.
+
+Поверхня рахується одним broadcast-ом для всіх стратегій і всіх
+положень повзунків, тож UI лише індексує готовий масив.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .dataset import LETTERS
+
+# Таблиця переводу балів
+SCORE_TABLE = {5: 100, 6: 108, 7: 115, 8: 123, 9: 131, 10: 134, 11: 137, 12: 140, 13: 143,
+               14: 145, 15: 147, 16: 148, 17: 149, 18: 150, 19: 151, 20: 152, 21: 155, 22: 159,
+               23: 163, 24: 167, 25: 170, 26: 173, 27: 176, 28: 180, 29: 184, 30: 189, 31: 194, 32: 200}
+
+# Окремі таблиці для років, де шкала відрізняється від SCORE_TABLE
+SCORE_TABLES = {}
+
+MAX_TEST_SCORE = 32
+MAX_1_15, MAX_16_18, MAX_19_22 = 15, 9, 8
+
+STRATEGIES = ('Оптимальна',) + tuple(f'Завжди {letter}' for letter in LETTERS) + ('Випадково',)
+
+
+def score_lut(table=SCORE_TABLE):
+    """Таблиця переводу → масив lut[тестовий бал] для 0..32."""
+    lut = np.zeros(MAX_TEST_SCORE + 1, dtype=np.int16)
+    for test_score, nmt_score in table.items():
+        lut[test_score] = nmt_score
+    lut.setflags(write=False)
+    return lut
+
+
+SCORE_LUT = score_lut()
+
+
+def score_lut_for(years):
+    """Спільна таблиця для набору років; якщо шкали різні — базова."""
+    tables = {id(SCORE_TABLES.get(y, SCORE_TABLE)) for y in years}
+    if len(tables) == 1 and years:
+        return score_lut(SCORE_TABLES.get(years[0], SCORE_TABLE))
+    return SCORE_LUT
+
+
+def nmt_scores(test_scores, lut=SCORE_LUT):
+    """Векторний аналог test_to_nmt_score: дробові бали округлюються вниз."""
+    idx = np.floor(np.asarray(test_scores, dtype=np.float64)).astype(np.intp)
+    return lut[np.clip(idx, 0, MAX_TEST_SCORE)]
+
+
+def test_to_nmt_score(test_score):
+    if test_score < 5: return 0
+    if test_score > 32: return 200
+    return SCORE_TABLE.get(int(test_score), 0)
+
+
+def guess_rates(aggregate):
+    """Ймовірність вгадати одне завдання 1-15 для кожної зі STRATEGIES."""
+    letter_rates = aggregate.letters / max(aggregate.n_answers, 1)
+    return np.concatenate(([aggregate.optimal_success], letter_rates, [1 / len(LETTERS)]))
+
+
+@dataclass(frozen=True)
+class ScoreSurface:
+    strategies: tuple
+    test: np.ndarray  # (S, 16, 10, 9) — [стратегія, known_1_15, known_16_18, known_19_22]
+    nmt: np.ndarray   # той самий shape, бал НМТ
+
+    def at(self, known_1_15, known_16_18, known_19_22):
+        idx = (slice(None), known_1_15, known_16_18, known_19_22)
+        return self.test[idx], self.nmt[idx]
+
+    def curves(self, known_16_18, known_19_22):
+        """Бал НМТ кожної стратегії залежно від known_1_15 = 0..15."""
+        return self.nmt[:, :, known_16_18, known_19_22]
+
+
+def score_surface(rates, lut=SCORE_LUT, strategies=STRATEGIES, match_guess=None):
+    """match_guess — (10,) очікувано вгаданих пар 16-18 для known_16_18 = 0..9 (або None)."""
+    rates = np.asarray(rates, dtype=np.float64)[:, None, None, None]
+    k1 = np.arange(MAX_1_15 + 1)[:, None, None]
+    k2 = np.arange(MAX_16_18 + 1)[:, None]
+    k3 = np.arange(MAX_19_22 + 1)
+
+    test = k1 + (MAX_1_15 - k1) * rates + k2 + k3
+    if match_guess is not None:
+        test = test + np.asarray(match_guess)[:, None]
+    nmt = nmt_scores(test, lut)
+    test.setflags(write=False)
+    nmt.setflags(write=False)
+    return ScoreSurface(tuple(strategies), test, nmt)
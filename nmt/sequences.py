@@ -0,0 +1,226 @@
+"""Послідовності в ключах 1-15: переходи між сусідніми питаннями, серії і профілі літер.
+
+Ключ варіанта — 15 кодів літер, тож пара сусідніх відповідей — одне
+ціле a·5+b (25 значень), трійка — 125. Лічильники переходів для кожної
+позиції, трійок і довжин серій однакових літер рахуються одним bincount
+по сплющеному індексу (рік, позиція, код) з окремою віссю року, як у
+aggregates.Counts: фільтр років — сума по цій осі, нові сесії додаються
+дельтою (SequenceCounts.updated), а P(q+1 | q) для будь-якого набору
+років — індекс у готовій таблиці. Профіль варіанта (кількості А..Д) —
+номер серед 3876 композицій числа 15 (completion.composition_rank).
+
+«Умовна» стратегія вгадує невідоме питання за відомою сусідньою
+відповіддю: найчастіша літера після відомої попередньої (або перед
+відомою наступною), інакше — найчастіша літера питання. На кількох
+десятках варіантів лічильники переходів дуже розріджені, тож її
+успішність оцінюється лише leave-one-out: внесок варіанта віднімається
+з лічильників, як у backtest.
+"""
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+
+from .backtest import expected_hits
+from .completion import CompletionModel, composition_rank, compositions
+from .dataset import LETTERS
+
+N_LETTERS = len(LETTERS)
+N_QUESTIONS = 15
+N_BIGRAMS = N_LETTERS ** 2
+N_TRIGRAMS = N_LETTERS ** 3
+CONTEXTS = ('previous', 'next', 'none')  # яка сусідня відповідь відома
+
+
+@dataclass(frozen=True)
+class SequenceAggregate:
+    years: tuple
+    n_variants: int
+    bigrams: np.ndarray   # (14, 5, 5) — [позиція q→q+1, літера q, літера q+1]
+    trigrams: np.ndarray  # (13, 125) — [позиція q→q+2, код трійки]
+    runs: np.ndarray      # (16,) — серій однакових літер довжини L
+    longest: np.ndarray   # (16,) — варіантів з найдовшою серією L
+    profiles: np.ndarray  # (3876,) — варіантів з кожним профілем літер (completion.compositions(15))
+
+    @cached_property
+    def tests(self):
+        """(15, 5) — ті самі лічильники, що й Aggregate.tests, з переходів."""
+        return np.vstack([self.bigrams.sum(axis=2), self.bigrams[-1].sum(axis=0)[None]])
+
+    @cached_property
+    def transitions(self):
+        """(14, 5, 5) — P(літера q+1 | літера q); рядки без спостережень — нулі."""
+        rows = self.bigrams.sum(axis=2, keepdims=True)
+        return _frozen(np.divide(self.bigrams, rows, out=np.zeros(self.bigrams.shape), where=rows > 0))
+
+    @cached_property
+    def pooled(self):
+        """(5, 5) — переходи, сумовані по всіх позиціях."""
+        return _frozen(self.bigrams.sum(axis=0))
+
+    @cached_property
+    def repeat_rates(self):
+        """(спостережена, очікувана при незалежних питаннях) частка «q+1 має ту саму літеру, що й q»."""
+        n = max(self.n_variants, 1)
+        observed = np.trace(self.bigrams, axis1=1, axis2=2).sum() / (n * (N_QUESTIONS - 1))
+        marginals = self.tests / n
+        independent = (marginals[:-1] * marginals[1:]).sum() / (N_QUESTIONS - 1)
+        return float(observed), float(independent)
+
+    @cached_property
+    def conditional_rates(self):
+        """(3, 15) — leave-one-out успішність за контекстом CONTEXTS для кожного питання.
+
+        Для відкладеного варіанта з парою (a, c) лічильник рядка a без
+        нього — bigrams[a] - e_c, тож результат однаковий для всіх варіантів
+        з цією парою і рахується для 25 пар, а не для кожного варіанта.
+        Рівні лічильники переходу розбиває частота літери питання.
+        """
+        n = max(self.n_variants, 1)
+        eye = np.eye(N_LETTERS, dtype=np.int64)
+        letters = np.arange(N_LETTERS)
+        rates = np.zeros((len(CONTEXTS), N_QUESTIONS))
+
+        marginal = self.tests[:, None, :] - eye              # (15, c, 5) — без свого варіанта
+        hits = expected_hits(marginal, np.broadcast_to(letters, (N_QUESTIONS, N_LETTERS)))
+        rates[2] = (self.tests * hits).sum(axis=1) / n
+
+        scale = n + 1  # лексикографічно: спершу перехід, потім частота літери
+        for q in range(N_QUESTIONS - 1):
+            for context, counts, target in ((0, self.bigrams[q], q + 1), (1, self.bigrams[q].T, q)):
+                # counts[a, c] — сусідня літера a, відповідь питання c
+                score = (counts[:, None, :] - eye) * scale + marginal[target][None]  # (a, c, 5)
+                hit = expected_hits(score, np.broadcast_to(letters, (N_LETTERS, N_LETTERS)))
+                rates[context, target] = (counts * hit).sum() / n
+        rates[0, 0] = rates[2, 0]    # у першого питання немає попереднього
+        rates[1, -1] = rates[2, -1]  # в останнього — наступного
+        return _frozen(rates)
+
+    def conditional_probs(self, known_1_15):
+        """(15,) — шанс вгадати невідоме питання, якщо відомі known_1_15 інших (випадкова підмножина).
+
+        Попередня відповідь відома з імовірністю k/14; якщо ні — наступна
+        з k/13; крайні питання мають лише одного сусіда.
+        """
+        previous, following, none = self.conditional_rates
+        k, others = known_1_15, N_QUESTIONS - 1
+        p_prev = k / others
+        p_next = (1 - p_prev) * (k / (others - 1))
+        probs = p_prev * previous + p_next * following + (1 - p_prev - p_next) * none
+        probs[0] = p_prev * following[0] + (1 - p_prev) * none[0]
+        probs[-1] = p_prev * previous[-1] + (1 - p_prev) * none[-1]
+        return probs
+
+    @cached_property
+    def guess_pmfs(self):
+        """(16, 16) — [невідомих 1-15, вгадано] для умовної стратегії, як Aggregate.guess_pmfs[s].
+
+        Середнє точне; розподіл наближений — події «сусід відомий» для
+        різних питань вважаються незалежними.
+        """
+        from .distribution import random_subset_pmfs
+        table = np.zeros((N_QUESTIONS + 1, N_QUESTIONS + 1))
+        for unknown in range(N_QUESTIONS + 1):
+            table[unknown] = random_subset_pmfs(self.conditional_probs(N_QUESTIONS - unknown))[unknown]
+        return _frozen(table)
+
+    @cached_property
+    def completion(self):
+        """Модель доповнення невідомих відповідей за відомими (див. completion)."""
+        return CompletionModel.fit(self.tests, self.profiles)
+
+
+def _frozen(array):
+    array.setflags(write=False)
+    return array
+
+
+@dataclass(frozen=True)
+class SequenceCounts:
+    years: tuple
+    n_variants: np.ndarray  # (Y,)
+    bigrams: np.ndarray     # (Y, 14, 25)
+    trigrams: np.ndarray    # (Y, 13, 125)
+    runs: np.ndarray        # (Y, 16)
+    longest: np.ndarray     # (Y, 16)
+    profiles: np.ndarray    # (Y, 3876)
+    _totals: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        n_years = len(dataset.years)
+        tensors = (
+            np.zeros(n_years, dtype=np.int64),
+            np.zeros((n_years, N_QUESTIONS - 1, N_BIGRAMS), dtype=np.int64),
+            np.zeros((n_years, N_QUESTIONS - 2, N_TRIGRAMS), dtype=np.int64),
+            np.zeros((n_years, N_QUESTIONS + 1), dtype=np.int64),
+            np.zeros((n_years, N_QUESTIONS + 1), dtype=np.int64),
+            np.zeros((n_years, len(compositions(N_QUESTIONS))), dtype=np.int64),
+        )
+        return cls._build(dataset, tensors, slice(None))
+
+    @classmethod
+    def updated(cls, previous, dataset, rows):
+        """Лічильники `dataset` з `previous` плюс внесок лише рядків `rows` (див. Counts.updated)."""
+        remap = [dataset.years.index(year) for year in previous.years]
+        tensors = []
+        for old in (previous.n_variants, previous.bigrams, previous.trigrams, previous.runs, previous.longest,
+                    previous.profiles):
+            array = np.zeros((len(dataset.years), *old.shape[1:]), dtype=np.int64)
+            array[remap] = old
+            tensors.append(array)
+        return cls._build(dataset, tensors, np.asarray(rows, dtype=np.intp))
+
+    @classmethod
+    def _build(cls, dataset, tensors, rows):
+        n_variants, bigrams, trigrams, runs, longest, profiles = tensors
+        n_years = len(n_variants)
+        y = dataset.year_idx[rows].astype(np.intp)
+        keys = dataset.tests[rows].astype(np.intp)
+
+        n_variants += np.bincount(y, minlength=n_years)
+        for counts, width in ((bigrams, 2), (trigrams, 3)):
+            positions = counts.shape[1]
+            codes = sum(keys[:, i:i + positions] * N_LETTERS ** (width - 1 - i) for i in range(width))
+            flat = (y[:, None] * positions + np.arange(positions)) * counts.shape[2] + codes
+            counts += np.bincount(flat.ravel(), minlength=counts.size).reshape(counts.shape)
+
+        if len(keys):
+            # серія починається там, де літера відрізняється від попередньої
+            starts = np.ones(keys.shape, dtype=bool)
+            starts[:, 1:] = keys[:, 1:] != keys[:, :-1]
+            run_id = np.cumsum(starts.ravel()) - 1
+            lengths = np.bincount(run_id)
+            run_year = np.repeat(y, starts.sum(axis=1))
+            runs += np.bincount(run_year * (N_QUESTIONS + 1) + lengths,
+                                minlength=runs.size).reshape(runs.shape)
+            first = np.concatenate(([0], np.cumsum(starts.sum(axis=1))[:-1]))
+            variant_longest = np.maximum.reduceat(lengths, first)
+            longest += np.bincount(y * (N_QUESTIONS + 1) + variant_longest,
+                                   minlength=longest.size).reshape(longest.shape)
+
+        letters = (keys[..., None] == np.arange(N_LETTERS)).sum(axis=1)
+        profiles += np.bincount(y * profiles.shape[1] + composition_rank(letters),
+                                minlength=profiles.size).reshape(profiles.shape)
+
+        for array in tensors:
+            array.setflags(write=False)
+        return cls(dataset.years, n_variants, bigrams, trigrams, runs, longest, profiles)
+
+    def total(self, years=None):
+        """Сумарні лічильники для підмножини років (None — всі роки); кеш на набір."""
+        key = self.years if years is None else tuple(y for y in self.years if y in set(years))
+        aggregate = self._totals.get(key)
+        if aggregate is None:
+            idx = [self.years.index(y) for y in key]
+            aggregate = SequenceAggregate(
+                years=key,
+                n_variants=int(self.n_variants[idx].sum()),
+                bigrams=_frozen(self.bigrams[idx].sum(axis=0).reshape(-1, N_LETTERS, N_LETTERS)),
+                trigrams=_frozen(self.trigrams[idx].sum(axis=0)),
+                runs=_frozen(self.runs[idx].sum(axis=0)),
+                longest=_frozen(self.longest[idx].sum(axis=0)),
+                profiles=_frozen(self.profiles[idx].sum(axis=0)),
+            )
+            self._totals[key] = aggregate
+        return aggregate
@@ -0,0 +1,220 @@
+"""Легкий JSON-сервіс калькулятора на asyncio без зовнішніх залежностей.
+
+    python -m nmt serve --port 8080 --warm
+    GET /calculator?known_1_15=10&known_16_18=6&known_19_22=4&strategy=0&years=2024,2025
+    GET /strategies?known_1_15=10&known_16_18=6&known_19_22=4&threshold=160
+    GET /stats
+
+Простір входів — кілька тисяч комбінацій, тож готові тіла відповідей
+зберігаються в LRU-кеші; час кожного запиту віддається в Server-Timing.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from . import analytics
+from .dataset import load_dataset
+from .diskcache import filters
+from .distribution import calculator_distribution
+from .scoring import MAX_1_15, MAX_16_18, MAX_19_22, STRATEGIES
+
+REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error',
+}
+# відповідей на один набір років: /strategies і кожна стратегія /calculator для всіх повзунків
+PER_FILTER = (MAX_1_15 + 1) * (MAX_16_18 + 1) * (MAX_19_22 + 1) * (len(STRATEGIES) + 1)
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _int_param(params, name, low, high, default):
+    raw = params.get(name, default)
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise BadRequest(f'{name} має бути цілим числом') from None
+    if not low <= value <= high:
+        raise BadRequest(f'{name} має бути в межах {low}..{high}')
+    return value
+
+
+class ScoringService:
+    """Маршрутизація і кеш відповідей; від HTTP не залежить."""
+
+    def __init__(self, dataset, cache_size=65536, path=None):
+        self.dataset = dataset
+        self.path = path
+        self.cache_size = cache_size
+        self._render = self._new_cache()
+        self.latencies = deque(maxlen=100_000)
+        self.requests = 0
+
+    def _years(self, params):
+        raw = params.get('years')
+        if not raw:
+            return self.dataset.years
+        years = tuple(y for y in self.dataset.years if y in set(raw.split(',')))
+        if not years or len(years) != len(set(raw.split(','))):
+            raise BadRequest(f"years: доступні {', '.join(self.dataset.years)}")
+        return years
+
+    def _strategy(self, params):
+        raw = params.get('strategy', '0')
+        if raw in STRATEGIES:
+            return STRATEGIES.index(raw)
+        return _int_param(params, 'strategy', 0, len(STRATEGIES) - 1, 0)
+
+    def _key(self, endpoint, params):
+        """Нормалізовані параметри — однакові запити з різним записом діляться кешем."""
+        known = (
+            _int_param(params, 'known_1_15', 0, MAX_1_15, 10),
+            _int_param(params, 'known_16_18', 0, MAX_16_18, 6),
+            _int_param(params, 'known_19_22', 0, MAX_19_22, 4),
+        )
+        threshold = _int_param(params, 'threshold', 100, 200, 150)
+        strategy = self._strategy(params) if endpoint == '/calculator' else None
+        return endpoint, self._years(params), known, threshold, strategy
+
+    def _new_cache(self):
+        """LRU відповідей; не менший за warm(), щоб прогрів не витісняв сам себе."""
+        size = max(self.cache_size, 2 * PER_FILTER * len(filters(self.dataset.years)))
+        return lru_cache(maxsize=size)(self._render_uncached)
+
+    def _render_uncached(self, endpoint, years, known, threshold, strategy):
+        aggregate = self.dataset.counts.total(years)
+        if endpoint == '/strategies':
+            payload = {
+                'years': list(years),
+                'known': list(known),
+                'threshold': threshold,
+                'strategies': analytics.strategy_comparison(aggregate, *known, threshold),
+            }
+        else:
+            test_scores, nmt_scores = aggregate.surface.at(*known)
+            dist = calculator_distribution(aggregate, strategy, *known)
+            payload = {
+                'years': list(years),
+                'known': list(known),
+                'strategy': STRATEGIES[strategy],
+                'test_score': float(test_scores[strategy]),
+                'nmt_score': int(nmt_scores[strategy]),
+                'mean_nmt': dist.mean_nmt,
+                'median_nmt': dist.median_nmt,
+                'threshold': threshold,
+                'p_at_least': dist.prob_at_least(threshold),
+                'percentiles': dist.percentiles(),
+                'distribution': dist.nmt_pmf(),
+            }
+        return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+    def _refresh(self):
+        """Нові сесії у файлі даних (ingest) — новий Dataset і порожній кеш відповідей."""
+        if self.path is None:
+            return
+        dataset = load_dataset(self.path)
+        if dataset is not self.dataset:
+            self.dataset = dataset
+            self._render = self._new_cache()
+
+    def stats(self):
+        info = self._render.cache_info()
+        latencies = np.array(self.latencies) * 1e3
+        return {
+            'requests': self.requests,
+            'cache': {'hits': info.hits, 'misses': info.misses, 'size': info.currsize},
+            'latency_ms': {
+                f'p{q}': float(np.percentile(latencies, q)) for q in (50, 90, 99)
+            } if len(latencies) else {},
+        }
+
+    def handle(self, method, target):
+        """(статус, тіло) для одного запиту."""
+        started = time.perf_counter()
+        url = urlsplit(target)
+        params = dict(parse_qsl(url.query))
+        try:
+            self._refresh()
+            if method != 'GET':
+                status, body = 405, {'error': 'лише GET'}
+            elif url.path in ('/calculator', '/strategies'):
+                status, body = 200, self._render(*self._key(url.path, params))
+            elif url.path == '/stats':
+                status, body = 200, self.stats()
+            elif url.path == '/health':
+                status, body = 200, {'status': 'ok', 'variants': self.dataset.n_variants}
+            else:
+                status, body = 404, {'error': f'невідомий шлях {url.path}'}
+        except BadRequest as exc:
+            status, body = 400, {'error': str(exc)}
+        except Exception as exc:  # напр. файл даних саме переписується — відповідь замість обірваного з'єднання
+            status, body = 500, {'error': f'{type(exc).__name__}: {exc}'}
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        elapsed = time.perf_counter() - started
+        self.requests += 1
+        self.latencies.append(elapsed)
+        return status, body, elapsed
+
+    def warm(self):
+        """Заповнює кеш усіма комбінаціями повзунків для всіх років разом і кожного окремо.
+
+        Це ті набори, що пропонує фільтр дашборду; інші рахуються при першому запиті.
+        """
+        for years in filters(self.dataset.years):
+            for k1 in range(MAX_1_15 + 1):
+                for k2 in range(MAX_16_18 + 1):
+                    for k3 in range(MAX_19_22 + 1):
+                        known = (k1, k2, k3)
+                        self._render('/strategies', years, known, 150, None)
+                        for strategy in range(len(STRATEGIES)):
+                            self._render('/calculator', years, known, 150, strategy)
+        return self._render.cache_info().currsize
+
+
+async def _serve_connection(service, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, version = request_line.decode('latin-1').split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if int(headers.get('content-length', 0)):
+                await reader.readexactly(int(headers['content-length']))
+
+            status, body, elapsed = service.handle(method, target)
+            keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+            writer.write(
+                f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+                f'Content-Type: application/json; charset=utf-8\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'Server-Timing: app;dur={elapsed * 1e3:.3f}\r\n'
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(service, host='127.0.0.1', port=8080):
+    """Обслуговує `service` по HTTP до зупинки (Ctrl+C); статистика лишається в service.stats()."""
+    server = await asyncio.start_server(lambda r, w: _serve_connection(service, r, w), host, port)
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,140 @@
+"""Результати, спільні для всіх сесій процесу і доступні лише для читання.
+
+Streamlit виконує скрипт заново для кожної сесії, але все, що залежить
+лише від даних і параметрів, рахується один раз на процес і живе на
+`Counts` (нові дані — новий `Counts`, тож кеш скидається сам). Сесії
+отримують ті самі об'єкти: словники як FrozenDict, списки як кортежі,
+масиви без права запису — випадкова зміна в одній сесії не зіпсує дані
+іншим.
+
+    rows = shared(DATA.counts, analytics.question_table, agg)
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .aggregates import Aggregate
+from .dataset import Dataset
+from .profiling import phase
+from .sequences import SequenceAggregate
+
+
+class SharedCache:
+    """Потокобезпечний LRU (сесії Streamlit — це потоки одного процесу)."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+        value = build()
+        with self._lock:
+            self.misses += 1
+            self._items[key] = value
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+    def peek(self, key):
+        """Значення без побудови (None, якщо його ще немає або його витіснено)."""
+        with self._lock:
+            return self._items.get(key)
+
+    def nbytes(self):
+        with self._lock:
+            values = list(self._items.values())
+        return sum(deep_size(value) for value in values)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class FrozenDict(dict):
+    """dict без змін на місці: pandas, json і шаблони бачать звичайний словник."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('спільний результат лише для читання')
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+def freeze(value):
+    """Незмінна копія результату: dict → FrozenDict, list → tuple, масиви — read-only."""
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, np.ndarray):
+        view = value.view()
+        view.setflags(write=False)
+        return view
+    return value
+
+
+def _key(value):
+    if isinstance(value, Aggregate):
+        return ('aggregate', value.years)
+    if isinstance(value, SequenceAggregate):
+        return ('sequences', value.years)
+    if isinstance(value, Dataset):
+        return ('dataset',)
+    if isinstance(value, list):
+        return tuple(_key(item) for item in value)
+    return value
+
+
+def shared(counts, fn, *args):
+    """fn(*args), порахований один раз на процес для даних `counts`; результат заморожений.
+
+    Аргументи мають бути хешованими, крім Aggregate/SequenceAggregate/Dataset тих самих даних.
+    """
+    key = (fn.__module__, fn.__qualname__, tuple(_key(arg) for arg in args))
+    with phase('compute'):
+        return counts.shared.get(key, lambda: freeze(fn(*args)))
+
+
+def deep_size(value, _seen=None):
+    """Приблизний розмір об'єкта з усім вкладеним, байт (масиви — за nbytes)."""
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + (value.nbytes if value.base is None else 0)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in value)
+    elif hasattr(value, '__dict__'):
+        size += deep_size(vars(value), seen)
+    return size
+
+
+def process_memory():
+    """{'rss': поточний RSS, 'peak_rss': піковий} у байтах (поточний — лише на Linux); None без `resource`."""
+    try:
+        import resource
+    except ImportError:  # Windows: модуль лише для Unix
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak *= 1 if sys.platform == 'darwin' else 1024
+    try:
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        rss = None
+    return {'rss': rss, 'peak_rss': peak}
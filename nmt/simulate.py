@@ -0,0 +1,194 @@
+"""Монте-Карло симуляція іспиту для того, що не описує точна модель.
+
+Генеруються синтетичні бланки відповідей проти реальних ключів:
+вгадування 16-18 без повторів літер, упереджене знання питань,
+змішані стратегії. Бланки рахуються пакетами NumPy; пакети можна
+розкидати по процесах, кожен зі своїм потоком RNG з SeedSequence,
+тож результат для фіксованого seed не залежить від кількості процесів.
+"""
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .dataset import LETTERS
+from .distribution import ScoreDistribution
+from .scoring import MAX_TEST_SCORE, SCORE_LUT, STRATEGIES
+
+N_LETTERS = len(LETTERS)
+MATCH_POLICIES = ('none', 'optimal', 'random')
+
+
+def strategy_matrices(aggregate):
+    """(S, 15, 5) — ймовірність обрати літеру для кожного питання в кожній зі STRATEGIES."""
+    n_questions = aggregate.tests.shape[0]
+    matrices = np.zeros((len(STRATEGIES), n_questions, N_LETTERS))
+    matrices[0, np.arange(n_questions), aggregate.optimal_letters] = 1
+    for letter in range(N_LETTERS):
+        matrices[1 + letter, :, letter] = 1
+    matrices[-1] = 1 / N_LETTERS
+    return matrices
+
+
+@dataclass(frozen=True)
+class SimulationSpec:
+    tests: np.ndarray          # (V, 15) ключі 1-15
+    matches: np.ndarray        # (V, 3, 3) ключі 16-18
+    strategies: np.ndarray     # (S, 15, 5) змішані стратегії для 1-15
+    match_letters: np.ndarray  # (3, 3) найчастіша літера кожної пари
+    known_1_15: int
+    known_16_18: int
+    known_19_22: int
+    match_policy: str = 'none'
+    known_weights: np.ndarray = None  # (15,) відносна легкість питань 1-15
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    strategies: tuple
+    test_hist: np.ndarray  # (S, 33) кількість бланків з кожним тестовим балом
+    lut: np.ndarray
+    complete: bool         # False, якщо зупинилися через time_budget
+
+    @property
+    def n_sheets(self):
+        return int(self.test_hist[0].sum())
+
+    def distribution(self, idx):
+        return ScoreDistribution(self.test_hist[idx] / max(self.n_sheets, 1), self.lut)
+
+    def mean_nmt(self):
+        return self.test_hist @ self.lut / max(self.n_sheets, 1)
+
+    def confidence_intervals(self, z=1.96):
+        """(S, 2) — довірчий інтервал середнього балу НМТ (нормальне наближення)."""
+        n = max(self.n_sheets, 1)
+        mean = self.mean_nmt()
+        var = self.test_hist @ (self.lut.astype(np.float64) ** 2) / n - mean ** 2
+        half = z * np.sqrt(np.maximum(var, 0) / n)
+        return np.column_stack([mean - half, mean + half])
+
+
+def _choose_known(rng, batch, n_items, k, weights=None):
+    """(batch, n_items) bool — k відомих елементів на бланк (Gumbel top-k)."""
+    keys = rng.random((batch, n_items))
+    if weights is not None:
+        keys = np.log(weights) - np.log(-np.log(keys))
+    known = np.zeros((batch, n_items), dtype=bool)
+    if k:
+        top = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+        np.put_along_axis(known, top, True, axis=1)
+    return known
+
+
+def _sample_letters(rng, probs, batch):
+    """Літери за (15, 5) ймовірностями для кожного з batch бланків."""
+    if (probs.max(axis=1) == 1).all():
+        return probs.argmax(axis=1)  # чиста стратегія — однакова для всіх бланків
+    if np.allclose(probs, 1 / N_LETTERS):
+        return rng.integers(N_LETTERS, size=(batch, probs.shape[0]))
+    cdf = np.cumsum(probs, axis=-1)
+    u = rng.random((batch, probs.shape[0], 1))
+    return np.minimum((u > cdf).sum(axis=-1), N_LETTERS - 1)
+
+
+def _match_points(rng, spec, keys, batch):
+    known = _choose_known(rng, batch, 9, spec.known_16_18).reshape(batch, 3, 3)
+    points = known.sum(axis=(1, 2))
+    if spec.match_policy == 'optimal':
+        points += ((~known) & (keys == spec.match_letters)).sum(axis=(1, 2))
+    elif spec.match_policy == 'random':
+        # Випадкова перестановка літер, у якій уже використані відомими парами
+        # літери стоять в кінці; невідомі пари беруть з неї літери по черзі.
+        used = np.zeros((batch, 3, N_LETTERS), dtype=bool)
+        b, t, p = np.nonzero(known)
+        used[b, t, keys[b, t, p]] = True
+        perm = np.argsort(rng.random((batch, 3, N_LETTERS)) + used, axis=-1)
+        rank = np.cumsum(~known, axis=-1) - 1
+        guesses = np.take_along_axis(perm, np.clip(rank, 0, N_LETTERS - 1), axis=-1)
+        points += ((~known) & (guesses == keys)).sum(axis=(1, 2))
+    return points
+
+
+def _simulate_chunk(spec, seed, n_sheets, batch_size):
+    rng = np.random.default_rng(seed)
+    n_strategies = len(spec.strategies)
+    hist = np.zeros((n_strategies, MAX_TEST_SCORE + 1), dtype=np.int64)
+    done = 0
+    while done < n_sheets:
+        batch = min(batch_size, n_sheets - done)
+        variant = rng.integers(len(spec.tests), size=batch)
+        keys = spec.tests[variant]
+        known = _choose_known(rng, batch, keys.shape[1], spec.known_1_15, spec.known_weights)
+        # Одні й ті самі бланки для всіх стратегій — чесніше порівняння
+        fixed = _match_points(rng, spec, spec.matches[variant], batch) + spec.known_19_22 + known.sum(axis=1)
+        for s, probs in enumerate(spec.strategies):
+            guesses = _sample_letters(rng, probs, batch)
+            total = fixed + ((~known) & (guesses == keys)).sum(axis=1)
+            hist[s] += np.bincount(np.minimum(total, MAX_TEST_SCORE), minlength=MAX_TEST_SCORE + 1)
+        done += batch
+    return hist
+
+
+def _run_chunk(args):
+    return _simulate_chunk(*args)
+
+
+def simulate(spec, n_sheets=1_000_000, seed=0, chunk_size=250_000, batch_size=50_000,
+             workers=1, time_budget=None, lut=None, names=STRATEGIES):
+    """Гістограми тестових балів для кожної стратегії.
+
+    n_sheets ділиться на фіксовані шматки з незалежними потоками RNG;
+    time_budget (секунди) обмежує час — тоді complete=False і рахуються
+    лише завершені шматки.
+    """
+    lut = SCORE_LUT if lut is None else lut
+    sizes = [chunk_size] * (n_sheets // chunk_size)
+    if n_sheets % chunk_size:
+        sizes.append(n_sheets % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(spec, s, size, batch_size) for s, size in zip(seeds, sizes)]
+
+    hist = np.zeros((len(spec.strategies), MAX_TEST_SCORE + 1), dtype=np.int64)
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    finished = 0
+    if workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor  # ~15 мс імпорту, потрібен лише тут
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [pool.submit(_run_chunk, job) for job in jobs]
+            for future in futures:
+                timeout = None if deadline is None else max(deadline - time.perf_counter(), 0)
+                try:
+                    hist += future.result(timeout=timeout)
+                except TimeoutError:
+                    break
+                finished += 1
+        finally:
+            # не чекаємо шматків, що не вклалися в time_budget
+            pool.shutdown(wait=finished == len(jobs), cancel_futures=True)
+    else:
+        for job in jobs:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            hist += _run_chunk(job)
+            finished += 1
+
+    return SimulationResult(tuple(names), hist, lut, complete=finished == len(jobs))
+
+
+def calculator_spec(dataset, aggregate, known_1_15, known_16_18, known_19_22,
+                    match_policy='none', known_weights=None):
+    """Специфікація симуляції для положення повзунків калькулятора."""
+    mask = dataset.year_mask(aggregate.years)
+    return SimulationSpec(
+        tests=dataset.tests[mask],
+        matches=dataset.matches[mask],
+        strategies=strategy_matrices(aggregate),
+        match_letters=aggregate.matches.argmax(axis=-1),
+        known_1_15=known_1_15,
+        known_16_18=known_16_18,
+        known_19_22=known_19_22,
+        match_policy=match_policy,
+        known_weights=known_weights,
+    )
@@ -0,0 +1,70 @@
+"""Звіт холодного старту дашборду: імпорти і перший рендер кожного розділу.
+
+    python -m nmt startup
+    python -m nmt startup --json --repeat 3
+
+Кожен розділ відкривається в окремому свіжому процесі з `-X importtime`
+(через `?section=...`), тож модулі й дані не переносяться між вимірами.
+Streamlit імпортується до старту скрипта — як і в `streamlit run`, де
+його вантажить сервер — і в час рендеру не входить.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+APP_PATH = Path(__file__).resolve().parent.parent / 'app.py'
+SECTIONS = ('calculator', 'stats', 'strategies', 'compare')
+HEAVY_MODULES = ('numpy', 'pandas', 'pyarrow', 'plotly.graph_objects', 'plotly.validators')
+
+_CHILD = '''
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+before = set(sys.modules)
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+app.query_params["section"] = sys.argv[2]
+started = time.perf_counter()
+app.run()
+print(json.dumps({
+    "first_render_s": time.perf_counter() - started,
+    "loaded": sorted(m for m in sys.argv[3:] if m in sys.modules and m not in before),
+    "errors": [str(e.value) for e in app.exception],
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """{модуль: (сукупний час імпорту в с, чи верхнього рівня)} з виводу `-X importtime`."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(cumulative) / 1e6, not name.startswith('  '))
+    return modules
+
+
+def measure(section, app_path=APP_PATH):
+    """Один холодний запуск розділу в новому процесі."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _CHILD, str(app_path), section, *HEAVY_MODULES],
+        capture_output=True, text=True, cwd=Path(app_path).parent, check=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(proc.stderr)
+    return {
+        'section': section,
+        'first_render_s': result['first_render_s'],
+        'total_import_s': sum(seconds for seconds, top in modules.values() if top),
+        'heavy_imports_s': {name: modules[name][0] for name in result['loaded'] if name in modules},
+        'errors': result['errors'],
+    }
+
+
+def startup_report(sections=SECTIONS, repeat=1, app_path=APP_PATH):
+    """Найкращий з `repeat` холодних запусків для кожного розділу."""
+    rows = []
+    for section in sections:
+        runs = [measure(section, app_path) for _ in range(repeat)]
+        rows.append(min(runs, key=lambda run: run['first_render_s']))
+    return rows
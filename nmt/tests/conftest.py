@@ -0,0 +1,11 @@
+import os
+
+import pytest
+
+os.environ['NMT_CACHE'] = 'off'  # тести не пишуть дисковий кеш поруч з даними
+
+
+@pytest.fixture(scope='session')
+def dataset():
+    from nmt import load_dataset
+    return load_dataset()
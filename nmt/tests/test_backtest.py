@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from nmt.backtest import leave_one_out
+
+
+def _naive_hit(counts, key):
+    """Найчастіша літера; нічия розігрується рівномірно."""
+    best = np.flatnonzero(counts == counts.max())
+    return (key in best) / len(best)
+
+
+@pytest.mark.parametrize('single_year', [False, True])
+def test_leave_one_out_matches_refit(dataset, single_year):
+    """Кожен варіант оцінюється лічильниками, перерахованими з нуля без нього."""
+    years = dataset.years[:1] if single_year else None
+    result = leave_one_out(dataset, years)
+    mask = dataset.year_mask(dataset.years if years is None else years)
+    tests, matches = dataset.tests[mask], dataset.matches[mask]
+    for i in range(len(tests)):
+        others = np.delete(np.arange(len(tests)), i)
+        counts = (tests[others][..., None] == np.arange(5)).sum(axis=0)
+        optimal = np.mean([_naive_hit(counts[q], tests[i, q]) for q in range(15)])
+        pair_counts = (matches[others][..., None] == np.arange(5)).sum(axis=0)
+        pairs = np.mean([_naive_hit(pair_counts[t, p], matches[i, t, p]) for t in range(3) for p in range(3)])
+        assert result.per_variant[0, i] == pytest.approx(optimal)
+        assert result.pairs_per_variant[i] == pytest.approx(pairs)
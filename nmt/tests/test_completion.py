@@ -0,0 +1,58 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from nmt.completion import SPREAD, CompletionModel, composition_rank, compositions
+from nmt.dataset import LETTERS
+
+
+def _brute_force(model, known):
+    """Апостеріорні P(літера) і найімовірніше доповнення перебором усіх 5^k доповнень."""
+    unknown = [q for q, letter in enumerate(known) if letter is None]
+    key = np.array([-1 if letter is None else LETTERS.index(letter) for letter in known])
+    marginals, total, best, best_weight = np.zeros((15, 5)), 0.0, None, -1.0
+    for fill in product(range(5), repeat=len(unknown)):
+        key[unknown] = fill
+        weight = np.prod(model.priors[unknown, list(fill)]) if unknown else 1.0
+        weight *= model.weights[composition_rank(np.bincount(key, minlength=5))]
+        marginals[unknown, list(fill)] += weight
+        total += weight
+        if weight > best_weight:
+            best, best_weight = key.copy(), weight
+    return marginals / total, tuple(int(c) for c in best), best_weight / total
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_solve_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    tests = rng.integers(0, 12, size=(15, 5))
+    profiles = rng.integers(0, 3, size=len(SPREAD))
+    model = CompletionModel.fit(tests, profiles)
+    known = [LETTERS[c] for c in rng.integers(5, size=15)]
+    for q in rng.choice(15, size=6, replace=False):
+        known[q] = None
+    result = model.solve(known)
+    marginals, likeliest, prob = _brute_force(model, known)
+    unknown = list(result.unknown)
+    assert np.allclose(result.marginals[unknown], marginals[unknown])
+    assert result.likeliest == likeliest
+    assert result.likeliest_prob == pytest.approx(prob)
+    assert result.expected_correct == pytest.approx(marginals[unknown].max(axis=1).sum())
+
+
+def test_compositions_are_ranked():
+    comps = compositions(15)
+    assert len(comps) == 3876 and (comps.sum(axis=1) == 15).all()
+    assert np.array_equal(composition_rank(comps), np.arange(len(comps)))
+
+
+def test_fitted_model_on_data(dataset):
+    """Модель з реальних даних: марґінали — розподіли, відомі відповіді не змінюються."""
+    model = dataset.sequences.total().completion
+    known = [None] * 15
+    known[:10] = 'АБВГДАБВГД'
+    result = model.solve(known)
+    assert np.allclose(result.marginals.sum(axis=1), 1.0)
+    assert [LETTERS[c] for c in result.likeliest[:10]] == list('АБВГДАБВГД')
+    assert model.solve([None] * 15).expected_correct > 0
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from nmt import diskcache
+from nmt.dataset import DEFAULT_DATA_PATH, from_dict, read_raw
+
+
+def _fresh():
+    return from_dict(read_raw(DEFAULT_DATA_PATH))
+
+
+def _assert_same(restored, original, name):
+    assert type(restored) is type(original), name
+    if isinstance(original, np.ndarray):
+        assert np.array_equal(restored, original, equal_nan=True), name
+        return
+    for field in diskcache._stored_fields(type(original)):
+        a, b = getattr(restored, field), getattr(original, field)
+        if isinstance(b, tuple):  # роки, назви політик: _decode має повернути ті самі кортежі
+            assert type(a) is tuple and a == b, f'{name}.{field}'
+        else:
+            assert np.array_equal(a, b, equal_nan=True), f'{name}.{field}'
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('NMT_CACHE', str(tmp_path))
+    return tmp_path
+
+
+def test_round_trip_every_class(cache):
+    """dump → .npz → restore відтворює кожен кешований клас, включно з кортежами рядків."""
+    data = _fresh()
+    assert not diskcache.attach(data, DEFAULT_DATA_PATH)
+    restored = _fresh()
+    assert diskcache.attach(restored, DEFAULT_DATA_PATH)
+
+    classes = diskcache._classes()
+    for name in ('counts', 'sequences'):
+        assert name in restored.__dict__
+        _assert_same(getattr(restored, name), getattr(data, name), name)
+    for years in diskcache.filters(data.years):
+        aggregate = restored.counts.total(years)
+        for name in diskcache.AGGREGATE_PROPERTIES:
+            assert name in aggregate.__dict__, (years, name)
+            value = getattr(aggregate, name)
+            _assert_same(value, getattr(data.counts.total(years), name), f'{years}:{name}')
+            assert classes[name] is None or isinstance(value, classes[name])
+    assert set(classes) == {'counts', 'sequences', *diskcache.AGGREGATE_PROPERTIES}  # перевірено все
+
+
+def test_corrupt_entry_is_recomputed(cache):
+    data = _fresh()
+    diskcache.attach(data, DEFAULT_DATA_PATH)
+    entry = diskcache.entry_path(data, DEFAULT_DATA_PATH)
+    entry.write_bytes(entry.read_bytes()[:len(entry.read_bytes()) // 2])
+    assert diskcache.read_entry(entry) is None
+
+    restored = _fresh()
+    assert not diskcache.attach(restored, DEFAULT_DATA_PATH)  # перерахунок замість помилки
+    _assert_same(restored.counts.total().policy, data.counts.total().policy, 'policy')
+    assert diskcache.read_entry(entry) is not None  # і запис переписано
+
+
+def test_cache_off(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for setting in ('off', '0', 'false'):
+        monkeypatch.setenv('NMT_CACHE', setting)
+        data = _fresh()
+        assert diskcache.cache_dir(DEFAULT_DATA_PATH) is None
+        assert diskcache.entry_path(data, DEFAULT_DATA_PATH) is None
+        assert not diskcache.attach(data, DEFAULT_DATA_PATH)
+        assert 'policy' not in data.counts.total().__dict__
+    assert not diskcache.cache_dir(DEFAULT_DATA_PATH) and not list(tmp_path.iterdir())
+
+
+def test_entry_follows_code_version(cache, monkeypatch):
+    """Зміна коду дає новий запис, а старий того ж файлу даних видаляється."""
+    data = _fresh()
+    assert not diskcache.attach(data, DEFAULT_DATA_PATH)
+    first = diskcache.entry_path(data, DEFAULT_DATA_PATH)
+    assert diskcache.attach(_fresh(), DEFAULT_DATA_PATH)
+
+    monkeypatch.setattr(diskcache, 'code_version', lambda: 'changed')
+    assert not diskcache.attach(_fresh(), DEFAULT_DATA_PATH)
+    assert not first.exists()
+    assert len(list(cache.glob('*.npz'))) == 1
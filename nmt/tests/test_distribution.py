@@ -0,0 +1,38 @@
+from itertools import combinations, product
+
+import numpy as np
+import pytest
+
+from nmt.distribution import poisson_binomial, random_subset_pmfs
+
+
+def _enumerate(probs):
+    """pmf кількості успіхів перебором усіх 2^n результатів."""
+    pmf = np.zeros(len(probs) + 1)
+    for outcome in product((0, 1), repeat=len(probs)):
+        pmf[sum(outcome)] += np.prod([p if hit else 1 - p for p, hit in zip(probs, outcome)])
+    return pmf
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_poisson_binomial_matches_enumeration(seed):
+    probs = np.random.default_rng(seed).random(8)
+    assert np.allclose(poisson_binomial(probs), _enumerate(probs))
+
+
+def test_poisson_binomial_edges():
+    assert np.allclose(poisson_binomial([]), [1.0])
+    assert np.allclose(poisson_binomial([0.0, 1.0, 1.0]), [0, 0, 1, 0])
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_random_subset_pmfs_matches_subsets(seed):
+    """table[k] — середнє pmf по всіх C(n, k) підмножинах невідомих питань."""
+    probs = np.random.default_rng(seed).random(7)
+    table = random_subset_pmfs(probs)
+    for k in range(len(probs) + 1):
+        subsets = list(combinations(range(len(probs)), k))
+        expected = np.zeros(len(probs) + 1)
+        for subset in subsets:
+            expected[:k + 1] += poisson_binomial(probs[list(subset)])
+        assert np.allclose(table[k], expected / len(subsets))
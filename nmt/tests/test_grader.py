@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from nmt.dataset import LETTERS
+from nmt.grader import (
+    MATCH_COLUMNS, OPEN_COLUMNS, TEST_COLUMNS, AnswerKeys, grade_file, grade_frame, read_chunks,
+)
+from nmt.scoring import score_lut_for
+
+pd = pytest.importorskip('pandas')
+
+LATIN = {'А': 'A', 'В': 'B'}
+SINGLE = {**{letter: letter for letter in LETTERS}, 'A': 'А', 'B': 'В'}
+
+
+def _sheets(dataset, n, seed=0):
+    """Бланки з правильними й хибними відповідями, латиницею, пропусками і невалідними клітинками."""
+    rng = np.random.default_rng(seed)
+    keys = AnswerKeys.from_dataset(dataset)
+    rows = []
+    for i in range(n):
+        v = rng.integers(len(keys.sessions) + 1)  # останній — невідома сесія
+        year, date = keys.sessions[v].split('/') if v < len(keys.sessions) else ('1999', '01.01')
+        v = min(v, len(keys.sessions) - 1)
+        row = {'id': str(i), 'year': year, 'date': date}
+        for q, column in enumerate(TEST_COLUMNS):
+            letter = LETTERS[keys.tests[v, q]] if rng.random() < 0.6 else LETTERS[rng.integers(5)]
+            cell = rng.choice(['letter', 'latin', 'blank', 'double', 'junk'], p=[0.75, 0.1, 0.07, 0.04, 0.04])
+            row[column] = {'letter': letter, 'latin': LATIN.get(letter, letter), 'blank': '',
+                           'double': letter + 'Б', 'junk': 'C'}[cell]
+        for t, column in enumerate(MATCH_COLUMNS):
+            letters = [LETTERS[c] if rng.random() < 0.6 else rng.choice([*LETTERS, '?']) for c in keys.matches[v, t]]
+            row[column] = rng.choice(['', '-']).join(letters) if rng.random() < 0.95 else 'АБВГ'
+        for t, column in enumerate(OPEN_COLUMNS):
+            value = keys.numeric[v, t] if rng.random() < 0.6 else rng.integers(100)
+            row[column] = rng.choice([str(value).replace('.', ','), str(value), '', 'x'], p=[0.2, 0.6, 0.1, 0.1])
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _letters(cell, width):
+    """Наївний розбір клітинки: список літер (None — пропуск) або None, якщо клітинка невалідна."""
+    cell = cell.strip().upper()
+    if cell.strip('-? ') == '':
+        return [None] * width
+    tokens = cell.split('-') if '-' in cell else list(cell)
+    if len(tokens) > width or any(t not in SINGLE and t not in ('', '?') for t in tokens):
+        return None
+    return [SINGLE.get(t) for t in tokens] + [None] * (width - len(tokens))
+
+
+def _naive(row, dataset):
+    """Бали одного бланка простим перебором, незалежно від векторного коду."""
+    sessions = list(zip(dataset.year_labels(), dataset.dates))
+    if (row['year'], row['date']) not in sessions:
+        return None
+    v = sessions.index((row['year'], row['date']))
+    invalid, points = [], [0, 0, 0]
+    for q, column in enumerate(TEST_COLUMNS):
+        parsed = _letters(row[column], 1)
+        if parsed is None:
+            invalid.append(column)
+        elif parsed[0] == LETTERS[dataset.tests[v, q]]:
+            points[0] += 1
+    for t, column in enumerate(MATCH_COLUMNS):
+        parsed = _letters(row[column], 3)
+        if parsed is None:
+            invalid.append(column)
+        else:
+            points[1] += sum(letter == LETTERS[c] for letter, c in zip(parsed, dataset.matches[v, t]))
+    for t, column in enumerate(OPEN_COLUMNS):
+        try:
+            value = float(row[column].replace(',', '.')) if row[column] else None
+        except ValueError:
+            invalid.append(column)
+            continue
+        if value is not None and abs(value - dataset.numeric[v, t]) <= 1e-6:
+            points[2] += 2
+    test_score = sum(points)
+    return [*points, test_score, int(score_lut_for((row['year'],))[min(test_score, 32)]), ';'.join(invalid)]
+
+
+def test_grade_frame_matches_naive_grader(dataset):
+    sheets = _sheets(dataset, 600)
+    result = grade_frame(sheets, AnswerKeys.from_dataset(dataset))
+    columns = ['points_1_15', 'points_16_18', 'points_19_22', 'test_score', 'nmt_score', 'invalid']
+    for (_, row), (_, graded) in zip(sheets.iterrows(), result.iterrows()):
+        expected = _naive(row, dataset)
+        if expected is None:
+            assert graded[columns[:-1]].isna().all()
+        else:
+            assert [graded[c] if c == 'invalid' else int(graded[c]) for c in columns] == expected
+
+
+def test_grade_file_chunks_match_one_frame(dataset, tmp_path):
+    sheets = _sheets(dataset, 250, seed=1)
+    src, dst = tmp_path / 'sheets.csv', tmp_path / 'results.csv'
+    sheets.to_csv(src, index=False)
+    summary = grade_file(src, dst, dataset, chunk_size=37)
+    whole = grade_frame(next(read_chunks(src, chunk_size=10_000)), AnswerKeys.from_dataset(dataset))
+    chunked = pd.read_csv(dst, dtype={'id': str, 'year': str, 'date': str}, keep_default_na=False)
+    assert summary['rows'] == len(sheets)
+    assert summary['invalid_rows'] == int((whole['invalid'] != '').sum())
+    for column in ('test_score', 'nmt_score'):
+        assert chunked[column].astype(str).tolist() == whole[column].astype(str).replace('<NA>', '').tolist()
@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+
+from nmt.aggregates import Counts
+from nmt.dataset import DEFAULT_DATA_PATH, LETTERS, from_dict, load_dataset, read_raw
+from nmt.ingest import add_session
+from nmt.sequences import SequenceCounts
+
+
+def _session(rng):
+    return {
+        '1-15': [LETTERS[c] for c in rng.integers(5, size=15)],
+        **{str(t): [LETTERS[c] for c in rng.permutation(5)[:3]] for t in (16, 17, 18)},
+        '19-22': [float(x) for x in rng.integers(1000, size=4)],
+    }
+
+
+def _assert_same_counts(dataset, path):
+    """Лічильники після дельт дорівнюють повному перерахунку з файлу."""
+    full = from_dict(read_raw(path))
+    assert dataset.years == full.years
+    for name in ('year_idx', 'dates', 'tests', 'matches', 'numeric'):
+        assert np.array_equal(getattr(dataset, name), getattr(full, name))
+    for cls, delta in ((Counts, dataset.counts), (SequenceCounts, dataset.sequences)):
+        recount = cls.from_dataset(full)
+        for name in set(cls.__dataclass_fields__) - {'years', '_totals'}:
+            assert np.array_equal(getattr(delta, name), getattr(recount, name)), name
+
+
+@contextmanager
+def _no_recount(monkeypatch):
+    """Усередині повний перерахунок лічильників — помилка тесту: лише дельти."""
+    with monkeypatch.context() as patch:
+        for cls in (Counts, SequenceCounts):
+            patch.setattr(cls, 'from_dataset', classmethod(lambda cls, dataset: pytest.fail('повний перерахунок')))
+        yield
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / 'data.json'
+    shutil.copy(DEFAULT_DATA_PATH, path)
+    return path
+
+
+def test_ingest_delta_matches_recount(data_file, monkeypatch):
+    rng = np.random.default_rng(0)
+    load_dataset(data_file).sequences  # дельта застосовується і до вже побудованих sequences
+    for year, date in (('2025', '01.07'), ('2026', '01.06'), ('2023', '01.06'), ('2026', '02.06')):
+        with _no_recount(monkeypatch):
+            add_session(year, date, _session(rng), data_file)
+            dataset = load_dataset(data_file)
+            dataset.counts, dataset.sequences
+        _assert_same_counts(dataset, data_file)
+    assert list(json.loads(data_file.read_text(encoding='utf-8'))) == sorted(load_dataset(data_file).years)
+
+
+def test_other_process_append_uses_delta(data_file, monkeypatch):
+    """Файл дописав інший процес: load_dataset бачить нові рядки і застосовує лише їх внесок."""
+    rng = np.random.default_rng(1)
+    before = load_dataset(data_file)
+    before.sequences
+    raw = read_raw(data_file)
+    raw.setdefault('2025', {})['09.09'] = _session(rng)
+    raw['2027'] = {'01.06': _session(rng)}
+    data_file.write_text(json.dumps(raw, ensure_ascii=False), encoding='utf-8')
+    stat = data_file.stat()
+    os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    with _no_recount(monkeypatch):
+        after = load_dataset(data_file)
+        after.counts, after.sequences
+    assert after is not before and after.n_variants == before.n_variants + 2
+    _assert_same_counts(after, data_file)
+
+
+def test_duplicate_session_rejected(data_file):
+    year, date = next(iter(load_dataset(data_file).sessions))
+    with pytest.raises(ValueError):
+        add_session(year, date, _session(np.random.default_rng(2)), data_file)
+
+
+def test_ingest_seeds_disk_cache(data_file, tmp_path, monkeypatch):
+    """Після ingest у дисковому кеші новий запис; заново розв'язуються лише набори з роком сесії."""
+    from nmt import diskcache
+    from nmt.policy import PolicyTable
+
+    monkeypatch.setenv('NMT_CACHE', str(tmp_path / 'cache'))
+    load_dataset(data_file)
+    solved = []
+    solve = PolicyTable.solve.__func__
+    monkeypatch.setattr(PolicyTable, 'solve', classmethod(lambda cls, aggregate: solved.append(aggregate.years)
+                                                          or solve(cls, aggregate)))
+    add_session('2025', '01.07', _session(np.random.default_rng(3)), data_file)
+    dataset = load_dataset(data_file)
+    assert sorted(solved) == sorted(years for years in diskcache.filters(dataset.years) if '2025' in years)
+
+    entry = diskcache.entry_path(dataset, data_file)
+    assert [p.name for p in entry.parent.glob('*.npz')] == [entry.name]
+    stored = diskcache.read_entry(entry)
+    fresh = diskcache.dump(from_dict(read_raw(data_file)))
+    assert stored.keys() == fresh.keys()
+    for name, array in fresh.items():
+        assert np.array_equal(stored[name], array), name
+
+
+def test_binary_copy_refreshed_lazily(data_file, monkeypatch):
+    """Ingest не переписує бінарну копію; її оновлює наступне читання JSON в іншому процесі."""
+    from nmt import binary, dataset as dataset_module
+
+    binary.export_binary(data_file)
+    monkeypatch.setattr(binary, 'export_binary', lambda path: pytest.fail('повний експорт'))
+    add_session('2025', '01.07', _session(np.random.default_rng(4)), data_file)
+    stamp = dataset_module._stamp(data_file)
+    assert binary.load_binary(data_file, stamp) is None
+
+    monkeypatch.setattr(dataset_module, '_CACHE', {})  # інший процес
+    load_dataset(data_file)
+    copy = binary.load_binary(data_file, stamp)
+    assert copy is not None
+    _assert_same_counts(copy, data_file)
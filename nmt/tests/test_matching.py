@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from nmt.matching import MASKS, UNKNOWN_AGREE, MatchTables, N_STATES
+
+
+def test_expected_guess_non_increasing(dataset):
+    """Кожна відома пара — це одна невідома менше; на нових варіантах вона не додає більше за себе.
+
+    Лише для 'expected': 'exact' максимізує P(вгадати все), а не кількість.
+    """
+    for years in [dataset.years, *((year,) for year in dataset.years)]:
+        tables = dataset.counts.total(years).match_tables
+        assert np.allclose(tables.guess_pmfs.sum(axis=1), 1.0)
+        assert (np.diff(tables.expected_guess) <= 1e-12).all()
+
+
+def test_best_points_leave_one_out(dataset):
+    """Бали доповнення без знань — вибір за лічильником без ключа, перевірений на цьому ключі."""
+    combos = dataset.counts.total().combos
+    tables = MatchTables.from_combos(combos)
+    for t, weights in enumerate(combos):
+        hits = 0
+        for key in np.flatnonzero(weights):
+            held_out = combos.astype(np.float64)
+            held_out[t, key] -= 1
+            choice = MatchTables.from_combos(held_out, distinct=tables.distinct).best[t, N_STATES - 1]
+            hits += weights[key] * UNKNOWN_AGREE[0, choice, key]
+        assert tables.best_points[t, N_STATES - 1] == pytest.approx(hits / weights.sum())
+    assert MASKS[0].sum() == 0
+
+
+def test_empty_counts_fall_back_to_uniform():
+    tables = MatchTables.from_combos(np.zeros((3, 125)))
+    assert np.allclose(tables.guess_pmfs.sum(axis=1), 1.0)
+    assert tables.expected_guess[0] == pytest.approx(9 / 5, abs=0.2)
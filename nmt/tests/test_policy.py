@@ -0,0 +1,15 @@
+import numpy as np
+
+from nmt.matching import MatchTables
+from nmt.policy import MATCH_GUESS, _match_pmfs
+
+
+def test_match_pmfs_are_held_out(dataset):
+    aggregate = dataset.counts.total()
+    pmfs = _match_pmfs(aggregate)
+    exact = MatchTables.from_combos(aggregate.combos, objective='exact')
+    assert np.array_equal(pmfs[MATCH_GUESS.index('expected')], aggregate.match_tables.guess_pmfs)
+    assert np.array_equal(pmfs[MATCH_GUESS.index('exact')], exact.guess_pmfs)
+    assert np.allclose(pmfs.sum(axis=-1), 1.0)
+    assert (pmfs[MATCH_GUESS.index('none'), :, 0] == 1.0).all()
+
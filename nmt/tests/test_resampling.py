@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from nmt import analytics
+from nmt.resampling import MAX_CELLS, _chunks, bootstrap, chi2_sf, chi_square, permutation_test
+
+
+def _naive_bootstrap(tests, choice, n_resamples, chunk_size, seed):
+    """Ті самі вибірки (ті самі потоки RNG), але кожна — явними індексами варіантів."""
+    n_variants = len(tests)
+    letters, optimal = [], []
+    for stream, size in _chunks(n_resamples, chunk_size, seed):
+        draws = np.random.default_rng(stream).integers(n_variants, size=(size, n_variants))
+        for rows in draws:
+            sample = tests[rows]
+            letters.append(np.bincount(sample.ravel(), minlength=5) / sample.size)
+            optimal.append((sample == choice).mean(axis=0))
+    letters, optimal = np.array(letters), np.array(optimal)
+    strategies = np.column_stack([optimal.mean(axis=1), letters, np.full(len(letters), 0.2)])
+    return letters, optimal, strategies
+
+
+@pytest.mark.parametrize('chunk_size', [7, None])
+def test_bootstrap_matches_explicit_resamples(dataset, chunk_size):
+    years = dataset.years[:1]
+    tests = dataset.tests[dataset.year_mask(years)]
+    choice = dataset.counts.total(years).optimal_letters
+    result = bootstrap(dataset, years, 50, seed=3, chunk_size=chunk_size)
+    naive = _naive_bootstrap(tests, choice, 50, chunk_size or min(50, MAX_CELLS // len(tests)), 3)
+    for got, expected in zip((result.letters, result.optimal_rates, result.strategy_rates), naive):
+        assert np.allclose(got, expected)
+
+
+def test_intervals_are_percentiles(dataset):
+    years = dataset.years
+    tests = dataset.tests[dataset.year_mask(years)]
+    aggregate = dataset.counts.total(years)
+    intervals = analytics.bootstrap_intervals(dataset, years, 200, level=0.9, seed=1)
+    letters, optimal, _ = _naive_bootstrap(tests, aggregate.optimal_letters, 200,
+                                           min(200, MAX_CELLS // len(tests)), 1)
+    for rows, samples in ((intervals['letters'], letters), (intervals['questions'], optimal)):
+        low, high = np.percentile(samples, [5, 95], axis=0)
+        assert np.allclose([row['low'] for row in rows], low)
+        assert np.allclose([row['high'] for row in rows], high)
+    assert analytics.bootstrap_intervals(dataset, years, 200, level=0.9, seed=1) is intervals  # кеш на Aggregate
+
+
+def _chi2(a, b):
+    table = np.array([a, b], dtype=float)
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / table.sum()
+    return ((table - expected) ** 2 / expected).sum()
+
+
+def test_permutation_p_matches_explicit_splits(dataset):
+    years_a, years_b = dataset.years[:1], dataset.years[1:]
+    letters = np.concatenate([
+        np.apply_along_axis(np.bincount, 1, dataset.tests[dataset.year_mask(years)], minlength=5)
+        for years in (years_a, years_b)
+    ])
+    n_a = int(dataset.year_mask(years_a).sum())
+    observed = _chi2(letters[:n_a].sum(axis=0), letters[n_a:].sum(axis=0))
+
+    stats = []
+    for stream, size in _chunks(300, min(300, MAX_CELLS // len(letters)), 5):
+        keys = np.random.default_rng(stream).random((size, len(letters)))
+        for row in keys:
+            in_a = np.zeros(len(letters), dtype=bool)
+            in_a[np.argsort(row)[:n_a]] = True
+            stats.append(_chi2(letters[in_a].sum(axis=0), letters[~in_a].sum(axis=0)))
+    p = (1 + (np.array(stats) >= observed - 1e-9).sum()) / (1 + len(stats))
+
+    got_observed, got_p = permutation_test(dataset, years_a, years_b, 300, seed=5)
+    assert np.isclose(got_observed, observed) and got_p == pytest.approx(p)
+    stat, df, _ = chi_square(letters[:n_a].sum(axis=0), letters[n_a:].sum(axis=0))
+    assert np.isclose(stat, observed) and df == 4
+
+
+@pytest.mark.parametrize('x, df, expected', [
+    (3.841458820694124, 1, 0.05), (5.991464547107979, 2, 0.05), (9.487729036781154, 4, 0.05),
+    (13.276704135987622, 4, 0.01), (0.0, 3, 1.0),
+])
+def test_chi2_sf_critical_values(x, df, expected):
+    assert chi2_sf(x, df) == pytest.approx(expected, rel=1e-9, abs=1e-12)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from nmt.sequences import CONTEXTS
+
+
+def _hit(score, key):
+    best = np.flatnonzero(score == score.max())
+    return (key in best) / len(best)
+
+
+def test_conditional_rates_match_refit(dataset):
+    """Leave-one-out умовної стратегії: лічильники перераховуються без кожного варіанта."""
+    sequences = dataset.sequences.total()
+    keys = dataset.tests
+    rates = np.zeros((len(CONTEXTS), 15))
+    for i in range(len(keys)):
+        others = np.delete(keys, i, axis=0)
+        marginal = (others[..., None] == np.arange(5)).sum(axis=0)  # (15, 5)
+        for q in range(15):
+            rates[2, q] += _hit(marginal[q], keys[i, q])
+            for context, neighbour in ((0, q - 1), (1, q + 1)):
+                if not 0 <= neighbour < 15:
+                    rates[context, q] += _hit(marginal[q], keys[i, q])
+                    continue
+                follows = others[others[:, neighbour] == keys[i, neighbour], q]
+                counts = np.bincount(follows, minlength=5)
+                # спершу перехід, нічиї — частотою літери питання
+                rates[context, q] += _hit(counts * (len(keys) + 1) + marginal[q], keys[i, q])
+    assert np.allclose(sequences.conditional_rates, rates / len(keys))
+
+
+def test_guess_pmfs_are_distributions(dataset):
+    table = dataset.sequences.total().guess_pmfs
+    assert np.allclose(table.sum(axis=1), 1.0)
+    assert table[0, 0] == pytest.approx(1.0)
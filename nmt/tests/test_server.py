@@ -0,0 +1,29 @@
+import json
+
+from nmt import server
+from nmt.diskcache import filters
+from nmt.server import PER_FILTER, ScoringService
+
+
+def test_refresh_error_is_500(dataset, monkeypatch):
+    """Помилка перечитування даних — JSON-відповідь 500, а не обірване з'єднання."""
+    service = ScoringService(dataset, path='nmt_full_data.json')
+
+    def broken(path):
+        raise json.JSONDecodeError('файл переписується', '', 0)
+
+    monkeypatch.setattr(server, 'load_dataset', broken)
+    status, body, _ = service.handle('GET', '/calculator?known_1_15=10')
+    assert status == 500
+    assert 'JSONDecodeError' in json.loads(body)['error']
+
+    monkeypatch.setattr(service, '_render', lambda *key: 1 / 0)
+    service.path = None
+    status, body, _ = service.handle('GET', '/calculator?known_1_15=10')
+    assert status == 500 and 'ZeroDivisionError' in json.loads(body)['error']
+
+
+def test_cache_holds_warm_set(dataset):
+    """Прогрів не витісняє власні записи навіть за малого cache_size."""
+    service = ScoringService(dataset, cache_size=16)
+    assert service._render.cache_parameters()['maxsize'] >= PER_FILTER * len(filters(dataset.years))